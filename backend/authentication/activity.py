@@ -0,0 +1,110 @@
+"""
+Write-behind buffer for ``User.last_activity``.
+
+Requests only record a timestamp in memory; a daemon thread per process
+flushes the buffer every ``FLUSH_INTERVAL`` seconds with one
+``UPDATE ... CASE`` statement per batch, so no request pays for the write.
+The buffer lives in process memory, which is why this is a thread rather
+than a Celery beat task.
+A cache gate (``cache.add`` with a ``GRANULARITY`` timeout) keeps a user
+from being recorded more than once per window, across processes when the
+alias points at the shared cache.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'GRANULARITY': 60,
+    'FLUSH_INTERVAL': 10,
+    'BATCH_SIZE': 500,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'LAST_ACTIVITY', {})}
+
+
+class ActivityBuffer:
+    # How often the flusher thread checks whether FLUSH_INTERVAL has passed
+    POLL_INTERVAL = 1
+
+    def __init__(self, background=False):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._background = background
+        self._flusher = None
+
+    def record(self, user_id, when=None):
+        """Buffer activity for ``user_id``; returns False if it was gated out."""
+        config = get_config()
+        gate = caches[config['CACHE_ALIAS']]
+        if not gate.add(f'activity:gate:{user_id}', 1, config['GRANULARITY']):
+            return False
+        with self._lock:
+            self._pending[user_id] = when or timezone.now()
+            if self._background and (self._flusher is None or not self._flusher.is_alive()):
+                # Started lazily so each forked worker gets its own
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, name='last-activity-flush', daemon=True
+                )
+                self._flusher.start()
+        return True
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.POLL_INTERVAL)
+            if self._pending and time.monotonic() - self._last_flush >= get_config()['FLUSH_INTERVAL']:
+                self.flush()
+                # Don't hold a connection open between flushes
+                connections.close_all()
+
+    def flush(self):
+        """Write all pending timestamps; returns the number of users updated."""
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            items = list(pending.items())
+            batch_size = get_config()['BATCH_SIZE']
+            User = get_user_model()
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                User.objects.filter(pk__in=[user_id for user_id, _ in batch]).update(
+                    last_activity=Case(
+                        *[When(pk=user_id, then=Value(when)) for user_id, when in batch],
+                        output_field=DateTimeField(),
+                    )
+                )
+            return len(items)
+        except Exception as e:
+            # Keep the timestamps for the next flush unless newer ones arrived
+            with self._lock:
+                for user_id, when in pending.items():
+                    self._pending.setdefault(user_id, when)
+            logger.warning(f'Failed to flush last_activity buffer, will retry: {e}')
+            return 0
+        finally:
+            self._flush_lock.release()
+
+    def __len__(self):
+        return len(self._pending)
+
+
+activity_buffer = ActivityBuffer(background=True)
+atexit.register(activity_buffer.flush)
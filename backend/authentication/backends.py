@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .hashing import burn_hash, verify_password
+from .user_cache import get_cached_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that hydrates the user from the user cache instead
+    of querying ``auth_user`` on every request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != user.password_digest:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+class PooledHashingModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` that verifies passwords on the bounded hashing pool.
+
+    The user lookup and any hash upgrade stay on the request thread; only
+    the hasher itself runs on the pool. Raises ``LoginCapacityExceeded``
+    (HTTP 503) when the pool is saturated.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            burn_hash(password)
+            return
+
+        is_correct, needs_rehash = verify_password(password, user.password)
+        if not is_correct:
+            return
+        if needs_rehash:
+            user.set_password(password)
+            user.save(update_fields=['password'])
+        if self.user_can_authenticate(user):
+            return user
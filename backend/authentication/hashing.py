@@ -0,0 +1,177 @@
+"""
+Bounded worker pool for password hashing.
+
+PBKDF2 verification is deliberately slow. Running it on a small dedicated
+pool caps how much CPU a login burst can take from every other endpoint,
+and a fixed queue depth lets us shed excess logins with a fast 503 instead
+of letting them pile up behind each other.
+
+The pool is per process, and under sync gunicorn workers each process
+serves one request at a time, so it alone would never fill up. Slots in the
+shared cache therefore also cap hashing jobs in flight across all processes
+(``SHARED_LIMIT``). It only spans processes when the
+``CACHE_ALIAS`` cache is shared (Redis, Memcached); with the default
+local-memory cache it is per process too. A slot left behind by a killed
+process expires after ``SHARED_TTL`` seconds, which should stay well above
+``TIMEOUT``.
+"""
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    'MAX_WORKERS': 4,
+    'MAX_QUEUE': 16,
+    'TIMEOUT': 10,
+    'SHARED_LIMIT': 32,
+    'CACHE_ALIAS': 'default',
+    'SHARED_TTL': 60,
+}
+
+_SHARED_KEY = 'login-hashing:slot'
+_UNLIMITED = object()
+
+
+class LoginCapacityExceeded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many login attempts in progress, please retry shortly.'
+    default_code = 'login_capacity_exceeded'
+    # Sent as Retry-After by DRF's exception handler
+    wait = 1
+
+
+class SharedSlots:
+    """
+    ``limit`` slots for jobs in flight across processes, kept in a Django
+    cache. Each slot is its own key holding the owner's token, with a TTL,
+    so a slot left by a killed process frees itself, and a holder whose slot
+    expired cannot release somebody else's.
+    """
+
+    def __init__(self, limit, cache_alias, ttl):
+        self.limit = limit
+        self.cache_alias = cache_alias
+        self.ttl = ttl
+
+    def _keys(self):
+        return [f'{_SHARED_KEY}:{slot}' for slot in range(self.limit)]
+
+    def in_flight(self):
+        if not self.limit:
+            return 0
+        return len(caches[self.cache_alias].get_many(self._keys()))
+
+    def acquire(self):
+        """A token for a free slot, or None if all are taken."""
+        if not self.limit:
+            return _UNLIMITED
+        cache = caches[self.cache_alias]
+        keys = self._keys()
+        taken = cache.get_many(keys)
+        token = uuid.uuid4().hex
+        for key in keys:
+            if key not in taken and cache.add(key, token, self.ttl):
+                return key, token
+        return None
+
+    def release(self, slot):
+        if slot is _UNLIMITED:
+            return
+        key, token = slot
+        cache = caches[self.cache_alias]
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+class HashingPool:
+    """
+    Thread pool that refuses work once ``max_workers + max_queue`` jobs are
+    in flight in this process, or ``shared`` has no free slot.
+    """
+
+    def __init__(self, max_workers, max_queue, timeout, shared=None):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='password-hashing'
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._shared = shared or SharedSlots(0, None, None)
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise LoginCapacityExceeded()
+        try:
+            slot = self._shared.acquire()
+        except BaseException:
+            self._slots.release()
+            raise
+        if slot is None:
+            self._slots.release()
+            raise LoginCapacityExceeded()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release(slot)
+            raise
+        future.add_done_callback(lambda _: self._release(slot))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise LoginCapacityExceeded()
+
+    def _release(self, slot):
+        self._shared.release(slot)
+        self._slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                options = {**DEFAULTS, **getattr(settings, 'LOGIN_HASHING', {})}
+                _pool = HashingPool(
+                    options['MAX_WORKERS'], options['MAX_QUEUE'], options['TIMEOUT'],
+                    SharedSlots(options['SHARED_LIMIT'], options['CACHE_ALIAS'], options['SHARED_TTL']),
+                )
+    return _pool
+
+
+def _verify(raw_password, encoded):
+    needs_rehash = []
+    is_correct = check_password(raw_password, encoded, setter=needs_rehash.append)
+    return is_correct, bool(needs_rehash)
+
+
+def verify_password(raw_password, encoded):
+    """
+    Check ``raw_password`` against ``encoded`` on the hashing pool.
+
+    Returns ``(is_correct, needs_rehash)``; raises ``LoginCapacityExceeded``
+    when the pool is saturated.
+    """
+    return get_pool().run(_verify, raw_password, encoded)
+
+
+def burn_hash(raw_password):
+    """Hash once on the pool to mask timing for unknown accounts."""
+    get_pool().run(make_password, raw_password)
+
+
+def hash_passwords(raw_passwords):
+    """
+    Hash a batch of passwords; ``None`` entries become unusable passwords.
+
+    Kept free of model imports so it can run in a process pool.
+    """
+    return [make_password(raw_password) for raw_password in raw_passwords]
@@ -0,0 +1,138 @@
+"""
+Profile and cover image renditions.
+
+Uploads are stored as-is on the request path; resizing happens afterwards
+through Celery (or an in-process fallback). Each rendition is written once
+per size and format under a content-hashed name, so the files never change
+and can be cached forever.
+"""
+import hashlib
+import logging
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+RENDITION_FIELDS = {
+    'profile_picture': 'picture_renditions',
+    'cover_image': 'cover_renditions',
+}
+
+FORMAT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def get_config():
+    return getattr(settings, 'IMAGE_RENDITIONS', {})
+
+
+def render_image(data, folder, sizes, formats, quality=82):
+    """
+    Write every size/format rendition of the image bytes in ``data``.
+
+    Returns ``(digest, {size_name: {'width', 'height', <format>: path}})``.
+    """
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    largest = max(sizes.values())
+
+    with Image.open(BytesIO(data)) as source:
+        # JPEG decodes straight at a reduced scale; other formats are
+        # reduced by an integer factor right after load
+        source.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        factor = min(image.width, image.height) // largest
+        if factor >= 2:
+            image = image.reduce(factor)
+        image = image.convert('RGB')
+
+    renditions = {}
+    for name, edge in sorted(sizes.items(), key=lambda item: -item[1]):
+        image.thumbnail((edge, edge), Image.LANCZOS)
+        entry = {'width': image.width, 'height': image.height}
+        for fmt in formats:
+            path = f'renditions/{folder}/{digest}-{name}.{FORMAT_EXTENSIONS[fmt]}'
+            if not default_storage.exists(path):
+                buffer = BytesIO()
+                image.save(buffer, format=fmt.upper(), quality=quality, optimize=True)
+                path = default_storage.save(path, ContentFile(buffer.getvalue()))
+            entry[fmt] = path
+        renditions[name] = entry
+    return digest, renditions
+
+
+def process_profile_image(profile_id, field):
+    """Render one image field of a profile and record the result on it."""
+    from .models import UserProfile
+
+    target = RENDITION_FIELDS[field]
+    profile = UserProfile.objects.filter(pk=profile_id).only('pk', field).first()
+    if profile is None:
+        return
+    file = getattr(profile, field)
+    if not file:
+        return
+
+    config = get_config()
+    try:
+        with file.open('rb') as f:
+            data = f.read()
+        digest, sizes = render_image(
+            data,
+            folder=file.field.upload_to.strip('/'),
+            sizes=config['SIZES'][field],
+            formats=config.get('FORMATS', ['webp', 'jpeg']),
+            quality=config.get('QUALITY', 82),
+        )
+        result = {'status': 'ready', 'source': file.name, 'hash': digest, 'sizes': sizes}
+    except Exception:
+        logger.exception(f"Failed to render {field} for profile {profile_id}")
+        result = {'status': 'failed', 'source': file.name}
+
+    # Only record the result if the image wasn't replaced in the meantime
+    UserProfile.objects.filter(pk=profile_id, **{field: file.name}).update(
+        **{target: result}, updated_at=timezone.now()
+    )
+
+
+def rendition_url(renditions, size, fmt=None):
+    """Storage URL of one rendition, or None until it has been rendered."""
+    if not renditions or renditions.get('status') != 'ready':
+        return None
+    entry = renditions['sizes'].get(size)
+    if not entry:
+        return None
+    path = entry.get(fmt or get_config().get('FORMATS', ['webp'])[0])
+    return default_storage.url(path) if path else None
+
+
+def _run_in_thread(profile_id, field):
+    def run():
+        try:
+            process_profile_image(profile_id, field)
+        finally:
+            connection.close()
+    threading.Thread(target=run, daemon=True).start()
+
+
+def schedule_renditions(profile_id, field):
+    """Dispatch rendering per ``IMAGE_RENDITIONS['DISPATCH']``."""
+    dispatch = get_config().get('DISPATCH', 'celery')
+    if dispatch == 'inline':
+        process_profile_image(profile_id, field)
+        return
+    if dispatch == 'celery':
+        from .tasks import render_profile_image
+        try:
+            # Runs on the request thread: without publish retries a broker
+            # outage fails fast here instead of holding up the response
+            render_profile_image.apply_async((profile_id, field), retry=False)
+            return
+        except Exception as e:
+            logger.warning(f'Celery broker unavailable, rendering images in-process: {e}')
+    _run_in_thread(profile_id, field)
@@ -0,0 +1,120 @@
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from authentication.models import User
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Measure latency of a probe endpoint with and without a concurrent login storm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', type=str, help='Base URL of a running server (default: in-process client)')
+        parser.add_argument('--probe-path', type=str, default='/api/auth/test/', help='Endpoint sampled for latency')
+        parser.add_argument('--login-threads', type=int, default=32, help='Concurrent login clients during the storm')
+        parser.add_argument('--probe-threads', type=int, default=4, help='Concurrent probe clients')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per phase')
+
+    def handle(self, *args, **options):
+        self.base_url = options['url']
+        email = f'bench-{uuid.uuid4().hex[:12]}@example.com'
+        password = uuid.uuid4().hex
+        user = User.objects.create_user(
+            username=email, email=email, password=password,
+            first_name='Bench', last_name='User'
+        )
+        self.credentials = {'email': email, 'password': password}
+
+        try:
+            # API throttling would cap the storm long before the hashing pool
+            # does, so it is switched off for in-process runs.
+            with override_settings(API_THROTTLING={'RATES': {}}):
+                baseline = self._run_phase(options, login_threads=0)
+                storm = self._run_phase(options, login_threads=options['login_threads'])
+        finally:
+            user.delete()
+
+        self._report('baseline', baseline, options['duration'])
+        self._report('login storm', storm, options['duration'])
+
+    def _request(self, client, method, path, payload=None):
+        if self.base_url:
+            data = json.dumps(payload).encode() if payload is not None else None
+            request = urllib.request.Request(
+                self.base_url.rstrip('/') + path, data=data, method=method,
+                headers={'Content-Type': 'application/json'}
+            )
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    return response.status
+            except urllib.error.HTTPError as e:
+                return e.code
+        if method == 'POST':
+            return client.post(path, payload, content_type='application/json').status_code
+        return client.get(path).status_code
+
+    def _run_phase(self, options, login_threads):
+        stop = threading.Event()
+        lock = threading.Lock()
+        result = {'probe_latencies': [], 'logins': 0, 'shed': 0, 'errors': 0}
+
+        def probe():
+            client = Client()
+            while not stop.is_set():
+                started = time.perf_counter()
+                self._request(client, 'GET', options['probe_path'])
+                elapsed = time.perf_counter() - started
+                with lock:
+                    result['probe_latencies'].append(elapsed)
+
+        def login():
+            client = Client()
+            while not stop.is_set():
+                code = self._request(client, 'POST', '/api/auth/login/', self.credentials)
+                with lock:
+                    if code == 200:
+                        result['logins'] += 1
+                    elif code == 503:
+                        result['shed'] += 1
+                    else:
+                        result['errors'] += 1
+
+        threads = [threading.Thread(target=probe) for _ in range(options['probe_threads'])]
+        threads += [threading.Thread(target=login) for _ in range(login_threads)]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return result
+
+    def _report(self, label, result, duration):
+        latencies = [s * 1000 for s in result['probe_latencies']]
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f'  probe requests: {len(latencies)}')
+        if latencies:
+            self.stdout.write(
+                f'  probe latency ms: p50={statistics.median(latencies):.1f} '
+                f'p95={percentile(latencies, 95):.1f} p99={percentile(latencies, 99):.1f}'
+            )
+        self.stdout.write(
+            f'  logins/sec: {result["logins"] / duration:.1f} '
+            f'(shed with 503: {result["shed"]}, other failures: {result["errors"]})'
+        )
@@ -0,0 +1,149 @@
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from authentication.hashing import hash_passwords
+from authentication.models import User, UserProfile, ProfilePrivacySettings, UserPreferences
+from credits.models import UserCredit
+
+ROLES = {role for role, _ in User.ROLE_CHOICES}
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = 'Import users from a CSV or JSONL file in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help="CSV or JSONL file, or '-' for stdin")
+        parser.add_argument('--format', type=str, choices=['csv', 'jsonl'], help='Input format (default: from extension)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Password hashing processes')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        self.verbosity = options['verbosity']
+        self.created = self.skipped = self.invalid = 0
+        self.started = time.monotonic()
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        # Worker processes only hash; don't hand them our database connection.
+        connections.close_all()
+        try:
+            with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                rows = self._read(stream, fmt)
+                pending = None
+                for chunk in chunked(rows, options['chunk_size']):
+                    chunk = self._clean(chunk)
+                    # Hash the next chunk while the current one is written
+                    futures = self._submit(pool, chunk, options['workers'])
+                    if pending:
+                        self._write(*pending)
+                    pending = (chunk, futures)
+                if pending:
+                    self._write(*pending)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.created} users in {elapsed:.1f}s '
+            f'({self.created / elapsed if elapsed else 0:.0f} rows/sec); '
+            f'skipped {self.skipped} existing, {self.invalid} invalid'
+        ))
+
+    def _read(self, stream, fmt):
+        if fmt == 'csv':
+            yield from csv.DictReader(stream)
+            return
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise CommandError(f'Line {line_number}: {e}')
+
+    def _clean(self, rows):
+        cleaned = []
+        for row in rows:
+            email = (row.get('email') or '').strip().lower()
+            role = (row.get('role') or 'user').strip()
+            if not email or role not in ROLES:
+                self.invalid += 1
+                if self.verbosity > 1:
+                    self.stderr.write(f'Invalid row: {row}')
+                continue
+            is_active = row.get('is_active', True)
+            if isinstance(is_active, str):
+                is_active = is_active.strip().lower() in TRUE_VALUES
+            cleaned.append({
+                'email': email,
+                'username': (row.get('username') or email).strip(),
+                'first_name': (row.get('first_name') or '').strip(),
+                'last_name': (row.get('last_name') or '').strip(),
+                'phone': (row.get('phone') or '').strip() or None,
+                'role': role,
+                'is_active': bool(is_active),
+                'password': row.get('password') or None,
+            })
+        return cleaned
+
+    def _submit(self, pool, chunk, workers):
+        passwords = [row.pop('password') for row in chunk]
+        size = max(1, -(-len(passwords) // workers))
+        return [pool.submit(hash_passwords, batch) for batch in chunked(passwords, size)]
+
+    def _write(self, chunk, futures):
+        hashes = [password for future in futures for password in future.result()]
+
+        emails = [row['email'] for row in chunk]
+        usernames = [row['username'] for row in chunk]
+        taken = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        taken |= set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+        users, seen = [], set()
+        for row, password in zip(chunk, hashes):
+            if row['email'] in taken or row['username'] in taken or row['email'] in seen or row['username'] in seen:
+                self.skipped += 1
+                continue
+            seen.update((row['email'], row['username']))
+            users.append(User(password=password, **row))
+
+        with transaction.atomic():
+            users = User.objects.bulk_create(users)
+            profiles = [
+                UserProfile(user=user, first_name=user.first_name, last_name=user.last_name)
+                for user in users
+            ]
+            for profile in profiles:
+                profile.calculate_completion()
+            UserProfile.objects.bulk_create(profiles)
+            ProfilePrivacySettings.objects.bulk_create([ProfilePrivacySettings(user=user) for user in users])
+            UserPreferences.objects.bulk_create([UserPreferences(user=user) for user in users])
+            UserCredit.objects.bulk_create([UserCredit(user=user) for user in users])
+
+        self.created += len(users)
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f'  {self.created} imported, {self.skipped} skipped '
+            f'({self.created / elapsed if elapsed else 0:.0f} rows/sec)'
+        )
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from authentication.models import UserProfile
+
+SCORE_FIELDS = ['profile_completion_percentage', 'is_profile_complete']
+
+
+class Command(BaseCommand):
+    help = 'Recompute profile completion scores for all profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Profiles per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without writing them')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        started = time.monotonic()
+        last_pk = 0
+        scanned = changed = 0
+
+        while True:
+            # Keyset pagination: each batch is an index range scan on the pk
+            profiles = list(
+                UserProfile.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('pk', *UserProfile.COMPLETION_FIELDS, *SCORE_FIELDS)[:chunk_size]
+            )
+            if not profiles:
+                break
+            last_pk = profiles[-1].pk
+            scanned += len(profiles)
+
+            stale = [profile for profile in profiles if profile.calculate_completion()]
+            changed += len(stale)
+            if stale and not options['dry_run']:
+                # bulk_update skips auto_now; bump it so cached profile responses go stale
+                now = timezone.now()
+                for profile in stale:
+                    profile.updated_at = now
+                with transaction.atomic():
+                    UserProfile.objects.bulk_update(stale, [*SCORE_FIELDS, 'updated_at'])
+
+            self.stdout.write(f'  scanned {scanned}, updated {changed} (last id {last_pk})')
+
+        verb = 'would update' if options['dry_run'] else 'updated'
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {scanned} profiles, {verb} {changed} in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,24 @@
+from . import presence
+from .activity import activity_buffer
+
+
+class LastActivityMiddleware:
+    """
+    Record activity and a presence heartbeat for the authenticated user
+    of each request.
+
+    Runs after the view so it sees the user resolved by DRF's JWT
+    authentication, which is not known to Django's own middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            # The activity gate also paces heartbeats (GRANULARITY < TTL)
+            if activity_buffer.record(user.pk):
+                presence.heartbeat(user.pk)
+        return response
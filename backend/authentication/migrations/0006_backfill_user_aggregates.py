@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def backfill_user_aggregates(apps, schema_editor):
+    """Create any profile, settings or credit rows missing for existing users."""
+    User = apps.get_model('authentication', 'User')
+    related_models = [
+        apps.get_model('authentication', 'UserProfile'),
+        apps.get_model('authentication', 'ProfilePrivacySettings'),
+        apps.get_model('authentication', 'UserPreferences'),
+        apps.get_model('credits', 'UserCredit'),
+    ]
+    for model in related_models:
+        existing = model.objects.values('user_id')
+        missing = User.objects.exclude(pk__in=existing).values_list('pk', flat=True)
+        model.objects.bulk_create(
+            [model(user_id=user_id) for user_id in missing.iterator()],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_remove_userprofile_bio'),
+        ('credits', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_aggregates, migrations.RunPython.noop),
+    ]
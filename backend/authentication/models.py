@@ -1,8 +1,7 @@
 # backend/authentication/models.py
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import RegexValidator, EmailValidator
-from PIL import Image
 import uuid
 import os
 
@@ -60,10 +59,25 @@ class User(AbstractUser):
         if not self.email:
             raise ValueError("User must have an email address")
 
-        super().save(*args, **kwargs)
-        # Create profile if doesn't exist
-        if not hasattr(self, 'profile'):
-            UserProfile.objects.create(user=self)
+        # Keep updated_at moving on partial saves; the user cache is keyed on
+        # it. Logins only record last_login, which nothing cached relies on.
+        update_fields = kwargs.get('update_fields')
+        login_only = update_fields is not None and set(update_fields) == {'last_login'}
+        if update_fields and not login_only and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['updated_at']
+
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            if not login_only:
+                from .user_cache import invalidate_user
+                invalidate_user(self.pk)
+            return
+
+        # New users get their whole aggregate in the same transaction
+        from .services import provision_user_related
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            provision_user_related(self)
 
 
 class UserProfile(models.Model):
@@ -113,6 +127,9 @@ class UserProfile(models.Model):
         null=True,
         blank=True  
     )
+    # Resized copies, filled in by authentication.images after upload
+    picture_renditions = models.JSONField(default=dict, blank=True)
+    cover_renditions = models.JSONField(default=dict, blank=True)
     
     # Preferences
     language = models.CharField(max_length=10, default='en')
@@ -138,42 +155,70 @@ class UserProfile(models.Model):
             models.Index(fields=['city', 'country']),
         ]
 
+    # Fields counted towards profile_completion_percentage
+    COMPLETION_FIELDS = [
+        'first_name', 'last_name', 'job_title',
+        'company', 'city', 'country', 'profile_picture'
+    ]
+
     def save(self, *args, **kwargs):
-        # Set first_name and last_name from user model if they are empty
-        if not self.first_name and self.user.first_name:
-            self.first_name = self.user.first_name
-        if not self.last_name and self.user.last_name:
-            self.last_name = self.user.last_name
-            
-        super().save(*args, **kwargs)
-        if self.profile_picture:
-            try:
-                # Optimize image
-                img = Image.open(self.profile_picture.path)
-                if img.height > 500 or img.width > 500:
-                    img.thumbnail((500, 500), Image.LANCZOS)
-                    img.save(self.profile_picture.path, optimize=True, quality=85)
-            except FileNotFoundError:
-                # This can happen if the file doesn't exist yet (e.g., in-memory upload)
-                # The image will be processed once it's saved to the filesystem.
-                pass
-        
-        # Update completion percentage
+        # Set first_name and last_name from user model if they are empty;
+        # only on create, so updates don't have to load the user row
+        if self._state.adding:
+            if not self.first_name and self.user.first_name:
+                self.first_name = self.user.first_name
+            if not self.last_name and self.user.last_name:
+                self.last_name = self.user.last_name
+
+        # Score completion before the write so it lands in the same UPDATE
         self.calculate_completion()
+        update_fields = kwargs.get('update_fields')
+        if update_fields and set(update_fields) & set(self.COMPLETION_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | {
+                'profile_completion_percentage', 'is_profile_complete'
+            }
+
+        # New uploads are resized in the background once the row is committed
+        from .images import RENDITION_FIELDS, schedule_renditions
+        uploaded = []
+        for field, target in RENDITION_FIELDS.items():
+            if update_fields is not None and field not in update_fields:
+                continue
+            file = getattr(self, field)
+            if file and not file._committed:
+                setattr(self, target, {'status': 'pending'})
+                uploaded.append(field)
+            elif not file and getattr(self, target):
+                setattr(self, target, {})
+            else:
+                continue
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {target}
+
+        super().save(*args, **kwargs)
+        for field in uploaded:
+            transaction.on_commit(
+                lambda field=field: schedule_renditions(self.pk, field)
+            )
 
     def calculate_completion(self):
-        """Calculate profile completion percentage"""
-        required_fields = [
-            'first_name', 'last_name', 'job_title',
-            'company', 'city', 'country', 'profile_picture'
-        ]
-        completed_fields = sum(1 for field in required_fields if getattr(self, field, None))
-        percentage = int((completed_fields / len(required_fields)) * 100)
-        
-        if self.profile_completion_percentage != percentage:
-            self.profile_completion_percentage = percentage
-            self.is_profile_complete = percentage >= 80
-            self.save(update_fields=['profile_completion_percentage', 'is_profile_complete'])
+        """
+        Calculate profile completion percentage in memory.
+
+        Does not save; ``save()`` calls it so the score is written with the
+        rest of the row. Returns True if the stored score changed.
+        """
+        completed_fields = sum(1 for field in self.COMPLETION_FIELDS if getattr(self, field, None))
+        percentage = int((completed_fields / len(self.COMPLETION_FIELDS)) * 100)
+        is_complete = percentage >= 80
+
+        changed = (
+            self.profile_completion_percentage != percentage
+            or self.is_profile_complete != is_complete
+        )
+        self.profile_completion_percentage = percentage
+        self.is_profile_complete = is_complete
+        return changed
 
     def __str__(self):
         return f"{self.user.get_full_name()}'s Profile"
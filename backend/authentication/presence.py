@@ -0,0 +1,87 @@
+"""
+TTL-based online presence.
+
+Each heartbeat writes ``presence:<user_id>`` with a short timeout, so a user
+is online for as long as the key lives. Lookups for a list of ids are a
+single ``get_many``. Users who turned off ``show_online_status`` are never
+registered, and switching it off removes their key immediately. Set
+``PRESENCE['CACHE_ALIAS']`` to ``'local'`` for single-node and test runs.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TTL': 150,
+    'VISIBILITY_TIMEOUT': 3600,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PRESENCE', {})}
+
+
+def _cache(config):
+    return caches[config['CACHE_ALIAS']]
+
+
+def _presence_key(user_id):
+    return f'presence:{user_id}'
+
+
+def _visibility_key(user_id):
+    return f'presence:visible:{user_id}'
+
+
+def is_visible(user_id):
+    """Whether the user lets others see their online status (cached)."""
+    from .models import ProfilePrivacySettings
+
+    config = get_config()
+    cache = _cache(config)
+    visible = cache.get(_visibility_key(user_id))
+    if visible is None:
+        visible = not ProfilePrivacySettings.objects.filter(
+            user_id=user_id, show_online_status=False
+        ).exists()
+        cache.set(_visibility_key(user_id), visible, config['VISIBILITY_TIMEOUT'])
+    return visible
+
+
+def set_visibility(user_id, visible):
+    config = get_config()
+    cache = _cache(config)
+    cache.set(_visibility_key(user_id), visible, config['VISIBILITY_TIMEOUT'])
+    if not visible:
+        cache.delete(_presence_key(user_id))
+
+
+def heartbeat(user_id, when=None):
+    """Mark the user online for ``TTL`` seconds; returns False if they are hidden."""
+    if not is_visible(user_id):
+        return False
+    config = get_config()
+    when = when or timezone.now()
+    _cache(config).set(_presence_key(user_id), when.timestamp(), config['TTL'])
+    return True
+
+
+def go_offline(user_id):
+    _cache(get_config()).delete(_presence_key(user_id))
+
+
+def online_among(user_ids):
+    """Return ``{user_id: last_seen}`` for the ids that are currently online."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    found = _cache(get_config()).get_many([_presence_key(user_id) for user_id in user_ids])
+    online = {}
+    for user_id in user_ids:
+        seen = found.get(_presence_key(user_id))
+        if seen is not None:
+            online[user_id] = datetime.fromtimestamp(seen, tz=dt_timezone.utc)
+    return online
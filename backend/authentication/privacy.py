@@ -0,0 +1,254 @@
+"""
+Field-level profile privacy.
+
+Each user's ``ProfilePrivacySettings`` compile into a bitmask with one bit
+per (field group, viewer class) pair, cached under ``privacy:mask:<id>``.
+To render other users' profiles a view works out its relationship to each
+owner, takes the union of the groups visible across the page and fetches
+only those columns in one query, then drops per row whatever that owner
+hides from this viewer.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 3600,
+}
+
+# Viewer classes, from least to most privileged
+ANONYMOUS, AUTHENTICATED, CONNECTION, SELF, ADMIN = range(5)
+VIEWER_CLASSES = (ANONYMOUS, AUTHENTICATED, CONNECTION, SELF, ADMIN)
+
+# The least privileged viewer class that sees a field at each visibility
+VISIBILITY_THRESHOLDS = {
+    'public': ANONYMOUS,
+    'authenticated': AUTHENTICATED,
+    'connections': CONNECTION,
+    'private': SELF,
+}
+
+# Field group -> (ProfilePrivacySettings field, columns reached from UserProfile)
+FIELD_GROUPS = {
+    # Usernames default to the email address, so they share its setting
+    'email': ('email_visibility', ('user__email', 'user__username')),
+    'phone': ('phone_visibility', ('user__phone',)),
+    'address': ('address_visibility', ('address_line_1', 'address_line_2', 'postal_code')),
+    'job_info': ('job_info_visibility', ('job_title', 'company', 'department')),
+    'social_links': ('social_links_visibility', ('website', 'linkedin_url', 'github_url')),
+}
+GROUP_NAMES = tuple(FIELD_GROUPS)
+
+# Shown to everyone regardless of settings
+PUBLIC_COLUMNS = (
+    'user_id', 'first_name', 'last_name',
+    'city', 'state_province', 'country', 'timezone',
+    'profile_picture', 'picture_renditions', 'cover_image', 'cover_renditions',
+)
+# Not covered by any setting; only the owner and admins see them
+OWNER_COLUMNS = ('date_of_birth', 'gender')
+
+# UserSerializer fields (top level and nested profile) shown to everyone in
+# addition to the PUBLIC_COLUMNS; mask_users nulls the rest unless a
+# visible group covers them
+PUBLIC_USER_FIELDS = ('id', 'first_name', 'last_name', 'avatar', 'is_active', 'get_full_name', 'profile')
+PUBLIC_PROFILE_FIELDS = (
+    'id', 'user', 'full_name', 'initials', 'profile_picture_url', 'profile_picture_urls',
+)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PRIVACY_PROJECTION', {})}
+
+
+def _mask_key(user_id):
+    return f'privacy:mask:{user_id}'
+
+
+def _bit(group, viewer_class):
+    return 1 << (GROUP_NAMES.index(group) * len(VIEWER_CLASSES) + viewer_class)
+
+
+def compile_mask(visibility):
+    """
+    Compile ``{<settings field>: <visibility>}`` (or a settings instance)
+    into a bitmask of the groups each viewer class may see.
+    """
+    mask = 0
+    for group, (setting, _) in FIELD_GROUPS.items():
+        if isinstance(visibility, dict):
+            level = visibility.get(setting)
+        else:
+            level = getattr(visibility, setting)
+        threshold = VISIBILITY_THRESHOLDS.get(level, SELF)
+        for viewer_class in VIEWER_CLASSES:
+            if viewer_class >= threshold:
+                mask |= _bit(group, viewer_class)
+    return mask
+
+
+def _default_mask():
+    from .models import ProfilePrivacySettings
+
+    return compile_mask({
+        setting: ProfilePrivacySettings._meta.get_field(setting).default
+        for setting, _ in FIELD_GROUPS.values()
+    })
+
+
+def cache_mask(settings_obj):
+    """Store the compiled mask for a saved ``ProfilePrivacySettings``."""
+    config = get_config()
+    caches[config['CACHE_ALIAS']].set(
+        _mask_key(settings_obj.user_id), compile_mask(settings_obj), config['TIMEOUT']
+    )
+
+
+def invalidate_mask(user_id):
+    caches[get_config()['CACHE_ALIAS']].delete(_mask_key(user_id))
+
+
+def get_masks(user_ids):
+    """Compiled masks for ``user_ids``; misses are loaded in one query."""
+    from .models import ProfilePrivacySettings
+
+    config = get_config()
+    cache = caches[config['CACHE_ALIAS']]
+    keys = {_mask_key(user_id): user_id for user_id in user_ids}
+    masks = {keys[key]: mask for key, mask in cache.get_many(list(keys)).items()}
+
+    missing = [user_id for user_id in user_ids if user_id not in masks]
+    if missing:
+        settings_fields = [setting for setting, _ in FIELD_GROUPS.values()]
+        loaded = {
+            row['user_id']: compile_mask(row)
+            for row in ProfilePrivacySettings.objects.filter(
+                user_id__in=missing
+            ).values('user_id', *settings_fields)
+        }
+        default = _default_mask()
+        for user_id in missing:
+            masks[user_id] = loaded.get(user_id, default)
+        cache.set_many(
+            {_mask_key(user_id): masks[user_id] for user_id in missing},
+            config['TIMEOUT']
+        )
+    return masks
+
+
+def connections_among(viewer, user_ids):
+    """The subset of ``user_ids`` sharing a project with ``viewer``."""
+    from projects.models import ProjectMembership
+
+    if not viewer.is_authenticated or not user_ids:
+        return set()
+    return set(
+        ProjectMembership.objects.filter(
+            project__memberships__user=viewer, user_id__in=user_ids
+        ).values_list('user_id', flat=True)
+    )
+
+
+def viewer_class(viewer, owner_id, connections=()):
+    if not viewer.is_authenticated:
+        return ANONYMOUS
+    if viewer.is_superuser or getattr(viewer, 'role', None) == 'admin':
+        return ADMIN
+    if viewer.pk == owner_id:
+        return SELF
+    if owner_id in connections:
+        return CONNECTION
+    return AUTHENTICATED
+
+
+def visible_groups(mask, viewer_class):
+    return frozenset(
+        group for group in GROUP_NAMES if mask & _bit(group, viewer_class)
+    )
+
+
+def visible_columns(groups, owner_columns=False):
+    columns = list(PUBLIC_COLUMNS)
+    if owner_columns:
+        columns.extend(OWNER_COLUMNS)
+    for group in GROUP_NAMES:
+        if group in groups:
+            columns.extend(FIELD_GROUPS[group][1])
+    return columns
+
+
+def project_profiles(viewer, user_ids):
+    """
+    Visible profile columns of ``user_ids`` as dicts, in the given order.
+
+    Column names reached through the user keep their ``user__`` prefix
+    stripped, e.g. ``email`` rather than ``user__email``.
+    """
+    from .models import UserProfile
+
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+    masks = get_masks(user_ids)
+    connections = connections_among(viewer, user_ids)
+
+    visible = {}
+    for user_id in user_ids:
+        cls = viewer_class(viewer, user_id, connections)
+        visible[user_id] = (visible_groups(masks[user_id], cls), cls >= SELF)
+
+    # Fetch the union across the page, then trim each row to its own groups
+    union = frozenset().union(*(groups for groups, _ in visible.values()))
+    with_owner_columns = any(owner for _, owner in visible.values())
+    rows = {
+        row['user_id']: row
+        for row in UserProfile.objects.filter(user_id__in=user_ids).values(
+            *visible_columns(union, with_owner_columns)
+        )
+    }
+
+    profiles = []
+    for user_id in user_ids:
+        row = rows.get(user_id)
+        if row is None:
+            continue
+        groups, owner = visible[user_id]
+        profiles.append({
+            column.replace('user__', '', 1): row[column]
+            for column in visible_columns(groups, owner)
+        })
+    return profiles
+
+
+def mask_users(viewer, users):
+    """
+    Null the fields of serialized users (``UserSerializer`` payloads) that
+    each one hides from ``viewer``, keeping the payload shape. Modifies and
+    returns ``users``.
+    """
+    user_ids = [user['id'] for user in users]
+    if not user_ids:
+        return users
+    masks = get_masks(user_ids)
+    connections = connections_among(viewer, user_ids)
+    for user in users:
+        cls = viewer_class(viewer, user['id'], connections)
+        if cls >= SELF:
+            continue
+        columns = visible_columns(visible_groups(masks[user['id']], cls))
+        top = set(PUBLIC_USER_FIELDS).union(
+            column[len('user__'):] for column in columns if column.startswith('user__')
+        )
+        for key in user:
+            if key not in top:
+                user[key] = None
+        profile = user.get('profile')
+        if profile:
+            nested = set(PUBLIC_PROFILE_FIELDS).union(columns)
+            for key in profile:
+                if key not in nested:
+                    profile[key] = None
+            if 'username' not in top and not (user['first_name'] and user['last_name']):
+                # Both fall back to the (hidden) username without a full name
+                profile['full_name'] = profile['initials'] = None
+    return users
@@ -0,0 +1,76 @@
+"""
+Rendered response cache for the profile ``me`` endpoint.
+
+The response version is derived from the ``updated_at`` of the user, profile,
+privacy settings and preferences rows, read in one query. ``last_activity``
+is deliberately left out: it would change the version every
+``LAST_ACTIVITY['GRANULARITY']``, so the ``last_activity`` in a cached
+payload is as of its last re-render, not live. That version doubles as the ETag, so a
+poll that matches needs no serialization at all: either a 304, or the cached
+bytes when the client has no validator.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 600,
+}
+
+VERSION_FIELDS = (
+    'updated_at', 'profile__updated_at',
+    'privacy_settings__updated_at', 'preferences__updated_at',
+)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PROFILE_RESPONSE_CACHE', {})}
+
+
+def _cache(config):
+    return caches[config['CACHE_ALIAS']]
+
+
+def _response_key(user_id):
+    return f'profile:me:{user_id}'
+
+
+def profile_version(user_id, request):
+    """
+    Return ``(etag, last_modified)`` for the user's ``me`` payload, or
+    ``(None, None)`` if the user does not exist.
+
+    Host and query string are folded into the ETag as they change the
+    rendered URLs.
+    """
+    from .models import User
+
+    versions = User.objects.filter(pk=user_id).values_list(*VERSION_FIELDS).first()
+    if versions is None:
+        return None, None
+    source = '|'.join([
+        str(user_id), request.get_host(), request.META.get('QUERY_STRING', ''),
+        *(value.isoformat() if value else '' for value in versions),
+    ])
+    etag = '"%s"' % hashlib.md5(source.encode()).hexdigest()
+    last_modified = max(value for value in versions if value)
+    return etag, last_modified
+
+
+def get_rendered(user_id, etag):
+    """Cached response bytes if they were rendered for ``etag``."""
+    cached = _cache(get_config()).get(_response_key(user_id))
+    if cached and cached[0] == etag:
+        return cached[1]
+    return None
+
+
+def store_rendered(user_id, etag, content):
+    config = get_config()
+    _cache(config).set(_response_key(user_id), (etag, content), config['TIMEOUT'])
+
+
+def invalidate_profile_response(user_id):
+    _cache(get_config()).delete(_response_key(user_id))
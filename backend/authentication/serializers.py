@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from .images import rendition_url
 from .models import User, UserProfile, ProfilePrivacySettings, UserPreferences
 
 
@@ -37,21 +38,43 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
 class UserProfileSerializer(serializers.ModelSerializer):
     """Comprehensive profile serializer with computed fields"""
+    AVATAR_SIZES = ('thumbnail', 'small', 'medium')
+
     profile_picture_url = serializers.SerializerMethodField()
+    profile_picture_urls = serializers.SerializerMethodField()
     full_name = serializers.SerializerMethodField()
     initials = serializers.SerializerMethodField()
     
     class Meta:
         model = UserProfile
         fields = '__all__'
-        read_only_fields = ['user', 'profile_completion_percentage', 'is_profile_complete', 'created_at', 'updated_at']
+        read_only_fields = [
+            'user', 'profile_completion_percentage', 'is_profile_complete',
+            'picture_renditions', 'cover_renditions', 'created_at', 'updated_at'
+        ]
     
     def get_profile_picture_url(self, obj):
+        """
+        Original picture, or the rendition named by ``?avatar_size=`` once
+        it has been rendered.
+        """
         if obj.profile_picture:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.profile_picture.url)
+                size = request.GET.get('avatar_size')
+                url = rendition_url(obj.picture_renditions, size) if size else None
+                return request.build_absolute_uri(url or obj.profile_picture.url)
         return None
+
+    def get_profile_picture_urls(self, obj):
+        """Content-hashed rendition URLs by size; empty until rendered."""
+        request = self.context.get('request')
+        urls = {}
+        for size in self.AVATAR_SIZES:
+            url = rendition_url(obj.picture_renditions, size)
+            if url:
+                urls[size] = request.build_absolute_uri(url) if request else url
+        return urls
     
     def get_full_name(self, obj):
         if obj.user.first_name and obj.user.last_name:
@@ -132,9 +155,18 @@ class UserDashboardSerializer(serializers.ModelSerializer):
             'credits', 'projects', 'recent_messages'
         )
     
+    def _counters(self, obj):
+        # One row fetch shared by the credits and projects fields
+        if not hasattr(self, '_dashboard_counters'):
+            from core.dashboard import get_counters
+            self._dashboard_counters = get_counters(obj)
+        return self._dashboard_counters
+
     def get_credits(self, obj):
         try:
-            credits = obj.credits
+            credits = self._counters(obj).user.credits
+            if credits.shard_count:
+                credits.refresh_balances()
             return {
                 'balance': str(credits.balance),
                 'total_earned': str(credits.total_earned),
@@ -149,12 +181,10 @@ class UserDashboardSerializer(serializers.ModelSerializer):
     
     def get_projects(self, obj):
         try:
-            from projects.models import Project
-            active_projects = Project.objects.filter(owner=obj, status='active').count()
-            total_projects = Project.objects.filter(owner=obj).count()
+            counters = self._counters(obj)
             return {
-                'active_count': active_projects,
-                'total_count': total_projects,
+                'active_count': counters.projects_active,
+                'total_count': counters.projects_total,
             }
         except:
             return {
@@ -165,7 +195,7 @@ class UserDashboardSerializer(serializers.ModelSerializer):
     def get_recent_messages(self, obj):
         try:
             from messaging.models import Message
-            messages = Message.objects.filter(recipient=obj).order_by('-created_at')[:5]
+            messages = Message.objects.filter(recipient=obj).select_related('sender').order_by('-created_at')[:5]
             return [
                 {
                     'id': msg.id,
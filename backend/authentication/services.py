@@ -0,0 +1,17 @@
+from .models import UserProfile, ProfilePrivacySettings, UserPreferences
+
+
+def provision_user_related(user):
+    """
+    Create the rows that make up a user aggregate for a freshly inserted user:
+    profile, privacy settings, preferences and credit balance.
+
+    Always four inserts; call it inside the transaction that inserted ``user``.
+    """
+    from credits.models import UserCredit
+
+    UserProfile(user=user, first_name=user.first_name, last_name=user.last_name).save()
+    ProfilePrivacySettings.objects.create(user=user)
+    UserPreferences.objects.create(user=user)
+    UserCredit.objects.create(user=user)
+
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import presence, privacy
+from .models import User, ProfilePrivacySettings
+from .user_cache import invalidate_user
+
+
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=ProfilePrivacySettings)
+def sync_presence_visibility(sender, instance, **kwargs):
+    presence.set_visibility(instance.user_id, instance.show_online_status)
+
+
+@receiver(post_save, sender=ProfilePrivacySettings)
+def refresh_privacy_mask(sender, instance, **kwargs):
+    privacy.cache_mask(instance)
+
+
+@receiver(post_delete, sender=ProfilePrivacySettings)
+def drop_privacy_mask(sender, instance, **kwargs):
+    privacy.invalidate_mask(instance.user_id)
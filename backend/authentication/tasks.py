@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .images import process_profile_image
+
+
+@shared_task(ignore_result=True)
+def render_profile_image(profile_id, field):
+    """Build the resized renditions for a profile's picture or cover image."""
+    process_profile_image(profile_id, field)
@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..activity import ActivityBuffer, activity_buffer
+
+User = get_user_model()
+
+
+@override_settings(LAST_ACTIVITY={'CACHE_ALIAS': 'local', 'GRANULARITY': 60, 'FLUSH_INTERVAL': 3600})
+class LastActivityBufferTests(TestCase):
+    def setUp(self):
+        caches['local'].clear()
+        self.users = [
+            User.objects.create_user(
+                username=f'active{i}',
+                email=f'active{i}@example.com',
+                password='testpass123'
+            )
+            for i in range(3)
+        ]
+
+    def test_flush_is_one_statement_per_batch(self):
+        buffer = ActivityBuffer()
+        for _ in range(5):
+            for user in self.users:
+                buffer.record(user.pk)
+        self.assertEqual(len(buffer), 3)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(buffer.flush(), 3)
+        for user in self.users:
+            user.refresh_from_db()
+            self.assertIsNotNone(user.last_activity)
+
+    def test_granularity_coalesces_repeat_activity(self):
+        buffer = ActivityBuffer()
+        buffer.record(self.users[0].pk)
+        buffer.flush()
+        buffer.record(self.users[0].pk)
+        self.assertEqual(len(buffer), 0)
+
+    def test_middleware_records_jwt_user(self):
+        client = APIClient()
+        client.force_authenticate(user=self.users[0])
+        client.get('/api/auth/test/')
+        activity_buffer.flush()
+        self.users[0].refresh_from_db()
+        self.assertIsNotNone(self.users[0].last_activity)
+
+
+@override_settings(LAST_ACTIVITY={'CACHE_ALIAS': 'local', 'GRANULARITY': 60, 'FLUSH_INTERVAL': 0})
+class BackgroundFlushTests(TransactionTestCase):
+    def test_flusher_thread_writes_without_a_request(self):
+        caches['local'].clear()
+        user = User.objects.create_user(
+            username='idle', email='idle@example.com', password='testpass123'
+        )
+        buffer = ActivityBuffer(background=True)
+        buffer.POLL_INTERVAL = 0.05
+        with self.assertNumQueries(0):
+            self.assertTrue(buffer.record(user.pk))
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if User.objects.filter(pk=user.pk, last_activity__isnull=False).exists():
+                break
+            time.sleep(0.05)
+        user.refresh_from_db()
+        self.assertIsNotNone(user.last_activity)
@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from credits.models import UserCredit
+from ..models import ProfilePrivacySettings, UserPreferences, UserProfile
+
+User = get_user_model()
+
+
+# The command closes the database connections before forking its hashing
+# workers, which would end a TestCase's wrapping transaction
+class BulkImportUsersTests(TransactionTestCase):
+    def setUp(self):
+        User.objects.create_user(
+            username='existing@example.com',
+            email='existing@example.com',
+            password='testpass123'
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        out = StringIO()
+        call_command('bulk_import_users', path, workers=1, stdout=out, stderr=StringIO(), **options)
+        return out.getvalue()
+
+    def test_csv_import_creates_related_rows(self):
+        path = self.write('users.csv', '\n'.join([
+            'email,first_name,last_name,role,is_active,password',
+            'Ada@Example.com,Ada,Lovelace,admin,yes,s3cret-pass',
+            'grace@example.com,Grace,Hopper,,no,',
+            'existing@example.com,Dup,Licate,user,yes,',
+            'grace@example.com,Grace,Again,user,yes,',
+            ',No,Email,user,yes,',
+            'bad@example.com,Bad,Role,wizard,yes,',
+        ]) + '\n')
+        output = self.run_import(path, chunk_size=2)
+        self.assertIn('Imported 2 users', output)
+        self.assertIn('skipped 2 existing, 2 invalid', output)
+
+        ada = User.objects.get(email='ada@example.com')
+        self.assertEqual((ada.username, ada.role, ada.is_active), ('ada@example.com', 'admin', True))
+        self.assertTrue(ada.check_password('s3cret-pass'))
+        grace = User.objects.get(email='grace@example.com')
+        self.assertEqual((grace.role, grace.is_active, grace.last_name), ('user', False, 'Hopper'))
+        self.assertFalse(grace.has_usable_password())
+
+        imported = [ada.pk, grace.pk]
+        self.assertEqual(
+            set(UserProfile.objects.filter(user_id__in=imported).values_list('first_name', flat=True)),
+            {'Ada', 'Grace'}
+        )
+        for model in (ProfilePrivacySettings, UserPreferences, UserCredit):
+            self.assertEqual(model.objects.filter(user_id__in=imported).count(), 2)
+
+    def test_jsonl_import_skips_existing_users(self):
+        rows = [
+            {'email': 'lin@example.com', 'username': 'lin', 'first_name': 'Lin', 'is_active': True},
+            {'email': 'existing@example.com'},
+            {'email': 'other@example.com', 'username': 'lin'},
+        ]
+        path = self.write('users.jsonl', '\n'.join(json.dumps(row) for row in rows) + '\n\n')
+        output = self.run_import(path)
+        self.assertIn('Imported 1 users', output)
+        self.assertIn('skipped 2 existing, 0 invalid', output)
+        self.assertEqual(User.objects.get(username='lin').profile.first_name, 'Lin')
+        self.assertFalse(User.objects.filter(email='other@example.com').exists())
+
+        # Re-running the same file creates nothing new
+        output = self.run_import(path)
+        self.assertIn('Imported 0 users', output)
+        self.assertIn('skipped 3 existing', output)
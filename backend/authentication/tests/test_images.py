@@ -0,0 +1,118 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .. import images
+from ..models import UserProfile
+from ..tasks import render_profile_image
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_upload(name='photo.jpg', size=(1200, 900)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 80, 40)).save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_RENDITIONS={**settings.IMAGE_RENDITIONS, 'DISPATCH': 'inline'},
+)
+class ProfileImageRenditionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='pictured',
+            email='pictured@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_upload_returns_pending_and_renders_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/auth/profile/me/upload-picture/',
+                {'profile_picture': make_upload()},
+                format='multipart'
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['renditions'], {'status': 'pending'})
+
+        profile = UserProfile.objects.get(user=self.user)
+        renditions = profile.picture_renditions
+        self.assertEqual(renditions['status'], 'ready')
+        self.assertEqual(renditions['source'], profile.profile_picture.name)
+        self.assertEqual(renditions['sizes']['thumbnail']['width'], 64)
+        self.assertEqual(renditions['sizes']['large']['width'], 640)
+        for entry in renditions['sizes'].values():
+            self.assertTrue(default_storage.exists(entry['webp']))
+            self.assertTrue(default_storage.exists(entry['jpeg']))
+
+        # The original upload is stored untouched
+        with Image.open(profile.profile_picture.path) as original:
+            self.assertEqual(original.size, (1200, 900))
+
+    def test_clearing_picture_drops_renditions(self):
+        profile = self.user.profile
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.profile_picture = make_upload()
+            profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.picture_renditions['status'], 'ready')
+
+        profile.profile_picture = None
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.picture_renditions, {})
+
+    def test_avatar_size_and_immutable_rendition(self):
+        profile = self.user.profile
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.profile_picture = make_upload()
+            profile.save()
+
+        response = self.client.get(f'/api/auth/users/{self.user.pk}/', {'avatar_size': 'thumbnail'})
+        entry = response.data['profile']
+        self.assertIn('-thumbnail.webp', entry['profile_picture_url'])
+        self.assertEqual(set(entry['profile_picture_urls']), {'thumbnail', 'small', 'medium'})
+
+        path = entry['profile_picture_url'].split('testserver', 1)[1]
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Content-Type'], 'image/webp')
+
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get('/media/renditions/../settings.py').status_code, 404)
+
+    @override_settings(IMAGE_RENDITIONS={**settings.IMAGE_RENDITIONS, 'DISPATCH': 'celery'})
+    @mock.patch.object(images, '_run_in_thread')
+    @mock.patch.object(render_profile_image, 'apply_async', side_effect=OSError('Connection refused'))
+    def test_unreachable_broker_falls_back_to_thread(self, apply_async, run_in_thread):
+        with self.assertLogs('authentication.images', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/auth/profile/me/upload-picture/',
+                {'profile_picture': make_upload()},
+                format='multipart'
+            )
+        self.assertEqual(response.status_code, 202)
+        # Published once, without kombu's retries holding up the response
+        apply_async.assert_called_once_with((self.user.profile.pk, 'profile_picture'), retry=False)
+        run_in_thread.assert_called_once_with(self.user.profile.pk, 'profile_picture')
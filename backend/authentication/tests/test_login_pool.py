@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .. import hashing
+
+User = get_user_model()
+
+
+class LoginHashingPoolTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(
+            username='pooluser',
+            email='pool@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+
+    def test_login_succeeds_through_pool(self):
+        response = self.client.post(
+            '/api/auth/login/',
+            {'email': 'pool@example.com', 'password': 'testpass123'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+
+    def test_saturated_pool_sheds_with_503(self):
+        """Logins are rejected immediately when no slot is free"""
+        pool = hashing.HashingPool(max_workers=1, max_queue=0, timeout=1)
+        pool._slots.acquire()
+        with mock.patch.object(hashing, '_pool', pool):
+            response = self.client.post(
+                '/api/auth/login/',
+                {'email': 'pool@example.com', 'password': 'testpass123'},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_shared_limit_spans_pools(self):
+        """Another process's jobs count against the shared limit"""
+        caches['local'].clear()
+        shared = hashing.SharedSlots(limit=1, cache_alias='local', ttl=60)
+        pool = hashing.HashingPool(max_workers=1, max_queue=0, timeout=1, shared=shared)
+        other = hashing.SharedSlots(1, 'local', 60).acquire()
+        self.assertIsNotNone(other)
+        with mock.patch.object(hashing, '_pool', pool):
+            response = self.client.post(
+                '/api/auth/login-old/',
+                {'email': 'pool@example.com', 'password': 'testpass123'},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+        shared.release(other)
+        self.assertEqual(pool.run(hashing.hash_passwords, ['x'])[0][:6], 'pbkdf2')
+        pool._executor.shutdown(wait=True)
+        self.assertEqual(shared.in_flight(), 0)
+
+    def test_expired_slot_is_not_released_by_its_old_holder(self):
+        caches['local'].clear()
+        shared = hashing.SharedSlots(limit=1, cache_alias='local', ttl=60)
+        stale = shared.acquire()
+        # The slot expires mid-job and another login takes it
+        caches['local'].delete(stale[0])
+        current = shared.acquire()
+        self.assertIsNotNone(current)
+
+        shared.release(stale)
+        self.assertEqual(shared.in_flight(), 1)
+        self.assertIsNone(shared.acquire())
+        shared.release(current)
+        self.assertEqual(shared.in_flight(), 0)
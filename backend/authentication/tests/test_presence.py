@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from .. import presence
+
+User = get_user_model()
+
+
+@override_settings(PRESENCE={'CACHE_ALIAS': 'local', 'TTL': 60})
+class PresenceTests(TestCase):
+    def setUp(self):
+        caches['local'].clear()
+        self.users = [
+            User.objects.create_user(
+                username=f'online{i}',
+                email=f'online{i}@example.com',
+                password='testpass123'
+            )
+            for i in range(3)
+        ]
+
+    def test_online_among_reports_heartbeats(self):
+        presence.heartbeat(self.users[0].pk)
+        presence.heartbeat(self.users[2].pk)
+        online = presence.online_among(user.pk for user in self.users)
+        self.assertEqual(set(online), {self.users[0].pk, self.users[2].pk})
+
+    def test_hidden_users_are_never_online(self):
+        presence.heartbeat(self.users[1].pk)
+        settings = self.users[1].privacy_settings
+        settings.show_online_status = False
+        settings.save()
+
+        self.assertEqual(presence.online_among([self.users[1].pk]), {})
+        self.assertFalse(presence.heartbeat(self.users[1].pk))
+        self.assertEqual(presence.online_among([self.users[1].pk]), {})
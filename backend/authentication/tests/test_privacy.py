@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from projects.models import Project
+from .. import privacy
+
+User = get_user_model()
+
+
+@override_settings(PRIVACY_PROJECTION={'CACHE_ALIAS': 'local', 'TIMEOUT': 60})
+class PrivacyProjectionTests(TestCase):
+    def setUp(self):
+        caches['local'].clear()
+        self.owner, self.colleague, self.stranger = [
+            User.objects.create_user(
+                username=f'private{i}',
+                email=f'private{i}@example.com',
+                password='testpass123'
+            )
+            for i in range(3)
+        ]
+        profile = self.owner.profile
+        profile.job_title = 'Engineer'
+        profile.address_line_1 = '1 Main St'
+        profile.save()
+        settings = self.owner.privacy_settings
+        settings.email_visibility = 'connections'
+        settings.job_info_visibility = 'authenticated'
+        settings.save()
+        project = Project.objects.create(
+            owner=self.colleague, title='Shared', description='', start_date=timezone.now()
+        )
+        project.collaborators.add(self.owner)
+
+    def test_mask_follows_visibility_levels(self):
+        mask = privacy.get_masks([self.owner.pk])[self.owner.pk]
+        self.assertEqual(privacy.visible_groups(mask, privacy.ANONYMOUS), {'social_links'})
+        self.assertEqual(
+            privacy.visible_groups(mask, privacy.CONNECTION),
+            {'email', 'job_info', 'social_links'}
+        )
+        self.assertEqual(privacy.visible_groups(mask, privacy.SELF), set(privacy.GROUP_NAMES))
+
+    def test_projection_depends_on_relationship(self):
+        colleague_view = privacy.project_profiles(self.colleague, [self.owner.pk])[0]
+        stranger_view = privacy.project_profiles(self.stranger, [self.owner.pk])[0]
+
+        self.assertEqual(colleague_view['email'], self.owner.email)
+        self.assertEqual(colleague_view['job_title'], 'Engineer')
+        self.assertNotIn('address_line_1', colleague_view)
+        self.assertNotIn('email', stranger_view)
+        self.assertEqual(stranger_view['job_title'], 'Engineer')
+
+    def test_settings_change_recompiles_cached_mask(self):
+        privacy.get_masks([self.owner.pk])
+        settings = self.owner.privacy_settings
+        settings.email_visibility = 'public'
+        settings.save()
+        with self.assertNumQueries(0):
+            mask = privacy.get_masks([self.owner.pk])[self.owner.pk]
+        self.assertIn('email', privacy.visible_groups(mask, privacy.ANONYMOUS))
+
+    def test_directory_fetches_page_in_constant_queries(self):
+        client = APIClient()
+        client.force_authenticate(user=self.stranger)
+        privacy.get_masks([user.pk for user in (self.owner, self.colleague, self.stranger)])
+        # count, page of ids, shared project memberships, profiles
+        with self.assertNumQueries(4):
+            response = client.get('/api/auth/directory/')
+        self.assertEqual(response.status_code, 200)
+        rows = {row['user_id']: row for row in response.data['results']}
+        self.assertNotIn('email', rows[self.owner.pk])
+        self.assertEqual(rows[self.stranger.pk]['email'], self.stranger.email)
+
+    def test_user_endpoints_apply_privacy_settings(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/auth/directory/').status_code, 401)
+        inactive = User.objects.create_user(
+            username='gone@example.com', email='gone@example.com', password='testpass123', is_active=False
+        )
+
+        client.force_authenticate(user=self.stranger)
+        response = client.get('/api/auth/users/')
+        self.assertEqual(response.status_code, 200)
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertNotIn(inactive.pk, rows)
+        owner = rows[self.owner.pk]
+        # Same shape as for admins, hidden fields are null
+        self.assertEqual(set(owner), set(rows[self.stranger.pk]))
+        self.assertEqual((owner['email'], owner['username'], owner['phone'], owner['role']), (None,) * 4)
+        self.assertEqual(owner['profile']['job_title'], 'Engineer')
+        self.assertIsNone(owner['profile']['address_line_1'])
+        self.assertEqual(rows[self.stranger.pk]['email'], self.stranger.email)
+
+        # Hidden attributes can't be searched, filtered or sorted on
+        response = client.get('/api/auth/users/', {'search': self.owner.email})
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(client.get('/api/auth/users/', {'role': 'admin'}).data['count'], 3)
+        for days, user in enumerate((self.stranger, self.colleague, self.owner)):
+            User.objects.filter(pk=user.pk).update(last_login=timezone.now() - timedelta(days=days))
+        default = [row['id'] for row in client.get('/api/auth/users/').data['results']]
+        ordered = client.get('/api/auth/users/', {'ordering': 'last_login'}).data['results']
+        self.assertEqual([row['id'] for row in ordered], default)
+
+        response = client.get(f'/api/auth/users/{self.owner.pk}/')
+        self.assertIsNone(response.data['email'])
+        self.assertEqual(response.data['profile']['job_title'], 'Engineer')
+        self.assertEqual(client.get(f'/api/auth/users/{inactive.pk}/').status_code, 404)
+
+        client.force_authenticate(user=self.owner)
+        response = client.get(f'/api/auth/users/{self.owner.pk}/')
+        self.assertEqual(response.data['email'], self.owner.email)
+        self.assertEqual(response.data['profile']['address_line_1'], '1 Main St')
@@ -1,5 +1,10 @@
 # backend/authentication/tests/test_profile.py
-from django.test import TestCase
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -35,3 +40,76 @@ class ProfileTests(TestCase):
         
         self.user.profile.refresh_from_db()
         self.assertEqual(self.user.profile.first_name, 'John')
+
+    def test_profile_save_is_single_write(self):
+        """Completion is scored in memory and written with the row"""
+        profile = UserProfile.objects.get(pk=self.user.profile.pk)
+        profile.job_title = 'Engineer'
+        profile.company = 'NCIBB'
+        with self.assertNumQueries(1):
+            profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.profile_completion_percentage, 28)
+
+
+@override_settings(PROFILE_RESPONSE_CACHE={'CACHE_ALIAS': 'local', 'TIMEOUT': 60})
+class ProfileMeConditionalGetTests(TestCase):
+    def setUp(self):
+        caches['local'].clear()
+        self.user = User.objects.create_user(
+            username='poller',
+            email='poller@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_matching_etag_returns_304_from_one_query(self):
+        response = self.client.get('/api/auth/profile/me/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                '/api/auth/profile/me/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+        # Activity heartbeats do not change the version
+        User.objects.filter(pk=self.user.pk).update(last_activity=timezone.now())
+        response = self.client.get(
+            '/api/auth/profile/me/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_cache_hit_skips_serialization(self):
+        first = self.client.get('/api/auth/profile/me/', HTTP_ACCEPT='application/json')
+        with self.assertNumQueries(1):
+            second = self.client.get('/api/auth/profile/me/', HTTP_ACCEPT='application/json')
+        self.assertEqual(first.content, second.content)
+
+    def test_write_through_me_changes_etag(self):
+        etag = self.client.get('/api/auth/profile/me/', HTTP_ACCEPT='application/json')['ETag']
+        self.client.patch('/api/auth/profile/me/', {'job_title': 'Curator'}, format='json')
+
+        response = self.client.get(
+            '/api/auth/profile/me/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['profile']['job_title'], 'Curator')
+
+    def test_recomputed_completion_changes_etag(self):
+        first = self.client.get('/api/auth/profile/me/', HTTP_ACCEPT='application/json')
+        # A bulk write that leaves the score stale and updated_at untouched
+        UserProfile.objects.filter(user=self.user).update(job_title='Curator', company='Museum')
+        call_command('recompute_profile_completion', stdout=StringIO())
+
+        response = self.client.get(
+            '/api/auth/profile/me/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(
+            response.json()['profile']['profile_completion_percentage'],
+            first.json()['profile']['profile_completion_percentage']
+        )
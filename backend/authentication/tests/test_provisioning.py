@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from credits.models import UserCredit
+from ..models import UserProfile, ProfilePrivacySettings, UserPreferences
+
+User = get_user_model()
+
+
+class UserAggregateProvisioningTests(TestCase):
+    def test_new_user_gets_full_aggregate(self):
+        user = User.objects.create_user(
+            username='agg',
+            email='agg@example.com',
+            password='testpass123'
+        )
+        self.assertTrue(UserProfile.objects.filter(user=user).exists())
+        self.assertTrue(ProfilePrivacySettings.objects.filter(user=user).exists())
+        self.assertTrue(UserPreferences.objects.filter(user=user).exists())
+        self.assertTrue(UserCredit.objects.filter(user=user).exists())
+
+    def test_update_issues_no_related_queries(self):
+        user = User.objects.create_user(
+            username='agg',
+            email='agg@example.com',
+            password='testpass123'
+        )
+        user = User.objects.get(pk=user.pk)
+        user.first_name = 'Jane'
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_registration_endpoint(self):
+        response = APIClient().post('/api/auth/register/', {
+            'username': 'newbie',
+            'email': 'newbie@example.com',
+            'first_name': 'New',
+            'last_name': 'Bie',
+            'password': 'Sup3r-secret-pw',
+            'password_confirm': 'Sup3r-secret-pw',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(email='newbie@example.com')
+        self.assertEqual(user.profile.first_name, 'New')
+        self.assertTrue(UserCredit.objects.filter(user=user).exists())
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .. import user_cache
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cacheuser',
+            email='cache@example.com',
+            password='testpass123'
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_repeat_requests_skip_user_query(self):
+        """Second authenticated request is served from the cache"""
+        self.client.get('/api/auth/test/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/test/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        """Saving is_active=False invalidates the cached copy"""
+        self.client.get('/api/auth/test/')
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+
+        response = self.client.get('/api/auth/dashboard/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_password_hash_is_not_cached(self):
+        user_cache.get_cached_user(self.user.pk)
+        version = cache.get(user_cache._version_key(self.user.pk))
+        payload = cache.get(user_cache._payload_key(self.user.pk, version))
+        self.assertNotIn(self.user.password.encode(), payload)
+
+        cached = user_cache.get_cached_user(self.user.pk)
+        self.assertIn('password', cached.get_deferred_fields())
+        self.assertTrue(cached.check_password('testpass123'))
+
+    def test_login_keeps_cached_copy(self):
+        """Recording last_login neither bumps updated_at nor invalidates the cache"""
+        self.client.get('/api/auth/test/')
+        updated_at = User.objects.get(pk=self.user.pk).updated_at
+        update_last_login(None, self.user)
+        self.assertEqual(User.objects.get(pk=self.user.pk).updated_at, updated_at)
+        with self.assertNumQueries(0):
+            self.client.get('/api/auth/test/')
@@ -26,6 +26,9 @@ urlpatterns = [
     path('stats/', views.user_stats_view, name='user_stats'),
     path('users/', views.UserListView.as_view(), name='user_list'),
     path('users/<int:pk>/', views.UserDetailView.as_view(), name='user_detail'),
+    path('directory/', views.DirectoryView.as_view(), name='directory'),
+    path('presence/', views.presence_view, name='presence'),
+    path('presence/heartbeat/', views.presence_heartbeat_view, name='presence_heartbeat'),
     
     # Add profile-specific endpoints
     path('', include(router.urls)),
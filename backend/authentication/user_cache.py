@@ -0,0 +1,113 @@
+"""
+Two-tier cache for hydrating authenticated users.
+
+Entries are keyed by user id plus the row's ``updated_at`` value. The
+shared Django cache holds the current version of each user together with
+a pickled copy of the row; every process keeps a bounded LRU of pickles in
+front of it so a hit costs a single small cache read and no database query.
+
+The password hash is never cached: cached copies have it deferred, so it
+loads from the database if something reads it, and carry its digest as
+``password_digest`` for the JWT revoke check instead.
+"""
+import copy
+import pickle
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.cache import LocalLRUCache
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+    'LOCAL_MAXSIZE': 2048,
+}
+
+
+def _setting(name):
+    return getattr(settings, 'USER_CACHE', {}).get(name, DEFAULTS[name])
+
+
+_local = LocalLRUCache(maxsize=_setting('LOCAL_MAXSIZE'))
+
+
+def _shared():
+    return caches[_setting('CACHE_ALIAS')]
+
+
+def _version_key(user_id):
+    return f'auth:user:{user_id}:version'
+
+
+def _payload_key(user_id, version):
+    return f'auth:user:{user_id}:{version}'
+
+
+def _version_for(user):
+    return f'{user.updated_at.timestamp():.6f}' if user.updated_at else '0'
+
+
+def cache_user(user):
+    """Store a freshly loaded user, minus its password hash, in both cache tiers."""
+    version = _version_for(user)
+    user.password_digest = get_md5_hash_password(user.password)
+    cached = copy.copy(user)
+    cached.__dict__.pop('password')
+    payload = pickle.dumps(cached, pickle.HIGHEST_PROTOCOL)
+    _shared().set_many({
+        _version_key(user.pk): version,
+        _payload_key(user.pk, version): payload,
+    }, _setting('TIMEOUT'))
+    _local.set((user.pk, version), payload)
+
+
+def get_cached_user(user_id):
+    """
+    Return the user with ``user_id`` or ``None`` if it does not exist.
+
+    Always returns a private copy, so callers may mutate it freely.
+    """
+    shared = _shared()
+    version = shared.get(_version_key(user_id))
+    if version is not None:
+        payload = _local.get((user_id, version))
+        if payload is None:
+            payload = shared.get(_payload_key(user_id, version))
+            if payload is not None:
+                _local.set((user_id, version), payload)
+        if payload is not None:
+            return pickle.loads(payload)
+
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is not None:
+        cache_user(user)
+    return user
+
+
+def invalidate_users(user_ids):
+    """
+    Drop cached copies of the given users.
+
+    Call this after queryset ``update()`` calls that change ``role`` or
+    ``is_active``, since those bypass ``User.save``.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    def _drop():
+        _shared().delete_many([_version_key(user_id) for user_id in user_ids])
+        _local.delete_where(lambda key: key[0] in user_ids)
+
+    _drop()
+    # Drop again once the write is visible, so a concurrent reader cannot
+    # re-populate the cache from the pre-commit row.
+    transaction.on_commit(_drop)
+
+
+def invalidate_user(user_id):
+    invalidate_users([user_id])
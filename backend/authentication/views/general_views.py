@@ -4,7 +4,14 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import authenticate
+from django.core.files.storage import default_storage
+from django.db.models import Q
 from authentication.models import User, UserProfile
+from core.dashboard import get_counters
+from core.throttling import throttle_scope
+from .. import presence, privacy
+from ..images import rendition_url
+from ..hashing import LoginCapacityExceeded
 from ..permissions import CanManageUsers
 from ..serializers import (
     UserRegistrationSerializer, 
@@ -22,6 +29,7 @@ def test_api(request):
     return Response({"message": "API is working!", "status": "success"})
 
 
+@throttle_scope('login')
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def simple_login(request):
@@ -68,6 +76,12 @@ def simple_login(request):
             'access': str(refresh.access_token),
         }, status=status.HTTP_200_OK)
         
+    except LoginCapacityExceeded as e:
+        return Response(
+            {"error": str(e.detail)},
+            status=e.status_code,
+            headers={'Retry-After': str(e.wait)}
+        )
     except Exception as e:
         return Response(
             {"error": str(e)}, 
@@ -77,6 +91,7 @@ def simple_login(request):
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = 'login'
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -87,11 +102,9 @@ class UserRegistrationView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        # User.save provisions the profile, settings and credit rows
         user = serializer.save()
         
-        # Create user profile
-        UserProfile.objects.create(user=user)
-        
         # Generate tokens
         refresh = RefreshToken.for_user(user)
         
@@ -119,18 +132,99 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return profile
 
 
+def render_profiles(request, profiles):
+    """Replace the stored picture columns of projected profiles with URLs."""
+    avatar_size = request.query_params.get('avatar_size')
+    for profile in profiles:
+        picture = profile.pop('profile_picture')
+        cover = profile.pop('cover_image')
+        renditions = profile.pop('picture_renditions')
+        profile.pop('cover_renditions')
+        url = rendition_url(renditions, avatar_size) if avatar_size else None
+        if picture and not url:
+            url = default_storage.url(picture)
+        profile['profile_picture_url'] = request.build_absolute_uri(url) if url else None
+        profile['cover_image_url'] = (
+            request.build_absolute_uri(default_storage.url(cover)) if cover else None
+        )
+    return profiles
+
+
 class UserListView(generics.ListAPIView):
-    queryset = User.objects.all()
+    """
+    Active users in the ``UserSerializer`` shape. For non-admins, fields a
+    user hides from the caller are null, and only public fields can be
+    searched, filtered or ordered on.
+    """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filterset_fields = ['role', 'is_active', 'is_verified']
-    search_fields = ['username', 'email', 'first_name', 'last_name']
-    ordering_fields = ['created_at', 'last_login', 'username']
     ordering = ['-created_at']
 
+    def _is_admin(self):
+        return privacy.viewer_class(self.request.user, None) == privacy.ADMIN
+
+    @property
+    def search_fields(self):
+        if self._is_admin():
+            return ['username', 'email', 'first_name', 'last_name']
+        return ['first_name', 'last_name']
+
+    @property
+    def filterset_fields(self):
+        if self._is_admin():
+            return ['role', 'is_active', 'is_email_verified']
+        return []
+
+    @property
+    def ordering_fields(self):
+        if self._is_admin():
+            return ['created_at', 'last_login', 'username']
+        return ['first_name', 'last_name']
+
+    def get_queryset(self):
+        queryset = User.objects.select_related('profile')
+        if self._is_admin():
+            return queryset
+        return queryset.filter(is_active=True)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if not self._is_admin():
+            users = response.data['results'] if 'results' in response.data else response.data
+            privacy.mask_users(request.user, users)
+        return response
+
+
+class DirectoryView(generics.GenericAPIView):
+    """
+    Other users' profiles, limited to what each one shares with the caller.
+
+    Supports ?search= over public name fields and ?avatar_size=.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = User.objects.filter(is_active=True).order_by('id')
+        search = self.request.query_params.get('search', '').strip()
+        if search:
+            queryset = queryset.filter(
+                Q(profile__first_name__icontains=search)
+                | Q(profile__last_name__icontains=search)
+            )
+        return queryset.values_list('id', flat=True)
+
+    def get(self, request, *args, **kwargs):
+        user_ids = self.paginate_queryset(self.get_queryset())
+        profiles = privacy.project_profiles(request.user, user_ids)
+        return self.get_paginated_response(render_profiles(request, profiles))
+
 
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = User.objects.all()
+    """
+    One user in the ``UserSerializer`` shape. Callers other than the user
+    and admins get null for the fields the user hides from them.
+    """
+    queryset = User.objects.select_related('profile')
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -139,6 +233,16 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
             return [permissions.IsAuthenticated(), CanManageUsers()]
         return [permissions.IsAuthenticated()]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if privacy.viewer_class(self.request.user, None) == privacy.ADMIN:
+            return queryset
+        return queryset.filter(is_active=True)
+
+    def retrieve(self, request, *args, **kwargs):
+        data = self.get_serializer(self.get_object()).data
+        return Response(privacy.mask_users(request.user, [data])[0])
+
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -161,25 +265,18 @@ def user_stats_view(request):
     Get user statistics for dashboard
     """
     user = request.user
+    counters = get_counters(user)
     
     # Get user's project stats
-    try:
-        from projects.models import Project
-        project_stats = {
-            'total_projects': Project.objects.filter(owner=user).count(),
-            'active_projects': Project.objects.filter(owner=user, status='active').count(),
-            'completed_projects': Project.objects.filter(owner=user, status='completed').count(),
-        }
-    except:
-        project_stats = {
-            'total_projects': 0,
-            'active_projects': 0,
-            'completed_projects': 0,
-        }
+    project_stats = {
+        'total_projects': counters.projects_total,
+        'active_projects': counters.projects_active,
+        'completed_projects': counters.projects_completed,
+    }
     
     # Get user's credit stats
     try:
-        credits = user.credits
+        credits = counters.user.credits
         credit_stats = {
             'balance': str(credits.balance),
             'total_earned': str(credits.total_earned),
@@ -195,7 +292,7 @@ def user_stats_view(request):
     # Get recent activity
     try:
         from messaging.models import Message
-        recent_messages = Message.objects.filter(recipient=user).order_by('-created_at')[:5]
+        recent_messages = Message.objects.filter(recipient=user).select_related('sender').order_by('-created_at')[:5]
         recent_activity = [
             {
                 'type': 'message',
@@ -211,5 +308,42 @@ def user_stats_view(request):
     return Response({
         'project_stats': project_stats,
         'credit_stats': credit_stats,
+        'inbox_stats': {
+            'unread_messages': counters.messages_unread,
+            'unread_notifications': counters.notifications_unread,
+        },
         'recent_activity': recent_activity,
-    })
\ No newline at end of file
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def presence_view(request):
+    """
+    Report which of the given users are online, e.g. ?ids=1,2,3
+    """
+    try:
+        user_ids = [int(i) for i in request.query_params.get('ids', '').split(',') if i.strip()]
+    except ValueError:
+        return Response(
+            {"error": "ids must be a comma-separated list of user ids"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(user_ids) > 200:
+        return Response(
+            {"error": "At most 200 ids can be checked at once"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    online = presence.online_among(user_ids)
+    return Response({
+        'online': {str(user_id): seen.isoformat() for user_id, seen in online.items()},
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def presence_heartbeat_view(request):
+    """Keep the current user online while their client is idle"""
+    visible = presence.heartbeat(request.user.id)
+    return Response({'online': visible})
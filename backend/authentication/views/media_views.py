@@ -0,0 +1,33 @@
+# backend/authentication/views/media_views.py
+import mimetypes
+import posixpath
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
+# Rendition names embed a hash of the source image, so a given URL always
+# returns the same bytes and browsers/CDNs may keep it for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+@require_safe
+def serve_rendition(request, path):
+    """Serve a resized profile/cover image with long-lived cache headers."""
+    name = posixpath.normpath(posixpath.join('renditions', path))
+    if not name.startswith('renditions/'):
+        raise Http404('Rendition not found')
+
+    etag = '"%s"' % posixpath.basename(name)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        try:
+            file = default_storage.open(name, 'rb')
+        except (FileNotFoundError, SuspiciousFileOperation):
+            raise Http404('Rendition not found')
+        response = FileResponse(file, content_type=mimetypes.guess_type(name)[0])
+    response['ETag'] = etag
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
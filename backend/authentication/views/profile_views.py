@@ -3,9 +3,14 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.renderers import JSONRenderer
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
+from .. import profile_cache
 from ..models import UserProfile, ProfilePrivacySettings, UserPreferences
 from ..serializers import (
     UserProfileSerializer, 
@@ -43,26 +48,17 @@ class UserProfileViewSet(viewsets.ModelViewSet):
     @transaction.atomic
     def perform_update(self, serializer):
         """Update profile with transaction safety"""
-        instance = serializer.save()
+        # UserProfile.save scores completion as part of the same write
+        serializer.save()
+        profile_cache.invalidate_profile_response(serializer.instance.user_id)
         logger.info(f"User {self.request.user.id} updated profile")
-        
-        # Recalculate completion percentage
-        instance.calculate_completion()
     
     @action(detail=False, methods=['get', 'put', 'patch'], url_path='me')
     def me(self, request):
         """Get or update current user's complete profile"""
         if request.method == 'GET':
             try:
-                user_instance = User.objects.select_related(
-                    'profile', 'privacy_settings', 'preferences'
-                ).get(pk=request.user.pk)
-                
-                serializer = CompleteUserProfileSerializer(
-                    user_instance, 
-                    context={'request': request}
-                )
-                return Response(serializer.data)
+                return self._me_response(request)
             except User.DoesNotExist:
                 return Response(
                     {'error': 'User not found'}, 
@@ -86,6 +82,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
                 )
                 serializer.is_valid(raise_exception=True)
                 serializer.save()
+                profile_cache.invalidate_profile_response(request.user.pk)
                 return Response(serializer.data)
             except User.DoesNotExist:
                 return Response(
@@ -99,6 +96,40 @@ class UserProfileViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
     
+    def _me_response(self, request):
+        """
+        Serve ``me`` conditionally: 304 when the client's validators still
+        match, otherwise cached JSON bytes for the current version.
+        """
+        etag, last_modified = profile_cache.profile_version(request.user.pk, request)
+        if etag is None:
+            raise User.DoesNotExist
+        last_modified = int(last_modified.timestamp())
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            # Only the JSON rendering is cached; the browsable API renders live
+            cacheable = request.accepted_renderer.format == 'json'
+            content = profile_cache.get_rendered(request.user.pk, etag) if cacheable else None
+            if content is None:
+                user_instance = User.objects.select_related(
+                    'profile', 'privacy_settings', 'preferences'
+                ).get(pk=request.user.pk)
+                data = CompleteUserProfileSerializer(
+                    user_instance, 
+                    context={'request': request}
+                ).data
+                if not cacheable:
+                    return Response(data)
+                content = JSONRenderer().render(data)
+                profile_cache.store_rendered(request.user.pk, etag, content)
+            response = HttpResponse(content, content_type='application/json')
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    
     @action(detail=True, methods=['post'], url_path='upload-picture')
     def upload_picture(self, request, pk=None):
         """Handle profile picture upload"""
@@ -117,12 +148,15 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             
             profile.profile_picture = request.FILES['profile_picture']
             profile.save()
+            profile_cache.invalidate_profile_response(profile.user_id)
             
+            # Resized versions are rendered in the background after commit
             serializer = UserProfileSerializer(profile, context={'request': request})
             return Response({
-                'message': 'Profile picture updated successfully',
-                'profile_picture_url': serializer.data['profile_picture_url']
-            })
+                'message': 'Profile picture uploaded, processing',
+                'profile_picture_url': serializer.data['profile_picture_url'],
+                'renditions': profile.picture_renditions,
+            }, status=status.HTTP_202_ACCEPTED)
         
         except Exception as e:
             logger.error(f"Error uploading profile picture: {str(e)}")
@@ -138,6 +172,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             profile = self.get_object()
             if profile.profile_picture:
                 profile.profile_picture.delete(save=True)
+                profile_cache.invalidate_profile_response(profile.user_id)
                 return Response({'message': 'Profile picture removed successfully'})
             return Response(
                 {'message': 'No profile picture to remove'}, 
@@ -247,6 +282,7 @@ class PrivacySettingsViewSet(viewsets.ModelViewSet):
             
             if serializer.is_valid():
                 serializer.save()
+                profile_cache.invalidate_profile_response(request.user.pk)
                 logger.info(f"User {request.user.id} updated privacy settings")
                 return Response(serializer.data)
             
@@ -0,0 +1,97 @@
+"""
+Incrementally maintained dashboard counters.
+
+Signal handlers in ``core.signals`` turn every project, message and
+notification change into a single ``UPDATE ... SET x = x + n`` on the
+owner's ``DashboardCounters`` row, inside the transaction that made the
+change. A missing row is rebuilt from the source tables on first touch, so
+users created before the table existed need no backfill.
+"""
+from django.db.models import Count, F, Q
+
+from .models import DashboardCounters
+
+COUNTER_FIELDS = (
+    'projects_total', 'projects_active', 'projects_completed',
+    'messages_unread', 'notifications_unread',
+)
+
+# Project.status values with their own counter
+PROJECT_STATUS_COUNTERS = {
+    'active': 'projects_active',
+    'completed': 'projects_completed',
+}
+
+
+def compute_counters(user_ids):
+    """Count everything from scratch: ``{user_id: {field: value}}``."""
+    from messaging.models import Message, Notification
+    from projects.models import Project
+
+    counters = {user_id: dict.fromkeys(COUNTER_FIELDS, 0) for user_id in user_ids}
+    rows = Project.objects.filter(owner_id__in=user_ids).values('owner_id').annotate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+        completed=Count('id', filter=Q(status='completed')),
+    )
+    for row in rows:
+        counters[row['owner_id']].update(
+            projects_total=row['total'],
+            projects_active=row['active'],
+            projects_completed=row['completed'],
+        )
+    rows = Message.objects.filter(recipient_id__in=user_ids, is_read=False).values(
+        'recipient_id'
+    ).annotate(unread=Count('id'))
+    for row in rows:
+        counters[row['recipient_id']]['messages_unread'] = row['unread']
+    rows = Notification.objects.filter(user_id__in=user_ids, is_read=False).values(
+        'user_id'
+    ).annotate(unread=Count('id'))
+    for row in rows:
+        counters[row['user_id']]['notifications_unread'] = row['unread']
+    return counters
+
+
+def rebuild_counters(user_id):
+    values = compute_counters([user_id])[user_id]
+    counters, _ = DashboardCounters.objects.update_or_create(user_id=user_id, defaults=values)
+    return counters
+
+
+def adjust(user_id, deltas, create=True):
+    """
+    Apply ``{field: delta}`` to a user's counters. Without a row, one is
+    built from scratch when ``create`` is set (deletes pass False, as the
+    user may be on their way out too).
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas or user_id is None:
+        return
+    updated = DashboardCounters.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated and create:
+        # The change being counted is already visible to this transaction
+        rebuild_counters(user_id)
+
+
+def project_deltas(status, sign):
+    deltas = {'projects_total': sign}
+    if status in PROJECT_STATUS_COUNTERS:
+        deltas[PROJECT_STATUS_COUNTERS[status]] = sign
+    return deltas
+
+
+def get_counters(user):
+    """
+    The user's counters with their credit balance joined in: one query.
+
+    ``counters.user.credits`` raises ``DoesNotExist`` if the user has no
+    credit account.
+    """
+    try:
+        return DashboardCounters.objects.select_related('user__credits').get(user=user)
+    except DashboardCounters.DoesNotExist:
+        rebuild_counters(user.pk)
+        return DashboardCounters.objects.select_related('user__credits').get(user=user)
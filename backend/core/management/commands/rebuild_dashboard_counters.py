@@ -0,0 +1,50 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.dashboard import compute_counters, COUNTER_FIELDS
+from core.models import DashboardCounters
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recount dashboard counters for all users from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Users per batch')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only rebuild this user id (repeatable)')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        started = time.monotonic()
+        last_pk = 0
+        rebuilt = 0
+
+        users = User.objects.order_by('pk')
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+
+        while True:
+            # Keyset pagination over user ids
+            user_ids = list(users.filter(pk__gt=last_pk).values_list('pk', flat=True)[:chunk_size])
+            if not user_ids:
+                break
+            last_pk = user_ids[-1]
+
+            with transaction.atomic():
+                counters = compute_counters(user_ids)
+                DashboardCounters.objects.bulk_create(
+                    [DashboardCounters(user_id=user_id, **values) for user_id, values in counters.items()],
+                    update_conflicts=True,
+                    unique_fields=['user'],
+                    update_fields=[*COUNTER_FIELDS, 'updated_at'],
+                )
+            rebuilt += len(user_ids)
+            self.stdout.write(f'  rebuilt {rebuilt} (last id {last_pk})')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt dashboard counters for {rebuilt} users in {time.monotonic() - started:.1f}s'
+        ))
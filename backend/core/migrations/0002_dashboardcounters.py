@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0007_userprofile_renditions'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_counters', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('projects_total', models.IntegerField(default=0)),
+                ('projects_active', models.IntegerField(default=0)),
+                ('projects_completed', models.IntegerField(default=0)),
+                ('messages_unread', models.IntegerField(default=0)),
+                ('notifications_unread', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Dashboard Counters',
+                'verbose_name_plural': 'Dashboard Counters',
+                'db_table': 'dashboard_counters',
+            },
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 
 # Create your models here.
@@ -15,3 +16,31 @@ class Page(models.Model):
 
     class Meta:
         ordering = ['title']
+
+
+class DashboardCounters(models.Model):
+    """
+    Per-user dashboard totals, kept current by core.signals as projects,
+    messages and notifications change. Rebuild with
+    ``manage.py rebuild_dashboard_counters``.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='dashboard_counters'
+    )
+    projects_total = models.IntegerField(default=0)
+    projects_active = models.IntegerField(default=0)
+    projects_completed = models.IntegerField(default=0)
+    messages_unread = models.IntegerField(default=0)
+    notifications_unread = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'dashboard_counters'
+        verbose_name = 'Dashboard Counters'
+        verbose_name_plural = 'Dashboard Counters'
+
+    def __str__(self):
+        return f"Dashboard counters for user {self.user_id}"
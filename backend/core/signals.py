@@ -0,0 +1,129 @@
+"""
+Keep ``DashboardCounters`` in step with projects, messages and
+notifications.
+
+``post_init`` remembers the counted fields as loaded so ``post_save`` can
+tell what an update changed. Values are read from ``__dict__`` so deferred
+fields are never loaded just for bookkeeping; if one was deferred the
+owner's counters are rebuilt instead.
+
+The snapshot may be stale by the time the instance is saved, so
+``pre_save`` first moves the row with a conditional UPDATE
+(``transition``) and counts the change from the values that UPDATE
+actually replaced: two requests changing the same row concurrently each
+count their own step once.
+"""
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from . import dashboard
+
+UNKNOWN = object()
+
+
+def _snapshot(instance, fields):
+    return tuple(instance.__dict__.get(field, UNKNOWN) for field in fields)
+
+
+def _remember(instance, fields):
+    instance._dashboard_state = _snapshot(instance, fields)
+
+
+def transition(model, pk, fields, old, new, attempts=3):
+    """
+    Move row ``pk`` from ``old`` to ``new`` (values of ``fields``) with
+    ``UPDATE ... WHERE`` the old values. If another writer changed the row
+    first, try again from the values it left. Returns the values the row
+    moved from, or None if it is gone or stayed contended.
+    """
+    rows = model._base_manager.filter(pk=pk)
+    for _ in range(attempts):
+        if rows.filter(**dict(zip(fields, old))).update(**dict(zip(fields, new))):
+            return old
+        old = rows.values_list(*fields).first()
+        if old is None:
+            return None
+    return None
+
+
+def _apply(changes, create=True):
+    """Apply ``[(user_id, deltas)]``, merging changes for the same user."""
+    merged = {}
+    for user_id, deltas in changes:
+        merged.setdefault(user_id, Counter()).update(deltas)
+    for user_id, deltas in merged.items():
+        dashboard.adjust(user_id, deltas, create=create)
+
+
+class CounterTracker:
+    """
+    Signal handlers for one model. ``deltas(state, sign)`` maps a tracked
+    ``(owner_id, value)`` pair to the counters it contributes to.
+    """
+
+    def __init__(self, model, fields, deltas):
+        self.model = model
+        self.fields = fields
+        self.deltas = deltas
+
+    def connect(self):
+        uid = f'dashboard_counters_{self.model._meta.label_lower}'
+        # weak=False: nothing else holds on to the tracker
+        post_init.connect(self.post_init, sender=self.model, weak=False, dispatch_uid=uid)
+        pre_save.connect(self.pre_save, sender=self.model, weak=False, dispatch_uid=uid)
+        post_save.connect(self.post_save, sender=self.model, weak=False, dispatch_uid=uid)
+        post_delete.connect(self.post_delete, sender=self.model, weak=False, dispatch_uid=uid)
+
+    def post_init(self, sender, instance, **kwargs):
+        _remember(instance, self.fields)
+
+    def pre_save(self, sender, instance, update_fields=None, **kwargs):
+        old = instance._dashboard_state
+        new = _snapshot(instance, self.fields)
+        instance._dashboard_moved_from = old
+        if (
+            instance._state.adding or old == new or UNKNOWN in old or UNKNOWN in new
+            or update_fields is not None and not set(update_fields) & set(self.fields)
+        ):
+            return
+        instance._dashboard_moved_from = transition(self.model, instance.pk, self.fields, old, new)
+
+    def post_save(self, sender, instance, created, update_fields=None, **kwargs):
+        old = instance._dashboard_state
+        moved_from = instance._dashboard_moved_from
+        new = _snapshot(instance, self.fields)
+        _remember(instance, self.fields)
+        if created:
+            _apply([(new[0], self.deltas(new, 1))])
+        elif update_fields is not None and not set(update_fields) & set(self.fields):
+            return
+        elif UNKNOWN in old or UNKNOWN in new or moved_from is None:
+            for user_id in {old[0], new[0]} - {UNKNOWN}:
+                dashboard.rebuild_counters(user_id)
+        elif moved_from != new:
+            _apply([(moved_from[0], self.deltas(moved_from, -1)), (new[0], self.deltas(new, 1))])
+
+    def post_delete(self, sender, instance, **kwargs):
+        state = getattr(instance, '_dashboard_state', None)
+        if state and UNKNOWN not in state:
+            _apply([(state[0], self.deltas(state, -1))], create=False)
+
+
+def _project_deltas(state, sign):
+    return dashboard.project_deltas(state[1], sign)
+
+
+def _unread_deltas(field):
+    def deltas(state, sign):
+        return {field: sign} if not state[1] else {}
+    return deltas
+
+
+def connect_signals():
+    from messaging.models import Message, Notification
+    from projects.models import Project
+
+    CounterTracker(Project, ('owner_id', 'status'), _project_deltas).connect()
+    CounterTracker(Message, ('recipient_id', 'is_read'), _unread_deltas('messages_unread')).connect()
+    CounterTracker(Notification, ('user_id', 'is_read'), _unread_deltas('notifications_unread')).connect()
@@ -1,3 +1,151 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from io import StringIO
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from messaging.models import Message, Notification
+from projects.models import Project
+from .dashboard import compute_counters, get_counters
+from .models import DashboardCounters
+from .throttling import hit_sliding_window, resolve_rate
+
+User = get_user_model()
+
+LOCAL_THROTTLING = {
+    'CACHE_ALIAS': 'local',
+    'RATES': {
+        'default': {'user': '100/min'},
+        'inbox': {'user': '2/min', 'guest': '1/min'},
+    },
+}
+
+
+class SlidingWindowTests(TestCase):
+    def setUp(self):
+        self.cache = caches['local']
+        self.cache.clear()
+
+    def test_previous_window_is_weighted(self):
+        """Hits from the previous window decay as the current one progresses"""
+        for _ in range(10):
+            hit_sliding_window(self.cache, 'k', 10, 60, now=59)
+        # 25% into the next window: 10 * 0.75 + 1 = 8.5
+        self.assertEqual(hit_sliding_window(self.cache, 'k', 10, 60, now=75), (True, None))
+        allowed, wait = hit_sliding_window(self.cache, 'k', 8, 60, now=75)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 45)
+
+    def test_scope_falls_back_to_default(self):
+        rates = LOCAL_THROTTLING['RATES']
+        self.assertEqual(resolve_rate('inbox', 'user', rates), (2, 60))
+        self.assertEqual(resolve_rate('inbox', 'manager', rates), None)
+        self.assertEqual(resolve_rate('other', 'user', rates), (100, 60))
+
+
+@override_settings(API_THROTTLING=LOCAL_THROTTLING)
+class RoleRateThrottleTests(TestCase):
+    def setUp(self):
+        caches['local'].clear()
+        self.user = User.objects.create_user(
+            username='throttled',
+            email='throttled@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_scoped_endpoint_returns_429_over_budget(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/messaging/inbox/').status_code, 200)
+        response = self.client.get('/api/messaging/inbox/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_budget_depends_on_role(self):
+        self.user.role = 'guest'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/messaging/inbox/').status_code, 200)
+        self.assertEqual(self.client.get('/api/messaging/inbox/').status_code, 429)
+
+
+class DashboardCountersTests(TestCase):
+    def setUp(self):
+        self.user, self.other = [
+            User.objects.create_user(
+                username=f'counted{i}',
+                email=f'counted{i}@example.com',
+                password='testpass123'
+            )
+            for i in range(2)
+        ]
+
+    def assertCountersMatchSource(self):
+        counters = DashboardCounters.objects.get(user=self.user)
+        expected = compute_counters([self.user.pk])[self.user.pk]
+        self.assertEqual({field: getattr(counters, field) for field in expected}, expected)
+
+    def test_signals_track_project_and_inbox_changes(self):
+        project = Project.objects.create(
+            owner=self.user, title='P', description='', start_date=timezone.now()
+        )
+        project.status = 'active'
+        project.save()
+        Project.objects.create(
+            owner=self.user, title='Q', description='', status='completed', start_date=timezone.now()
+        )
+        message = Message.objects.create(sender=self.other, recipient=self.user, subject='Hi', content='...')
+        Notification.objects.create(user=self.user, notification_type='system', title='T', message='...')
+        self.assertCountersMatchSource()
+
+        message.mark_as_read()
+        project.owner = self.other
+        project.save()
+        self.assertCountersMatchSource()
+        counters = get_counters(self.user)
+        self.assertEqual((counters.projects_total, counters.projects_active), (1, 0))
+        self.assertEqual((counters.messages_unread, counters.notifications_unread), (0, 1))
+
+        Project.objects.get(title='Q').delete()
+        self.assertCountersMatchSource()
+
+    def test_concurrent_status_changes_count_once(self):
+        project = Project.objects.create(
+            owner=self.user, title='P', description='', start_date=timezone.now()
+        )
+        # Two requests loaded the project before either saved
+        first, second = Project.objects.get(pk=project.pk), Project.objects.get(pk=project.pk)
+        first.status = 'active'
+        first.save()
+        second.status = 'active'
+        second.save()
+        self.assertCountersMatchSource()
+
+        first, second = Project.objects.get(pk=project.pk), Project.objects.get(pk=project.pk)
+        first.status = 'completed'
+        first.save()
+        second.status = 'archived'
+        second.save()
+        self.assertCountersMatchSource()
+
+    def test_endpoints_read_counters_in_one_row_fetch(self):
+        Message.objects.create(sender=self.other, recipient=self.user, subject='Hi', content='...')
+        get_counters(self.user)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        # counters joined with credits, recent messages joined with senders
+        with self.assertNumQueries(2):
+            response = client.get('/api/auth/stats/')
+        self.assertEqual(response.data['inbox_stats']['unread_messages'], 1)
+
+        client.post('/api/messaging/mark-all-read/')
+        self.assertCountersMatchSource()
+
+    def test_rebuild_command(self):
+        Project.objects.create(owner=self.user, title='P', description='', start_date=timezone.now())
+        DashboardCounters.objects.filter(user=self.user).update(projects_total=7)
+        call_command('rebuild_dashboard_counters', stdout=StringIO())
+        self.assertCountersMatchSource()
+        self.assertTrue(DashboardCounters.objects.filter(user=self.other).exists())
@@ -0,0 +1,116 @@
+"""
+Role-aware API throttling with sliding-window counters.
+
+Each (scope, role, client) pair owns one counter per fixed window in the
+cache configured by ``API_THROTTLING['CACHE_ALIAS']``. A request is checked
+against the weighted sum of the current and previous window, which gives a
+sliding-window estimate at the cost of one atomic ``incr`` and one ``get``.
+Point the alias at the shared cache in production and at ``'local'`` for
+single-node and test runs.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'RATES': {},
+}
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Turn ``'100/min'`` into ``(100, 60)``; ``None`` means unlimited."""
+    if rate is None:
+        return None
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'API_THROTTLING', {})}
+
+
+def resolve_rate(scope, role, rates=None):
+    """Rate for ``role`` in ``scope``, falling back to the ``default`` scope."""
+    rates = get_config()['RATES'] if rates is None else rates
+    for name in (scope, 'default'):
+        budgets = rates.get(name)
+        if budgets and role in budgets:
+            return parse_rate(budgets[role])
+    return None
+
+
+def _incr(cache, key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def hit_sliding_window(cache, key, limit, window, now=None):
+    """
+    Record one hit and decide whether it fits in the window.
+
+    Returns ``(allowed, wait_seconds)``. Rejected hits are counted too, so a
+    client that keeps hammering stays throttled until it backs off.
+    """
+    now = time.time() if now is None else now
+    current = int(now // window)
+    elapsed = (now % window) / window
+
+    count = _incr(cache, f'{key}:{current}', window * 2)
+    previous = cache.get(f'{key}:{current - 1}', 0)
+    estimated = previous * (1 - elapsed) + count
+    if estimated <= limit:
+        return True, None
+    return False, window * (1 - elapsed)
+
+
+def throttle_scope(scope):
+    """Set the throttle scope of an ``@api_view`` function (apply it outermost)."""
+    def decorator(view):
+        view.cls.throttle_scope = scope
+        return view
+    return decorator
+
+
+class RoleRateThrottle(BaseThrottle):
+    """
+    Throttle by the caller's ``User.role`` and the view's ``throttle_scope``.
+
+    Anonymous callers use the ``anon`` budget and are identified by IP.
+    """
+
+    def get_role(self, request):
+        user = request.user
+        if user and user.is_authenticated:
+            return getattr(user, 'role', 'user')
+        return 'anon'
+
+    def allow_request(self, request, view):
+        config = get_config()
+        scope = getattr(view, 'throttle_scope', None) or 'default'
+        role = self.get_role(request)
+        rate = resolve_rate(scope, role, config['RATES'])
+        if rate is None:
+            return True
+
+        limit, window = rate
+        if role == 'anon':
+            ident = self.get_ident(request)
+        else:
+            ident = request.user.pk
+        key = f'throttle:{scope}:{role}:{ident}:{window}'
+        allowed, self._wait = hit_sliding_window(
+            caches[config['CACHE_ALIAS']], key, limit, window
+        )
+        return allowed
+
+    def wait(self):
+        return getattr(self, '_wait', None)
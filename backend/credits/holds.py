@@ -0,0 +1,135 @@
+"""
+Two-phase credit reservations.
+
+``place`` sets credits aside with one conditional UPDATE of the account's
+``held_balance`` (only if ``balance - held_balance`` covers it) plus the
+``CreditHold`` insert; no row stays locked while the paid operation runs.
+``capture`` spends up to the held amount and ``release`` gives it back,
+each guarded by a conditional status change so a hold settles exactly once.
+Holds that are never settled expire: ``expire`` sweeps them in batches.
+
+Locks are taken hold first, then account row, everywhere.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import ledger, rollups
+from .models import CreditHold, CreditTransaction, UserCredit
+
+DEFAULTS = {
+    'DEFAULT_TTL': 600,
+    'MAX_TTL': 3600,
+    'SWEEP_BATCH_SIZE': 500,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'CREDIT_HOLDS', {})}
+
+
+def _reserve(user_id, amount, now):
+    return UserCredit.objects.filter(user_id=user_id, balance__gte=F('held_balance') + amount).update(
+        held_balance=F('held_balance') + amount, updated_at=now
+    )
+
+
+def place(user_id, amount, description='', ttl=None):
+    """
+    Set ``amount`` aside for ``ttl`` seconds. Returns the CreditHold, or
+    None if the available balance does not cover it.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        reserved = _reserve(user_id, amount, now)
+        if not reserved and ledger.compact(user_id):
+            # Part of the balance was still on shards
+            reserved = _reserve(user_id, amount, now)
+        if not reserved:
+            return None
+        return CreditHold.objects.create(
+            user_id=user_id,
+            amount=amount,
+            description=description,
+            expires_at=now + timedelta(seconds=ttl or get_config()['DEFAULT_TTL']),
+        )
+
+
+def capture(hold, amount=None, description=''):
+    """
+    Spend ``amount`` (default: all) of an active, unexpired hold and give
+    back the rest. Returns False if the hold was already settled or expired.
+    """
+    amount = hold.amount if amount is None else amount
+    if not Decimal('0.00') <= amount <= hold.amount:
+        raise ValueError('Capture amount must be between 0 and the held amount')
+    now = timezone.now()
+    with transaction.atomic():
+        if not CreditHold.objects.filter(pk=hold.pk, status='active', expires_at__gt=now).update(
+            status='captured', captured_amount=amount, updated_at=now
+        ):
+            return False
+        UserCredit.objects.filter(user_id=hold.user_id).update(
+            balance=F('balance') - amount,
+            held_balance=F('held_balance') - hold.amount,
+            total_spent=F('total_spent') + amount,
+            updated_at=now,
+        )
+        if amount:
+            entry = CreditTransaction.objects.create(
+                user_id=hold.user_id,
+                amount=amount,
+                transaction_type='spent',
+                description=description or hold.description or 'Credit hold captured',
+                reference_id=f'hold:{hold.pk}',
+            )
+            rollups.record([hold.user_id], 'spent', amount, entry.created_at)
+    hold.status, hold.captured_amount, hold.updated_at = 'captured', amount, now
+    return True
+
+
+def release(hold):
+    """Give an active hold's credits back. Returns False if it was already settled."""
+    now = timezone.now()
+    with transaction.atomic():
+        if not CreditHold.objects.filter(pk=hold.pk, status='active').update(status='released', updated_at=now):
+            return False
+        UserCredit.objects.filter(user_id=hold.user_id).update(
+            held_balance=F('held_balance') - hold.amount, updated_at=now
+        )
+    hold.status, hold.updated_at = 'released', now
+    return True
+
+
+def expire(batch_size=None, now=None):
+    """Expire active holds past their deadline, one transaction per batch. Returns how many."""
+    batch_size = batch_size or get_config()['SWEEP_BATCH_SIZE']
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            # Holds being captured or released right now are skipped, not waited on
+            batch = list(
+                CreditHold.objects.select_for_update(skip_locked=True).filter(
+                    status='active', expires_at__lte=now
+                ).order_by('expires_at').values_list('pk', 'user_id', 'amount')[:batch_size]
+            )
+            if not batch:
+                return expired
+            CreditHold.objects.filter(pk__in=[pk for pk, user_id, amount in batch]).update(
+                status='expired', updated_at=now
+            )
+            held = defaultdict(Decimal)
+            for pk, user_id, amount in batch:
+                held[user_id] += amount
+            # In id order, so concurrent sweepers lock accounts in the same order
+            for user_id in sorted(held):
+                UserCredit.objects.filter(user_id=user_id).update(
+                    held_balance=F('held_balance') - held[user_id], updated_at=now
+                )
+        expired += len(batch)
@@ -0,0 +1,128 @@
+"""
+Idempotent credit operations.
+
+Clients may send an ``Idempotency-Key`` header with spend and add requests.
+The key is stored as the transaction's ``reference_id``
+(``idem:<operation>:<key>``), and the ledger also inserts it into
+``CreditIdempotencyKey`` within the same database transaction. The unique
+constraint there on (user, reference_id) allows at most one transaction per
+key; that table is not partitioned, so it holds across the monthly
+partitions of ``credit_transactions`` (``credits.partitions``).
+
+A successful first response is kept for a short while in a per-process LRU
+and in the shared cache, so a retry is answered without touching the
+ledger; once those expire the stored transaction still answers it, though
+with the account's current balance rather than the one first reported.
+Failed attempts (e.g. insufficient credits) write no transaction and are not
+cached either, so retrying the key simply runs the operation again. Concurrent duplicates
+race on the constraint: the loser's ledger write rolls back and it replays
+the winner's result.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError
+
+from core.cache import LocalLRUCache
+
+from .models import CreditTransaction
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 600,
+    'LOCAL_TIMEOUT': 60,
+    'LOCAL_MAXSIZE': 1024,
+}
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+_KEY_RE = re.compile(r'^[A-Za-z0-9_.:-]{1,64}$')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'CREDIT_IDEMPOTENCY', {})}
+
+
+_local = LocalLRUCache(maxsize=get_config()['LOCAL_MAXSIZE'], ttl=get_config()['LOCAL_TIMEOUT'])
+
+
+def get_key(request):
+    """The request's idempotency key, or None if it did not send one."""
+    return request.META.get(HEADER) or None
+
+
+def is_valid_key(key):
+    return bool(_KEY_RE.match(key))
+
+
+def reference_for(operation, key):
+    return f'idem:{operation}:{key}'
+
+
+def _cache_key(user_id, reference_id):
+    digest = hashlib.md5(f'{user_id}:{reference_id}'.encode()).hexdigest()
+    return f'credits:idem:{digest}'
+
+
+def _get_cached(cache_key):
+    entry = _local.get(cache_key)
+    if entry is None:
+        entry = caches[get_config()['CACHE_ALIAS']].get(cache_key)
+        if entry is not None:
+            _local.set(cache_key, entry)
+    return entry
+
+
+def _set_cached(cache_key, entry):
+    caches[get_config()['CACHE_ALIAS']].set(cache_key, entry, get_config()['TIMEOUT'])
+    _local.set(cache_key, entry)
+
+
+def _from_ledger(user_id, reference_id, replay):
+    original = CreditTransaction.objects.filter(user_id=user_id, reference_id=reference_id).first()
+    if original is None:
+        return None
+    return (original.amount, *replay(original))
+
+
+def _replayed(entry, amount):
+    original_amount, status, data = entry
+    if original_amount != amount:
+        return 409, {"error": "Idempotency-Key was already used with a different amount"}, True
+    return status, data, True
+
+
+def run(user_id, operation, key, amount, perform, replay):
+    """
+    Run a credit operation at most once per ``key``.
+
+    ``perform(reference_id)`` runs the operation, writing its transaction
+    with ``reference_id``, and returns ``(status, data)``.
+    ``replay(transaction)`` builds ``(status, data)`` for a retry whose
+    original response is no longer cached. Only 2xx outcomes are cached,
+    since only they are backed by a transaction.
+
+    Returns ``(status, data, replayed)``. Without a key the operation just runs.
+    """
+    if key is None:
+        return (*perform(''), False)
+
+    reference_id = reference_for(operation, key)
+    cache_key = _cache_key(user_id, reference_id)
+    entry = _get_cached(cache_key) or _from_ledger(user_id, reference_id, replay)
+    if entry is not None:
+        return _replayed(entry, amount)
+
+    try:
+        status, data = perform(reference_id)
+    except IntegrityError:
+        # A concurrent duplicate committed its transaction first
+        entry = _get_cached(cache_key) or _from_ledger(user_id, reference_id, replay)
+        if entry is None:
+            raise
+        return _replayed(entry, amount)
+
+    if 200 <= status < 300:
+        _set_cached(cache_key, (amount, status, data))
+    return status, data, False
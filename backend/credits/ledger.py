@@ -0,0 +1,224 @@
+"""
+Credit ledger operations.
+
+Every balance change is one conditional ``UPDATE`` with F-expressions, so
+the database applies it atomically against the current row: concurrent
+spends can neither overdraw nor lose each other's updates, and no row is
+locked for longer than the statement plus the ``CreditTransaction`` insert
+(and its daily rollup increment) that shares its transaction.
+
+Accounts credited by many concurrent writers (a revenue or bonus-pool
+user) can be sharded with ``set_shards``: credits added to them land on one
+of N ``UserCreditShard`` rows picked at random, balances are read as the
+account row plus its shards, and ``compact`` folds the shards back in.
+"""
+import random
+import time
+from collections import namedtuple
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import rollups
+from .models import UserCredit, UserCreditShard, CreditTransaction, CreditIdempotencyKey
+
+Balances = namedtuple('Balances', ['balance', 'total_earned', 'total_spent'])
+
+
+def _pending_shards():
+    """Credits of the account's shards not yet folded in, as an annotation."""
+    pending = UserCreditShard.objects.filter(user_id=OuterRef('user_id')).values('user_id').annotate(
+        total=Sum('amount')
+    ).values('total')
+    return Coalesce(Subquery(pending), Decimal('0.00'), output_field=DecimalField())
+
+
+def get_balances(user_id):
+    """Current balances for the user, or None if they have no credit account."""
+    row = UserCredit.objects.filter(user_id=user_id).annotate(pending=_pending_shards()).values_list(
+        'balance', 'total_earned', 'total_spent', 'pending'
+    ).first()
+    if not row:
+        return None
+    balance, total_earned, total_spent, pending = row
+    return Balances(balance + pending, total_earned + pending, total_spent)
+
+
+def get_available(user_id):
+    """Balance not set aside by active holds; a plain read, nothing is locked."""
+    row = UserCredit.objects.filter(user_id=user_id).annotate(pending=_pending_shards()).values_list(
+        'balance', 'held_balance', 'pending'
+    ).first()
+    if not row:
+        return Decimal('0.00')
+    balance, held_balance, pending = row
+    return balance - held_balance + pending
+
+
+def add(user_id, amount, description='Credit added', transaction_type='earned', reference_id=''):
+    """Credit ``amount`` to the user, creating their account if needed. Returns Balances."""
+    with transaction.atomic():
+        changes = {
+            'balance': F('balance') + amount,
+            'total_earned': F('total_earned') + amount,
+            'updated_at': timezone.now(),
+        }
+        shard = 0
+        if not UserCredit.objects.filter(user_id=user_id, shard_count=0).update(**changes):
+            # No account yet, or a sharded one
+            credit, created = UserCredit.objects.get_or_create(user_id=user_id)
+            if credit.shard_count:
+                shard = random.randrange(credit.shard_count)
+                UserCreditShard.objects.filter(user_id=user_id, shard=shard).update(
+                    amount=F('amount') + amount, updated_at=changes['updated_at']
+                )
+            else:
+                UserCredit.objects.filter(user_id=user_id).update(**changes)
+        _claim_reference(user_id, reference_id)
+        entry = CreditTransaction.objects.create(
+            user_id=user_id,
+            amount=amount,
+            transaction_type=transaction_type,
+            description=description,
+            reference_id=reference_id,
+        )
+        rollups.record([user_id], transaction_type, amount, entry.created_at, shard=shard)
+        # Still ours until commit, so this reads our own write
+        return get_balances(user_id)
+
+
+def spend(user_id, amount, description='Credit spent', reference_id=''):
+    """
+    Debit ``amount`` if the available balance (net of holds) covers it.
+
+    Returns ``(spent, Balances)``; on insufficient funds nothing is written
+    and the balances are the current ones (None without an account).
+    """
+    with transaction.atomic():
+        spent = _debit(user_id, amount)
+        if not spent and compact(user_id):
+            # Part of the balance was still on shards
+            spent = _debit(user_id, amount)
+        if spent:
+            _claim_reference(user_id, reference_id)
+            entry = CreditTransaction.objects.create(
+                user_id=user_id,
+                amount=amount,
+                transaction_type='spent',
+                description=description,
+                reference_id=reference_id,
+            )
+            rollups.record([user_id], 'spent', amount, entry.created_at)
+        return bool(spent), get_balances(user_id)
+
+
+def _claim_reference(user_id, reference_id):
+    # Raises IntegrityError, rolling the caller's writes back, if the
+    # idempotency key was already used
+    if reference_id.startswith('idem:'):
+        CreditIdempotencyKey.objects.create(user_id=user_id, reference_id=reference_id)
+
+
+def _debit(user_id, amount):
+    # Credits set aside by holds are not spendable
+    return UserCredit.objects.filter(user_id=user_id, balance__gte=F('held_balance') + amount).update(
+        balance=F('balance') - amount,
+        total_spent=F('total_spent') + amount,
+        updated_at=timezone.now(),
+    )
+
+
+def set_shards(user_id, count):
+    """
+    Spread future credits to the user over ``count`` shard rows (0 turns
+    sharding off). Pending shard amounts stay part of the balance until the
+    next ``compact``.
+    """
+    with transaction.atomic():
+        UserCredit.objects.get_or_create(user_id=user_id)
+        UserCreditShard.objects.bulk_create(
+            [UserCreditShard(user_id=user_id, shard=shard) for shard in range(count)],
+            ignore_conflicts=True,
+        )
+        UserCredit.objects.filter(user_id=user_id).update(shard_count=count, updated_at=timezone.now())
+    if not count:
+        compact(user_id)
+
+
+def compact(user_id):
+    """Fold the user's shard amounts into their account row. Returns the amount moved."""
+    with transaction.atomic():
+        # Shards, then the account row; nothing locks them in the other order
+        shards = list(
+            UserCreditShard.objects.select_for_update().filter(user_id=user_id, amount__gt=0).values_list('pk', 'amount')
+        )
+        pending = sum((amount for pk, amount in shards), Decimal('0.00'))
+        if not pending:
+            return pending
+        UserCreditShard.objects.filter(pk__in=[pk for pk, amount in shards]).update(amount=Decimal('0.00'))
+        UserCredit.objects.filter(user_id=user_id).update(
+            balance=F('balance') + pending,
+            total_earned=F('total_earned') + pending,
+            updated_at=timezone.now(),
+        )
+    return pending
+
+
+def bulk_add(user_ids, amount, description='Credit added', transaction_type='bonus',
+             reference_id='', chunk_size=1000):
+    """
+    Credit ``amount`` to every user in ``user_ids``: an iterable of distinct
+    ids of existing users, e.g. a ``values_list`` queryset.
+
+    Each chunk is one transaction: accounts are created where missing,
+    balances move with a single set-based UPDATE and the transaction rows
+    are bulk inserted. Returns a summary dict.
+    """
+    started = time.monotonic()
+    granted = chunks = 0
+    for chunk in _chunked(user_ids, chunk_size):
+        now = timezone.now()
+        with transaction.atomic():
+            UserCredit.objects.bulk_create(
+                [UserCredit(user_id=user_id) for user_id in chunk],
+                ignore_conflicts=True,
+            )
+            UserCredit.objects.filter(user_id__in=chunk).update(
+                balance=F('balance') + amount,
+                total_earned=F('total_earned') + amount,
+                updated_at=now,
+            )
+            entries = CreditTransaction.objects.bulk_create([
+                CreditTransaction(
+                    user_id=user_id,
+                    amount=amount,
+                    transaction_type=transaction_type,
+                    description=description,
+                    reference_id=reference_id,
+                )
+                for user_id in chunk
+            ])
+            rollups.record(chunk, transaction_type, amount, entries[0].created_at)
+        granted += len(chunk)
+        chunks += 1
+    return {
+        'granted': granted,
+        'chunks': chunks,
+        'amount': str(amount),
+        'total_amount': str(amount * granted),
+        'reference_id': reference_id,
+        'elapsed_ms': round((time.monotonic() - started) * 1000),
+    }
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
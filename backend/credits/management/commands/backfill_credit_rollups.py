@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from credits import rollups
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild daily credit rollups for closed days from the transaction history. '
+        'Today is always read live, so run this once the day after the ledger '
+        'started recording rollups.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Users per batch')
+        parser.add_argument('--workers', type=int, default=4, help='Batches rebuilt in parallel')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only rebuild this user id (repeatable)')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        before_day = timezone.localdate()
+        started = time.monotonic()
+
+        users = User.objects.filter(credit_transactions__created_at__lt=rollups.day_bounds(before_day)[0])
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+        users = users.distinct().order_by('pk')
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [
+                pool.submit(self._rebuild_chunk, user_ids, before_day)
+                for user_ids in self._chunks(users, chunk_size)
+            ]
+            users_done = rows = 0
+            for future in futures:
+                chunk_users, chunk_rows = future.result()
+                users_done += chunk_users
+                rows += chunk_rows
+                self.stdout.write(f'  rebuilt {users_done} users, {rows} rollup rows')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {rows} rollup rows for {users_done} users up to '
+            f'{before_day - timedelta(days=1)} in {time.monotonic() - started:.1f}s'
+        ))
+
+    def _chunks(self, users, chunk_size):
+        last_pk = 0
+        while True:
+            # Keyset pagination over user ids
+            user_ids = list(users.filter(pk__gt=last_pk).values_list('pk', flat=True)[:chunk_size])
+            if not user_ids:
+                return
+            last_pk = user_ids[-1]
+            yield user_ids
+
+    def _rebuild_chunk(self, user_ids, before_day):
+        try:
+            return len(user_ids), rollups.rebuild(user_ids, before_day)
+        finally:
+            # Worker threads get their own connections; don't leak them
+            connection.close()
@@ -0,0 +1,158 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from authentication.models import User
+from credits import ledger
+from credits.models import CreditTransaction
+
+
+class Command(BaseCommand):
+    help = (
+        'Spend from (or add to) one account on many threads and check the ledger stays consistent. '
+        'Compare --operation add with and without --shards to measure sharded counters.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent writers')
+        parser.add_argument('--balance', type=str, default='500.00', help='Starting balance')
+        parser.add_argument('--amount', type=str, default='1.00', help='Credits per operation')
+        parser.add_argument('--operation', choices=['spend', 'add'], default='spend',
+                            help='spend until refused, or --adds additions per thread')
+        parser.add_argument('--adds', type=int, default=200, help='Additions per thread for --operation add')
+        parser.add_argument('--shards', type=int, default=0, help='Shard the account over this many rows')
+
+    def handle(self, *args, **options):
+        balance = Decimal(options['balance'])
+        amount = Decimal(options['amount'])
+        email = f'bench-{uuid.uuid4().hex[:12]}@example.com'
+        user = User.objects.create_user(
+            username=email, email=email, password=None,
+            first_name='Bench', last_name='User'
+        )
+
+        try:
+            ledger.add(user.pk, balance, 'Benchmark funding')
+            if options['shards']:
+                ledger.set_shards(user.pk, options['shards'])
+            if options['operation'] == 'add':
+                result = self._run_adds(user.pk, amount, options['threads'], options['adds'])
+            else:
+                result = self._run(user.pk, amount, options['threads'])
+            final = ledger.get_balances(user.pk)
+            ledger.compact(user.pk)
+            compacted = ledger.get_balances(user.pk)
+            recorded = CreditTransaction.objects.filter(
+                user=user, description=f'Benchmark {options["operation"]}'
+            ).count()
+        finally:
+            user.delete()
+
+        if options['operation'] == 'add':
+            self._check_adds(result, balance, amount, final, compacted, recorded, options)
+            return
+
+        spends = result['spent']
+        self.stdout.write(
+            f'{spends} spends in {result["elapsed"]:.2f}s on {options["threads"]} threads '
+            f'({spends / result["elapsed"] if result["elapsed"] else 0:.0f} spends/sec); '
+            f'{result["refused"]} refused for funds, {result["errors"]} database errors'
+        )
+
+        problems = []
+        if final.balance != balance - spends * amount:
+            problems.append(f'balance {final.balance} != {balance - spends * amount}')
+        if final.balance < 0:
+            problems.append(f'balance went negative: {final.balance}')
+        if final.total_spent != spends * amount:
+            problems.append(f'total_spent {final.total_spent} != {spends * amount}')
+        if recorded != spends:
+            problems.append(f'{recorded} spend transactions recorded for {spends} spends')
+        if problems:
+            raise CommandError('Ledger inconsistent: ' + '; '.join(problems))
+        self.stdout.write(self.style.SUCCESS(f'Ledger consistent, final balance {final.balance}'))
+
+    def _check_adds(self, result, balance, amount, final, compacted, recorded, options):
+        adds = result['added']
+        mode = f'{options["shards"]} shards' if options['shards'] else 'single row'
+        self.stdout.write(
+            f'{adds} adds in {result["elapsed"]:.2f}s on {options["threads"]} threads, {mode} '
+            f'({adds / result["elapsed"] if result["elapsed"] else 0:.0f} adds/sec); '
+            f'{result["errors"]} database errors'
+        )
+
+        expected = balance + adds * amount
+        problems = []
+        if final.balance != expected:
+            problems.append(f'balance {final.balance} != {expected}')
+        if compacted != final:
+            problems.append(f'compaction changed balances: {compacted} != {final}')
+        if recorded != adds:
+            problems.append(f'{recorded} earned transactions recorded for {adds} adds')
+        if problems:
+            raise CommandError('Ledger inconsistent: ' + '; '.join(problems))
+        self.stdout.write(self.style.SUCCESS(f'Ledger consistent, final balance {final.balance}'))
+
+    def _run_adds(self, user_id, amount, threads, adds):
+        lock = threading.Lock()
+        start = threading.Barrier(threads)
+        result = {'added': 0, 'errors': 0}
+
+        def adder():
+            start.wait()
+            try:
+                for _ in range(adds):
+                    try:
+                        ledger.add(user_id, amount, 'Benchmark add')
+                    except DatabaseError:
+                        with lock:
+                            result['errors'] += 1
+                        continue
+                    with lock:
+                        result['added'] += 1
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=adder) for _ in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        result['elapsed'] = time.perf_counter() - started
+        return result
+
+    def _run(self, user_id, amount, threads):
+        lock = threading.Lock()
+        start = threading.Barrier(threads)
+        result = {'spent': 0, 'refused': 0, 'errors': 0}
+
+        def spender():
+            start.wait()
+            try:
+                while True:
+                    try:
+                        spent, _ = ledger.spend(user_id, amount, 'Benchmark spend')
+                    except DatabaseError:
+                        with lock:
+                            result['errors'] += 1
+                        continue
+                    with lock:
+                        result['spent' if spent else 'refused'] += 1
+                    if not spent:
+                        return
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=spender) for _ in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        result['elapsed'] = time.perf_counter() - started
+        return result
@@ -0,0 +1,49 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from credits import partitions
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly credit_transactions partitions and detach old ones (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3, help='Create partitions this many months past the current one')
+        parser.add_argument('--detach-before', type=str, help='Detach partitions for months before YYYY-MM')
+        parser.add_argument('--drop', action='store_true', help='Drop detached partitions instead of keeping them as tables')
+        parser.add_argument('--list', action='store_true', help='Only list attached partitions')
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            self.stdout.write(f'{partitions.TABLE} is not partitioned on {connection.vendor}; nothing to do')
+            return
+
+        if options['list']:
+            for name, month in partitions.list_partitions():
+                self.stdout.write(f'  {name}  {month:%Y-%m}')
+            return
+
+        through = partitions.add_months(partitions.month_start(date.today()), options['months_ahead'])
+        created = partitions.create_partitions(through)
+        for name in created:
+            self.stdout.write(f'  created {name}')
+
+        detached = []
+        if options['detach_before']:
+            try:
+                year, month = map(int, options['detach_before'].split('-'))
+                before = date(year, month, 1)
+            except ValueError:
+                raise CommandError('--detach-before must look like YYYY-MM')
+            if before > partitions.month_start(date.today()):
+                raise CommandError('Refusing to detach the current or future partitions')
+            detached = partitions.detach_partitions(before, drop=options['drop'])
+            for name in detached:
+                self.stdout.write(f"  {'dropped' if options['drop'] else 'detached'} {name}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Partitions ready through {through:%Y-%m}: {len(created)} created, {len(detached)} '
+            f"{'dropped' if options['drop'] else 'detached'}"
+        ))
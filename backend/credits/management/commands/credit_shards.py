@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from credits import ledger
+from credits.models import UserCredit, UserCreditShard
+
+
+class Command(BaseCommand):
+    help = 'Shard hot credit accounts and fold their shards back into the account rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['enable', 'disable', 'compact'])
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='User id (repeatable)')
+        parser.add_argument('--shards', type=int, default=16, help='Shard rows per account for enable')
+        parser.add_argument('--interval', type=float, help='Keep compacting every INTERVAL seconds')
+
+    def handle(self, *args, **options):
+        action = options['action']
+        user_ids = options['user_ids']
+
+        if action in ('enable', 'disable'):
+            if not user_ids:
+                raise CommandError(f'{action} needs --user')
+            count = options['shards'] if action == 'enable' else 0
+            if action == 'enable' and not 1 < count <= 256:
+                raise CommandError('--shards must be between 2 and 256')
+            for user_id in user_ids:
+                ledger.set_shards(user_id, count)
+            self.stdout.write(self.style.SUCCESS(
+                f"{'Sharded' if count else 'Unsharded'} {len(user_ids)} accounts"
+                + (f' over {count} rows' if count else '')
+            ))
+            return
+
+        while True:
+            self._compact(user_ids)
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def _compact(self, user_ids):
+        pending = UserCreditShard.objects.filter(amount__gt=0)
+        if user_ids:
+            pending = pending.filter(user_id__in=user_ids)
+        folded = 0
+        for user_id in pending.values_list('user_id', flat=True).distinct().order_by('user_id'):
+            moved = ledger.compact(user_id)
+            if moved:
+                folded += 1
+                self.stdout.write(f'  user {user_id}: folded {moved}')
+        sharded = UserCredit.objects.filter(shard_count__gt=0).count()
+        self.stdout.write(self.style.SUCCESS(f'Compacted {folded} accounts ({sharded} sharded)'))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from credits import holds
+
+
+class Command(BaseCommand):
+    help = 'Expire credit holds past their deadline and return their credits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Holds per transaction')
+        parser.add_argument('--interval', type=float, help='Keep sweeping every INTERVAL seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            expired = holds.expire(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Expired {expired} holds in {time.monotonic() - started:.1f}s'
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
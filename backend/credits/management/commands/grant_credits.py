@@ -0,0 +1,54 @@
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from credits import ledger
+from credits.serializers import BulkGrantSerializer
+
+
+class Command(BaseCommand):
+    help = 'Grant credits to listed users or to every user matching a filter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('amount', type=str, help='Credits per user')
+        parser.add_argument('--description', type=str, help='Transaction description')
+        parser.add_argument('--user-id', type=int, action='append', dest='user_ids', help='Recipient id (repeatable)')
+        parser.add_argument('--role', type=str, help='Only users with this role')
+        active = parser.add_mutually_exclusive_group()
+        active.add_argument('--active', action='store_true', help='Only active users')
+        active.add_argument('--inactive', action='store_true', help='Only inactive users')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Users per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Count recipients without granting')
+
+    def handle(self, *args, **options):
+        data = {'amount': options['amount']}
+        if options['description']:
+            data['description'] = options['description']
+        if options['user_ids']:
+            data['user_ids'] = options['user_ids']
+        if options['role']:
+            data['role'] = options['role']
+        if options['active'] or options['inactive']:
+            data['is_active'] = options['active']
+
+        serializer = BulkGrantSerializer(data=data)
+        if not serializer.is_valid():
+            raise CommandError(serializer.errors)
+        recipients = serializer.get_recipients()
+
+        if options['dry_run']:
+            self.stdout.write(f'Would grant {serializer.validated_data["amount"]} credits to {recipients.count()} users')
+            return
+
+        summary = ledger.bulk_add(
+            recipients,
+            serializer.validated_data['amount'],
+            description=serializer.validated_data['description'],
+            reference_id=f'bulk-grant:{uuid.uuid4().hex}',
+            chunk_size=options['chunk_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Granted {summary["amount"]} credits to {summary["granted"]} users '
+            f'({summary["total_amount"]} total) in {summary["chunks"]} chunks, '
+            f'{summary["elapsed_ms"]}ms; reference {summary["reference_id"]}'
+        ))
@@ -0,0 +1,82 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Max, Min
+
+from credits import reconcile
+
+User = get_user_model()
+
+
+def _init_worker():
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Check user_credits balances against the credit transaction ledger, optionally repairing drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Worker processes (1 runs inline)')
+        parser.add_argument('--range-size', type=int, default=5000, help='User ids per work unit')
+        parser.add_argument('--repair', action='store_true', help='Reset drifted accounts to the ledger values')
+        parser.add_argument('--dry-run', action='store_true', help='Only report, even with --repair')
+        parser.add_argument('--limit', type=int, default=50, help='Drifted accounts to print')
+
+    def handle(self, *args, **options):
+        fix = options['repair'] and not options['dry_run']
+        workers = options['workers']
+        if fix and connection.vendor == 'sqlite' and workers > 1:
+            # SQLite cannot run concurrent write transactions from several processes
+            self.stdout.write('SQLite: repairing with a single worker')
+            workers = 1
+        started = time.monotonic()
+        bounds = User.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write('No users')
+            return
+        size = options['range_size']
+        ranges = [(start, start + size) for start in range(bounds['first'], bounds['last'] + 1, size)]
+
+        results = []
+        if workers <= 1:
+            for start, end in ranges:
+                results.append(self._progress(reconcile.check_range(start, end, fix), len(results), len(ranges)))
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('fork'),
+                initializer=_init_worker,
+            ) as pool:
+                futures = [pool.submit(reconcile.check_range, start, end, fix) for start, end in ranges]
+                for future in as_completed(futures):
+                    results.append(self._progress(future.result(), len(results), len(ranges)))
+
+        drift = sorted(entry for result in results for entry in result['drift'])
+        for user_id, fields in drift[:options['limit']]:
+            changes = ', '.join(f'{field} {actual} -> {expected}' for field, (actual, expected) in fields.items())
+            self.stdout.write(f'  user {user_id}: {changes}')
+        if len(drift) > options['limit']:
+            self.stdout.write(f'  ... and {len(drift) - options["limit"]} more')
+
+        accounts = sum(result['accounts'] for result in results)
+        summary = (
+            f'{accounts} accounts checked in {time.monotonic() - started:.1f}s: '
+            f'{len(drift)} {"repaired" if fix else "drifted"}'
+        )
+        if drift and not fix:
+            self.stdout.write(self.style.WARNING(summary + ' (run with --repair to fix)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
+
+    def _progress(self, result, done, total):
+        self.stdout.write(
+            f'  [{done + 1}/{total}] ids {result["start"]}-{result["end"] - 1}: '
+            f'{result["accounts"]} accounts, {len(result["drift"])} drifted'
+        )
+        return result
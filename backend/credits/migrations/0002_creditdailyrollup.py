@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:16
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('credits', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('earned', 'Credit Earned'), ('spent', 'Credit Spent'), ('bonus', 'Bonus Credit'), ('refund', 'Refund')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Credit Daily Rollup',
+                'verbose_name_plural': 'Credit Daily Rollups',
+                'db_table': 'credit_daily_rollups',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='credittransaction',
+            index=models.Index(fields=['user', 'created_at'], name='credit_txn_user_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='creditdailyrollup',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='credit_rollups', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='creditdailyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'day', 'transaction_type'), name='unique_credit_daily_rollup'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0002_creditdailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='credittransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('reference_id__startswith', 'idem:')), fields=('user', 'reference_id'), name='unique_credit_idempotency_key'),
+        ),
+    ]
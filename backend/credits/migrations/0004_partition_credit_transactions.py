@@ -0,0 +1,130 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:23
+
+from datetime import date
+
+from django.db import migrations, models
+
+from credits import partitions
+
+TABLE = partitions.TABLE
+# The previous table is kept for inspection; drop it by hand afterwards
+OLD = f'{TABLE}_old'
+# Partitions created ahead of the newest transaction
+MONTHS_AHEAD = 3
+
+
+def _rebuild(cursor, partitioned):
+    """
+    Copy credit_transactions into a new partitioned (or plain) table,
+    keeping the names of its indexes and foreign keys. The previous table
+    stays as credit_transactions_old, without foreign keys so it does not
+    block deleting users, and its indexes renamed with an _old suffix.
+    Holds an exclusive lock on the table for the duration; run it in a
+    maintenance window.
+    """
+    cursor.execute('SELECT pg_advisory_xact_lock(%s)', [partitions._LOCK_ID])
+    cursor.execute('SELECT to_regclass(%s)', [OLD])
+    if cursor.fetchone()[0] is not None:
+        raise RuntimeError(f'{OLD} is left from an earlier run; drop it before migrating')
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(indexrelid) FROM pg_index
+        WHERE indrelid = %s::regclass AND NOT indisprimary AND NOT indisunique
+        """,
+        [TABLE],
+    )
+    # Indexes of a partitioned parent are defined ON ONLY the parent
+    indexes = [row[0].replace(' ON ONLY ', ' ON ') for row in cursor.fetchall()]
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+        """,
+        [TABLE],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT is_identity = 'YES', pg_get_serial_sequence(%s, 'id')
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s AND column_name = 'id'
+        """,
+        [TABLE, TABLE],
+    )
+    identity, sequence = cursor.fetchone()
+
+    cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {OLD}')
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {OLD} DROP CONSTRAINT {name}')
+    cursor.execute(
+        'SELECT index.relname FROM pg_index JOIN pg_class index ON index.oid = indexrelid '
+        'WHERE indrelid = %s::regclass',
+        [OLD],
+    )
+    for (name,) in cursor.fetchall():
+        cursor.execute(f'ALTER INDEX {name} RENAME TO {name[:59]}_old')
+    cursor.execute(
+        f'CREATE TABLE {TABLE} (LIKE {OLD} INCLUDING DEFAULTS INCLUDING IDENTITY)'
+        + (' PARTITION BY RANGE (created_at)' if partitioned else '')
+    )
+    if partitioned:
+        cursor.execute(f'SELECT min(created_at)::date, max(created_at)::date FROM {OLD}')
+        first, last = cursor.fetchone()
+        month = partitions.month_start(first or date.today())
+        through = partitions.add_months(partitions.month_start(max(last or date.today(), date.today())), MONTHS_AHEAD)
+        while month <= through:
+            partitions.create_partition(cursor, month)
+            month = partitions.add_months(month, 1)
+        partitions.create_default_partition(cursor)
+
+    cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {OLD}')
+    if identity:
+        # LIKE ... INCLUDING IDENTITY starts a fresh sequence
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(max(id), 0) + 1, false) FROM {TABLE}",
+            [TABLE],
+        )
+    else:
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id')
+
+    cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY ({'id, created_at' if partitioned else 'id'})")
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+    if not partitioned:
+        cursor.execute(
+            f"""
+            CREATE UNIQUE INDEX unique_credit_idempotency_key ON {TABLE} (user_id, reference_id)
+            WHERE reference_id LIKE 'idem:%'
+            """
+        )
+
+
+def partition_credit_transactions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        _rebuild(cursor, partitioned=True)
+
+
+def unpartition_credit_transactions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        _rebuild(cursor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0003_credittransaction_idempotency'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='credittransaction',
+            index=models.Index(fields=['created_at'], name='credit_txn_created_idx'),
+        ),
+        migrations.RunPython(partition_credit_transactions, unpartition_credit_transactions),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:26
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('credits', '0004_partition_credit_transactions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCreditShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'User Credit Shard',
+                'verbose_name_plural': 'User Credit Shards',
+                'db_table': 'user_credit_shards',
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='creditdailyrollup',
+            name='unique_credit_daily_rollup',
+        ),
+        migrations.AddField(
+            model_name='creditdailyrollup',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usercredit',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='creditdailyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'day', 'transaction_type', 'shard'), name='unique_credit_daily_rollup_shard'),
+        ),
+        migrations.AddField(
+            model_name='usercreditshard',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='credit_shards', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='usercreditshard',
+            constraint=models.UniqueConstraint(fields=('user', 'shard'), name='unique_user_credit_shard'),
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from credits import partitions
+
+BATCH_SIZE = 1000
+
+
+def copy_idempotency_keys(apps, schema_editor):
+    CreditTransaction = apps.get_model('credits', 'CreditTransaction')
+    CreditIdempotencyKey = apps.get_model('credits', 'CreditIdempotencyKey')
+    references = (
+        CreditTransaction.objects.filter(reference_id__startswith='idem:')
+        .values_list('user_id', 'reference_id').distinct().iterator()
+    )
+    batch = []
+    for user_id, reference_id in references:
+        batch.append(CreditIdempotencyKey(user_id=user_id, reference_id=reference_id))
+        if len(batch) == BATCH_SIZE:
+            # A key reused across partitions is recorded once
+            CreditIdempotencyKey.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    CreditIdempotencyKey.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _partitions(cursor):
+    cursor.execute(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = to_regclass(%s)", [partitions.TABLE]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def drop_transaction_indexes(apps, schema_editor):
+    # The unique index on a plain credit_transactions table, or its
+    # per-partition copies on a partitioned one
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP INDEX IF EXISTS unique_credit_idempotency_key')
+        if schema_editor.connection.vendor == 'postgresql':
+            for name in _partitions(cursor):
+                cursor.execute(f'DROP INDEX IF EXISTS {name}_idem_uniq')
+
+
+def create_transaction_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        names = _partitions(cursor) if schema_editor.connection.vendor == 'postgresql' else []
+        for name in names:
+            cursor.execute(
+                f"""
+                CREATE UNIQUE INDEX IF NOT EXISTS {name}_idem_uniq ON {name} (user_id, reference_id)
+                WHERE reference_id LIKE 'idem:%'
+                """
+            )
+        if not names:
+            cursor.execute(
+                f"""
+                CREATE UNIQUE INDEX unique_credit_idempotency_key ON {partitions.TABLE} (user_id, reference_id)
+                WHERE reference_id LIKE 'idem:%'
+                """
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('credits', '0006_credithold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditIdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference_id', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'credit_idempotency_keys',
+            },
+        ),
+        migrations.AddField(
+            model_name='creditidempotencykey',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credit_idempotency_keys', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='creditidempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'reference_id'), name='unique_credit_idempotency_key_row'),
+        ),
+        migrations.RunPython(copy_idempotency_keys, migrations.RunPython.noop),
+        # After partitioning the index is per partition, which RemoveConstraint cannot drop
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(drop_transaction_indexes, create_transaction_indexes),
+            ],
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name='credittransaction',
+                    name='unique_credit_idempotency_key',
+                ),
+            ],
+        ),
+    ]
@@ -10,6 +10,10 @@ class UserCredit(models.Model):
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     total_earned = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     total_spent = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    # Set aside by active CreditHolds; the available balance is balance - held_balance
+    held_balance = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    # When non-zero, credits added go to one of this many UserCreditShard rows
+    shard_count = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -23,34 +27,51 @@ class UserCredit(models.Model):
     
     def add_credits(self, amount, description="Credit added"):
         """Add credits to user's balance"""
-        self.balance += amount
-        self.total_earned += amount
-        self.save()
-        
-        # Create transaction record
-        CreditTransaction.objects.create(
-            user=self.user,
-            amount=amount,
-            transaction_type='earned',
-            description=description
-        )
+        from .ledger import add
+
+        self._set_balances(add(self.user_id, amount, description))
     
     def spend_credits(self, amount, description="Credit spent"):
         """Spend credits from user's balance"""
-        if self.balance >= amount:
-            self.balance -= amount
-            self.total_spent += amount
-            self.save()
-            
-            # Create transaction record
-            CreditTransaction.objects.create(
-                user=self.user,
-                amount=amount,
-                transaction_type='spent',
-                description=description
-            )
-            return True
-        return False
+        from .ledger import spend
+
+        spent, balances = spend(self.user_id, amount, description)
+        if balances:
+            self._set_balances(balances)
+        return spent
+
+    def refresh_balances(self):
+        """Reload balances from the ledger, including credits pending on shards"""
+        from .ledger import get_balances
+
+        self._set_balances(get_balances(self.user_id))
+
+    def _set_balances(self, balances):
+        self.balance, self.total_earned, self.total_spent = balances
+
+
+class UserCreditShard(models.Model):
+    """
+    Credits added to a sharded (hot) account that are not yet folded into
+    its UserCredit row. Balances include them until credits.ledger.compact
+    moves them over.
+    """
+    # The unique constraint below leads with user, so no separate FK index
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='credit_shards', db_index=False)
+    shard = models.PositiveSmallIntegerField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_credit_shards'
+        verbose_name = 'User Credit Shard'
+        verbose_name_plural = 'User Credit Shards'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'shard'], name='unique_user_credit_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} shard {self.shard}: {self.amount}"
 
 
 class CreditTransaction(models.Model):
@@ -73,11 +94,102 @@ class CreditTransaction(models.Model):
         verbose_name = 'Credit Transaction'
         verbose_name_plural = 'Credit Transactions'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='credit_txn_user_created_idx'),
+            models.Index(fields=['created_at'], name='credit_txn_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.transaction_type} - {self.amount}"
 
 
+class CreditIdempotencyKey(models.Model):
+    """
+    An idempotency key (credits.idempotency) used by a user, written in the
+    same transaction as the CreditTransaction carrying it. Kept apart from
+    credit_transactions, which is partitioned by month on PostgreSQL, so the
+    unique constraint covers every month.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='credit_idempotency_keys')
+    reference_id = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'credit_idempotency_keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'reference_id'], name='unique_credit_idempotency_key_row'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.reference_id}"
+
+
+class CreditHold(models.Model):
+    """
+    Credits set aside for an operation in progress (credits.holds). While
+    active its amount counts in UserCredit.held_balance; capturing spends
+    up to that amount, releasing or expiring gives it back.
+    """
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('captured', 'Captured'),
+        ('released', 'Released'),
+        ('expired', 'Expired'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='credit_holds')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    captured_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    description = models.TextField(blank=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'credit_holds'
+        verbose_name = 'Credit Hold'
+        verbose_name_plural = 'Credit Holds'
+        ordering = ['-created_at']
+        indexes = [
+            # The sweeper only ever looks at active holds
+            models.Index(
+                fields=['expires_at'], name='credit_hold_active_expiry_idx', condition=models.Q(status='active')
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.status} hold of {self.amount}"
+
+
+class CreditDailyRollup(models.Model):
+    """
+    Per user, day and transaction type totals of CreditTransaction, kept
+    current by credits.rollups as the ledger writes transactions.
+    """
+    # The unique constraint below leads with user, so no separate FK index
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='credit_rollups', db_index=False)
+    day = models.DateField()
+    transaction_type = models.CharField(max_length=20, choices=CreditTransaction.TRANSACTION_TYPES)
+    # Sharded accounts spread their increments like their balance; read totals summed over shards
+    shard = models.PositiveSmallIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'credit_daily_rollups'
+        verbose_name = 'Credit Daily Rollup'
+        verbose_name_plural = 'Credit Daily Rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'day', 'transaction_type', 'shard'], name='unique_credit_daily_rollup_shard'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day} {self.transaction_type}: {self.total} ({self.count})"
+
+
 class CreditPackage(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
@@ -0,0 +1,160 @@
+"""
+Monthly range partitioning of ``credit_transactions`` on PostgreSQL.
+
+Migration 0004 turns the table into one partitioned by ``created_at`` with a
+partition per calendar month. The ``(user_id, created_at)`` and
+``created_at`` indexes are declared on the parent, so PostgreSQL creates
+them on every partition, and queries that bound ``created_at`` only touch
+the months involved. On other databases (SQLite in development) the table
+stays a plain one and everything here is a no-op.
+
+PostgreSQL requires unique indexes on a partitioned table to include the
+partition key, so idempotency keys are made unique in the separate,
+unpartitioned ``credit_idempotency_keys`` table instead (migration 0007).
+
+Rows outside every monthly partition land in ``credit_transactions_default``,
+so writes keep working if ``credit_partitions`` (run monthly from cron)
+falls behind. Creating the partition for a month later moves that month's
+rows out of the default partition.
+"""
+from datetime import date
+
+from django.db import connection, transaction
+
+TABLE = 'credit_transactions'
+DEFAULT_PARTITION = f'{TABLE}_default'
+# Serializes partition DDL between concurrent runs
+_LOCK_ID = 0x63726564  # 'cred'
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned():
+    if not is_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def list_partitions(cursor=None):
+    """``[(name, month)]`` of attached partitions, oldest first."""
+    if cursor is None:
+        with connection.cursor() as cursor:
+            return list_partitions(cursor)
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = %s::regclass AND child.relname <> %s
+        ORDER BY child.relname
+        """,
+        [TABLE, DEFAULT_PARTITION],
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        year, month = name[len(TABLE) + 2:].split('_')
+        partitions.append((name, date(int(year), int(month), 1)))
+    return partitions
+
+
+def create_default_partition(cursor):
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+
+
+def _in_default_partition(cursor, bounds):
+    cursor.execute('SELECT to_regclass(%s)', [DEFAULT_PARTITION])
+    if cursor.fetchone()[0] is None:
+        return False
+    cursor.execute(
+        f'SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s LIMIT 1', bounds
+    )
+    return cursor.fetchone() is not None
+
+
+def create_partition(cursor, month):
+    """
+    Create the partition for ``month`` if missing, moving any of its rows
+    out of the default partition. Run inside a transaction. Returns its name.
+    """
+    name = partition_name(month)
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+    if _in_default_partition(cursor, bounds):
+        # A new partition cannot overlap rows held by the default one
+        cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE created_at >= %s AND created_at < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            bounds,
+        )
+        cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)', bounds)
+    else:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)', bounds
+        )
+    return name
+
+
+def create_partitions(through, start=None):
+    """
+    Create monthly partitions from ``start`` (default: the newest existing
+    one) through the month of ``through``. Returns the names created.
+    """
+    if not is_partitioned():
+        return []
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [_LOCK_ID])
+        existing = dict(list_partitions(cursor))
+        months = sorted(existing.values())
+        month = month_start(start) if start else (months[-1] if months else month_start(date.today()))
+        while month <= month_start(through):
+            if partition_name(month) not in existing:
+                created.append(create_partition(cursor, month))
+            month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(before, drop=False):
+    """
+    Detach (and optionally drop) partitions for months before ``before``.
+    Detached partitions remain as standalone tables for archiving.
+    Returns the names affected.
+    """
+    if not is_partitioned():
+        return []
+    affected = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [_LOCK_ID])
+        for name, month in list_partitions(cursor):
+            if month >= month_start(before):
+                break
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+            if drop:
+                cursor.execute(f'DROP TABLE {name}')
+            affected.append(name)
+    return affected
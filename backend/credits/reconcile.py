@@ -0,0 +1,121 @@
+"""
+Ledger reconciliation.
+
+An account is consistent when, from its CreditTransaction rows:
+
+- ``total_spent`` is the sum of ``spent`` transactions,
+- ``total_earned`` is the sum of all other types, less credits still
+  pending on shards,
+- ``balance`` is earned minus spent, less those pending credits, and
+- ``held_balance`` is the sum of the account's active holds.
+
+``check_range`` computes all of that for a range of user ids with a handful
+of GROUP BY queries, so the ``reconcile_credits`` command can spread id
+ranges over a process pool.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import CreditHold, CreditTransaction, UserCredit, UserCreditShard
+
+FIELDS = ('balance', 'total_earned', 'total_spent', 'held_balance')
+ZERO = Decimal('0.00')
+
+
+def _sum(field, **filters):
+    condition = Q(**filters) if filters else None
+    return Coalesce(Sum(field, filter=condition), ZERO, output_field=DecimalField())
+
+
+def _grouped(queryset, **aggregates):
+    return {
+        row.pop('user_id'): row
+        for row in queryset.values('user_id').annotate(**aggregates).order_by()
+    }
+
+
+def expected_balances(users):
+    """``{user_id: {field: Decimal}}`` from the ledger for a ``user_id`` filter dict."""
+    sums = _grouped(
+        CreditTransaction.objects.filter(**users),
+        earned=_sum('amount', transaction_type__in=[
+            value for value, label in CreditTransaction.TRANSACTION_TYPES if value != 'spent'
+        ]),
+        spent=_sum('amount', transaction_type='spent'),
+    )
+    pending = _grouped(UserCreditShard.objects.filter(**users), amount=_sum('amount'))
+    held = _grouped(CreditHold.objects.filter(status='active', **users), amount=_sum('amount'))
+
+    expected = {}
+    for user_id in sums.keys() | pending.keys() | held.keys():
+        earned = sums.get(user_id, {}).get('earned', ZERO)
+        spent = sums.get(user_id, {}).get('spent', ZERO)
+        on_shards = pending.get(user_id, {}).get('amount', ZERO)
+        expected[user_id] = {
+            'balance': (earned - spent - on_shards).quantize(ZERO),
+            'total_earned': (earned - on_shards).quantize(ZERO),
+            'total_spent': spent.quantize(ZERO),
+            'held_balance': held.get(user_id, {}).get('amount', ZERO).quantize(ZERO),
+        }
+    return expected
+
+
+def find_drift(users, accounts=None):
+    """
+    ``[(user_id, {field: (actual, expected)})]`` for accounts matching the
+    ``user_id`` filter dict that disagree with the ledger. A user with
+    ledger rows but no account reports None as every actual value.
+    """
+    expected = expected_balances(users)
+    if accounts is None:
+        accounts = UserCredit.objects.filter(**users)
+    actual = {row[0]: dict(zip(FIELDS, row[1:])) for row in accounts.values_list('user_id', *FIELDS)}
+
+    drift = []
+    for user_id in sorted(actual.keys() | expected.keys()):
+        want = expected.get(user_id, dict.fromkeys(FIELDS, ZERO))
+        have = actual.get(user_id, dict.fromkeys(FIELDS))
+        fields = {field: (have[field], want[field]) for field in FIELDS if have[field] != want[field]}
+        if fields:
+            drift.append((user_id, fields))
+    return drift
+
+
+def repair(user_ids):
+    """
+    Reset the accounts of ``user_ids`` to the ledger's values. Rechecks
+    them under lock, so concurrent writes are not overwritten. Returns the
+    drift that was fixed.
+    """
+    users = {'user_id__in': list(user_ids)}
+    with transaction.atomic():
+        # Shards, then accounts: the order the ledger locks them in
+        list(UserCreditShard.objects.select_for_update().filter(**users).values_list('pk', flat=True))
+        accounts = UserCredit.objects.select_for_update().filter(**users).order_by('user_id')
+        list(accounts.values_list('pk', flat=True))
+        drift = find_drift(users, accounts)
+        for user_id, fields in drift:
+            values = {field: expected for field, (actual, expected) in fields.items()}
+            if not UserCredit.objects.filter(user_id=user_id).update(**values):
+                UserCredit.objects.create(user_id=user_id, **values)
+    return drift
+
+
+def check_range(start, end, fix=False):
+    """
+    Reconcile users with ``start <= id < end``. With ``fix``, drifted
+    accounts are repaired. Returns a summary dict; run in a worker process.
+    """
+    users = {'user_id__gte': start, 'user_id__lt': end}
+    drift = find_drift(users)
+    if fix and drift:
+        drift = repair([user_id for user_id, fields in drift])
+    return {
+        'start': start,
+        'end': end,
+        'accounts': UserCredit.objects.filter(**users).count(),
+        'drift': drift,
+    }
@@ -0,0 +1,116 @@
+"""
+Daily credit rollups.
+
+The ledger records every ``CreditTransaction`` it writes into
+``CreditDailyRollup`` within the same transaction, as an increment of the
+(user, day, type) row. Stats over a range of days read closed days from the
+rollups and today from the live transactions table, so their cost no longer
+grows with a user's history.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CreditDailyRollup, CreditTransaction
+
+
+def record(user_ids, transaction_type, amount, when=None, shard=0):
+    """
+    Count one ``amount`` transaction of ``transaction_type`` for each of
+    ``user_ids`` (distinct) on the day of ``when``. Call inside the
+    transaction that inserts them. Sharded accounts pass the ``shard`` their
+    balance increment went to, so the rollup row is not a hot spot either.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    day = timezone.localdate(when)
+    rows = CreditDailyRollup.objects.filter(
+        user_id__in=user_ids, day=day, transaction_type=transaction_type, shard=shard
+    )
+    changes = {'total': F('total') + amount, 'count': F('count') + 1}
+    if len(user_ids) == 1:
+        if rows.update(**changes):
+            return
+        missing = user_ids
+    else:
+        existing = set(rows.values_list('user_id', flat=True))
+        if existing:
+            rows.filter(user_id__in=existing).update(**changes)
+        missing = [user_id for user_id in user_ids if user_id not in existing]
+
+    if missing:
+        # Whoever inserts a row, each writer still applies its own increment
+        CreditDailyRollup.objects.bulk_create(
+            [
+                CreditDailyRollup(user_id=user_id, day=day, transaction_type=transaction_type, shard=shard)
+                for user_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+        rows.filter(user_id__in=missing).update(**changes)
+
+
+def day_bounds(day):
+    """Aware datetimes for the start of ``day`` and of the day after."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def totals(user_id, start_day, end_day):
+    """
+    ``{transaction_type: {'total': Decimal, 'count': int}}`` for the
+    inclusive day range.
+    """
+    today = timezone.localdate()
+    result = {}
+
+    def accumulate(rows):
+        for row in rows:
+            entry = result.setdefault(row['transaction_type'], {'total': Decimal('0.00'), 'count': 0})
+            entry['total'] += row['total']
+            entry['count'] += row['count']
+
+    # Closed days from the rollups
+    closed_end = min(end_day, today - timedelta(days=1))
+    if start_day <= closed_end:
+        accumulate(
+            CreditDailyRollup.objects.filter(
+                user_id=user_id, day__gte=start_day, day__lte=closed_end
+            ).values('transaction_type').annotate(total=Sum('total'), count=Sum('count'))
+        )
+
+    # Today live
+    if start_day <= today <= end_day:
+        since, until = day_bounds(today)
+        accumulate(
+            CreditTransaction.objects.filter(
+                user_id=user_id, created_at__gte=since, created_at__lt=until
+            ).values('transaction_type').annotate(total=Sum('amount'), count=Count('id'))
+        )
+    return result
+
+
+def rebuild(user_ids, before_day):
+    """
+    Recompute the rollups of ``user_ids`` for every day before
+    ``before_day`` from their transactions. Returns the rows written.
+    """
+    since, _ = day_bounds(before_day)
+    with transaction.atomic():
+        CreditDailyRollup.objects.filter(user_id__in=user_ids, day__lt=before_day).delete()
+        rows = CreditTransaction.objects.filter(
+            user_id__in=user_ids, created_at__lt=since
+        ).annotate(
+            day=TruncDate('created_at')
+        ).values('user_id', 'day', 'transaction_type').annotate(
+            total=Sum('amount'), count=Count('id')
+        ).order_by()
+        created = CreditDailyRollup.objects.bulk_create(
+            [CreditDailyRollup(**row) for row in rows], batch_size=1000
+        )
+    return len(created)
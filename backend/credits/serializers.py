@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import UserCredit, CreditTransaction, CreditPackage
+from .models import UserCredit, CreditTransaction, CreditPackage, CreditHold
 
 
 class UserCreditSerializer(serializers.ModelSerializer):
@@ -8,10 +8,10 @@ class UserCreditSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserCredit
         fields = (
-            'id', 'user', 'user_name', 'balance', 'total_earned', 
+            'id', 'user', 'user_name', 'balance', 'held_balance', 'total_earned', 
             'total_spent', 'created_at', 'updated_at'
         )
-        read_only_fields = ('id', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'held_balance', 'created_at', 'updated_at')
 
 
 class CreditTransactionSerializer(serializers.ModelSerializer):
@@ -54,3 +54,64 @@ class SpendCreditsSerializer(serializers.Serializer):
         if value <= 0:
             raise serializers.ValidationError("Amount must be greater than 0")
         return value
+
+
+class CreditHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CreditHold
+        fields = (
+            'id', 'user', 'amount', 'captured_amount', 'status', 'description',
+            'expires_at', 'created_at', 'updated_at'
+        )
+        read_only_fields = fields
+
+
+class PlaceHoldSerializer(serializers.Serializer):
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0.01)
+    description = serializers.CharField(max_length=500, required=False, default='')
+    ttl_seconds = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_ttl_seconds(self, value):
+        from .holds import get_config
+
+        if value > get_config()['MAX_TTL']:
+            raise serializers.ValidationError(f"Holds last at most {get_config()['MAX_TTL']} seconds")
+        return value
+
+
+class CaptureHoldSerializer(serializers.Serializer):
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    description = serializers.CharField(max_length=500, required=False, default='')
+
+
+class BulkGrantSerializer(serializers.Serializer):
+    """Recipients are the listed users, the users matching the filter, or both combined."""
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0.01)
+    description = serializers.CharField(max_length=500, required=False, default='Credits granted by admin')
+    user_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    role = serializers.ChoiceField(choices=[], required=False)
+    is_active = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from authentication.models import User
+        self.fields['role'].choices = User.ROLE_CHOICES
+
+    def validate(self, attrs):
+        if 'user_ids' not in attrs and 'role' not in attrs and attrs.get('is_active') is None:
+            raise serializers.ValidationError('Provide user_ids or a role / is_active filter')
+        return attrs
+
+    def get_recipients(self):
+        """Distinct ids of the selected users, in id order."""
+        from authentication.models import User
+
+        users = User.objects.all()
+        data = self.validated_data
+        if 'user_ids' in data:
+            users = users.filter(pk__in=data['user_ids'])
+        if 'role' in data:
+            users = users.filter(role=data['role'])
+        if data.get('is_active') is not None:
+            users = users.filter(is_active=data['is_active'])
+        return users.order_by('pk').values_list('pk', flat=True)
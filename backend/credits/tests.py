@@ -1,3 +1,407 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.serializers import UserDashboardSerializer
+
+from . import holds, idempotency, ledger, reconcile, rollups
+from .models import (
+    UserCredit, UserCreditShard, CreditTransaction, CreditDailyRollup, CreditHold, CreditIdempotencyKey
+)
+
+User = get_user_model()
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='ledger',
+            email='ledger@example.com',
+            password='testpass123'
+        )
+
+    def test_spend_is_conditional_update_plus_insert(self):
+        ledger.add(self.user.pk, Decimal('10.00'))
+        # savepoint, conditional UPDATE, INSERT, rollup UPDATE + INSERT +
+        # UPDATE (first spend of the day), read back, release
+        with self.assertNumQueries(8):
+            spent, balances = ledger.spend(self.user.pk, Decimal('4.00'))
+        self.assertTrue(spent)
+        self.assertEqual(balances, (Decimal('6.00'), Decimal('10.00'), Decimal('4.00')))
+
+    def test_overdraw_is_refused_without_writing(self):
+        ledger.add(self.user.pk, Decimal('3.00'))
+        spent, balances = ledger.spend(self.user.pk, Decimal('5.00'))
+        self.assertFalse(spent)
+        self.assertEqual(balances.balance, Decimal('3.00'))
+        self.assertFalse(CreditTransaction.objects.filter(transaction_type='spent').exists())
+
+    def test_stale_instance_cannot_overdraw(self):
+        ledger.add(self.user.pk, Decimal('5.00'))
+        first = UserCredit.objects.get(user=self.user)
+        second = UserCredit.objects.get(user=self.user)
+        self.assertTrue(first.spend_credits(Decimal('5.00')))
+        # second still believes the balance is 5.00
+        self.assertFalse(second.spend_credits(Decimal('5.00')))
+        self.assertEqual(second.balance, Decimal('0.00'))
+
+    def test_sharded_account_spreads_adds_and_reads_sum(self):
+        ledger.add(self.user.pk, Decimal('1.00'))
+        ledger.set_shards(self.user.pk, 4)
+        for _ in range(8):
+            ledger.add(self.user.pk, Decimal('2.00'))
+        credit = UserCredit.objects.get(user=self.user)
+        self.assertEqual(credit.balance, Decimal('1.00'))
+        self.assertEqual(ledger.get_balances(self.user.pk), (Decimal('17.00'), Decimal('17.00'), Decimal('0.00')))
+        self.assertEqual(
+            UserDashboardSerializer().get_credits(self.user),
+            {'balance': '17.00', 'total_earned': '17.00', 'total_spent': '0.00'}
+        )
+        self.assertEqual(
+            sum(CreditDailyRollup.objects.filter(user=self.user, transaction_type='earned').values_list('total', flat=True)),
+            Decimal('17.00')
+        )
+
+        # The account row alone cannot cover this; spend folds the shards in first
+        spent, balances = ledger.spend(self.user.pk, Decimal('10.00'))
+        self.assertTrue(spent)
+        self.assertEqual(balances.balance, Decimal('7.00'))
+        self.assertFalse(UserCreditShard.objects.filter(user=self.user, amount__gt=0).exists())
+
+        ledger.add(self.user.pk, Decimal('3.00'))
+        self.assertEqual(ledger.compact(self.user.pk), Decimal('3.00'))
+        credit.refresh_from_db()
+        self.assertEqual((credit.balance, credit.total_earned), (Decimal('10.00'), Decimal('20.00')))
+
+    def test_spend_endpoint(self):
+        ledger.add(self.user.pk, Decimal('2.00'))
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.post('/api/credits/spend/', {'amount': '1.50'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['new_balance'], '0.50')
+        response = client.post('/api/credits/spend/', {'amount': '1.50'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['current_balance'], '0.50')
+
+
+class BulkGrantTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='granter', email='granter@example.com', password='testpass123', role='admin'
+        )
+        self.users = [
+            User.objects.create_user(
+                username=f'grantee{i}', email=f'grantee{i}@example.com', password='testpass123',
+                is_active=i != 2
+            )
+            for i in range(3)
+        ]
+        UserCredit.objects.filter(user=self.users[0]).delete()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_filter_grant_is_set_based(self):
+        # 2 chunks of at most 2 users: ids query, then per chunk a savepoint,
+        # account insert, balance update, transactions insert, rollup
+        # lookup + insert + update, release
+        with self.assertNumQueries(17):
+            summary = ledger.bulk_add(
+                User.objects.filter(role='user').order_by('pk').values_list('pk', flat=True),
+                Decimal('5.00'),
+                chunk_size=2,
+            )
+        self.assertEqual(summary['granted'], 3)
+        for user in self.users:
+            self.assertEqual(ledger.get_balances(user.pk).balance, Decimal('5.00'))
+        self.assertEqual(CreditTransaction.objects.filter(transaction_type='bonus').count(), 3)
+
+    def test_endpoint_combines_list_and_filter(self):
+        response = self.client.post('/api/credits/bulk-grant/', {
+            'amount': '2.50',
+            'user_ids': [user.pk for user in self.users] + [self.users[0].pk, 9999],
+            'is_active': True,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['granted'], 2)
+        self.assertEqual(ledger.get_balances(self.users[0].pk).balance, Decimal('2.50'))
+        self.assertEqual(ledger.get_balances(self.users[2].pk).balance, Decimal('0.00'))
+
+    def test_endpoint_requires_admin_and_selection(self):
+        self.assertEqual(
+            self.client.post('/api/credits/bulk-grant/', {'amount': '1.00'}, format='json').status_code, 400
+        )
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.post('/api/credits/bulk-grant/', {'amount': '1.00', 'role': 'user'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='rollup', email='rollup@example.com', password='testpass123'
+        )
+        self.today = timezone.localdate()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _backdate(self, days):
+        CreditTransaction.objects.filter(user=self.user).update(
+            created_at=timezone.now() - timedelta(days=days)
+        )
+        CreditDailyRollup.objects.all().delete()
+        rollups.rebuild([self.user.pk], self.today)
+
+    def test_ledger_writes_are_rolled_up(self):
+        ledger.add(self.user.pk, Decimal('10.00'))
+        ledger.add(self.user.pk, Decimal('5.00'))
+        ledger.spend(self.user.pk, Decimal('4.00'))
+        ledger.bulk_add([self.user.pk], Decimal('1.00'))
+        rows = {
+            row.transaction_type: (row.total, row.count)
+            for row in CreditDailyRollup.objects.filter(user=self.user, day=self.today)
+        }
+        self.assertEqual(rows, {
+            'earned': (Decimal('15.00'), 2),
+            'spent': (Decimal('4.00'), 1),
+            'bonus': (Decimal('1.00'), 1),
+        })
+
+    def test_totals_combine_closed_days_and_today(self):
+        ledger.add(self.user.pk, Decimal('7.00'))
+        ledger.add(self.user.pk, Decimal('3.00'))
+        self._backdate(3)
+        ledger.add(self.user.pk, Decimal('2.00'))
+        self.assertEqual(
+            CreditDailyRollup.objects.get(day=self.today - timedelta(days=3)).count, 2
+        )
+
+        stats = rollups.totals(self.user.pk, self.today - timedelta(days=29), self.today)
+        self.assertEqual(stats['earned'], {'total': Decimal('12.00'), 'count': 3})
+        stats = rollups.totals(self.user.pk, self.today - timedelta(days=2), self.today)
+        self.assertEqual(stats['earned'], {'total': Decimal('2.00'), 'count': 1})
+
+    def test_transaction_list_filters_by_date_range(self):
+        ledger.add(self.user.pk, Decimal('1.00'))
+        self._backdate(40)
+        ledger.add(self.user.pk, Decimal('2.00'))
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get('/api/credits/transactions/', {'created_at__gte': since})
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([entry['amount'] for entry in results], ['2.00'])
+
+    def test_stats_endpoints(self):
+        ledger.add(self.user.pk, Decimal('8.00'))
+        self._backdate(40)
+        ledger.add(self.user.pk, Decimal('2.00'))
+        ledger.spend(self.user.pk, Decimal('1.50'))
+
+        response = self.client.get('/api/credits/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['monthly_earned'], '2.00')
+        self.assertEqual(response.data['monthly_spent'], '1.50')
+
+        start = (self.today - timedelta(days=60)).isoformat()
+        response = self.client.get(f'/api/credits/stats/range/?start={start}&end={self.today.isoformat()}')
+        self.assertEqual(response.data['totals']['earned'], {'total': '10.00', 'count': 2})
+        self.assertEqual(
+            self.client.get('/api/credits/stats/range/?start=2024-02-01&end=2024-01-01').status_code, 400
+        )
+
+    def test_range_stats_rejects_impossible_dates(self):
+        response = self.client.get('/api/credits/stats/range/?start=2024-02-30&end=2024-03-01')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+
+
+@override_settings(CREDIT_IDEMPOTENCY={'CACHE_ALIAS': 'local', 'TIMEOUT': 60})
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='retrier', email='retrier@example.com', password='testpass123'
+        )
+        ledger.add(self.user.pk, Decimal('10.00'))
+        caches['local'].clear()
+        idempotency._local.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _spend(self, amount='3.00', key='retry-1'):
+        return self.client.post(
+            '/api/credits/spend/', {'amount': amount}, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_without_touching_ledger(self):
+        first = self._spend()
+        with self.assertNumQueries(0):
+            retry = self._spend()
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(ledger.get_balances(self.user.pk).balance, Decimal('7.00'))
+        self.assertEqual(CreditTransaction.objects.filter(transaction_type='spent').count(), 1)
+
+    def test_retry_after_cache_expiry_is_answered_from_ledger(self):
+        self._spend()
+        caches['local'].clear()
+        idempotency._local.clear()
+        retry = self._spend()
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data['new_balance'], '7.00')
+        self.assertEqual(ledger.get_balances(self.user.pk).balance, Decimal('7.00'))
+        self.assertEqual(self._spend(amount='4.00').status_code, 409)
+
+    def test_concurrent_duplicate_loses_on_constraint(self):
+        # The other request committed after our lookup missed
+        reference_id = idempotency.reference_for('spend', 'retry-1')
+        CreditIdempotencyKey.objects.create(user=self.user, reference_id=reference_id)
+        CreditTransaction.objects.create(
+            user=self.user, amount=Decimal('3.00'), transaction_type='spent',
+            description='Credits spent', reference_id=reference_id,
+        )
+        real_lookup = idempotency._from_ledger
+        lookups = []
+
+        def lookup(*args):
+            lookups.append(args)
+            return None if len(lookups) == 1 else real_lookup(*args)
+
+        with mock.patch.object(idempotency, '_from_ledger', lookup):
+            response = self._spend()
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        # The losing spend rolled back
+        self.assertEqual(ledger.get_balances(self.user.pk).balance, Decimal('10.00'))
+
+    def test_used_key_is_refused_by_the_ledger(self):
+        # Holds even where credit_transactions has no unique index on the key
+        # (partitioned by month on PostgreSQL)
+        self._spend()
+        with self.assertRaises(IntegrityError):
+            ledger.spend(self.user.pk, Decimal('3.00'), reference_id=idempotency.reference_for('spend', 'retry-1'))
+        self.assertEqual(ledger.get_balances(self.user.pk).balance, Decimal('7.00'))
+        self.assertEqual(CreditIdempotencyKey.objects.filter(user=self.user).count(), 1)
+        # Other references may repeat
+        ledger.add(self.user.pk, Decimal('1.00'), reference_id='order-7')
+        ledger.add(self.user.pk, Decimal('1.00'), reference_id='order-7')
+        self.assertEqual(CreditIdempotencyKey.objects.filter(user=self.user).count(), 1)
+
+    def test_failed_spend_is_not_replayed(self):
+        self.assertEqual(self._spend(amount='50.00').status_code, 400)
+        ledger.add(self.user.pk, Decimal('50.00'))
+        retry = self._spend(amount='50.00')
+        self.assertEqual(retry.status_code, 200)
+        self.assertFalse(retry.has_header('Idempotent-Replayed'))
+        self.assertEqual(self._spend(amount='50.00')['Idempotent-Replayed'], 'true')
+        self.assertEqual(ledger.get_balances(self.user.pk).balance, Decimal('10.00'))
+
+    def test_invalid_key_is_rejected(self):
+        self.assertEqual(self._spend(key='not a valid key!').status_code, 400)
+
+
+class HoldTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='holder', email='holder@example.com', password='testpass123'
+        )
+        ledger.add(self.user.pk, Decimal('10.00'))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_hold_is_one_conditional_update(self):
+        # savepoint, conditional UPDATE, INSERT, release
+        with self.assertNumQueries(4):
+            hold = holds.place(self.user.pk, Decimal('6.00'))
+        self.assertEqual(ledger.get_available(self.user.pk), Decimal('4.00'))
+        self.assertIsNone(holds.place(self.user.pk, Decimal('5.00')))
+        # Held credits cannot be spent either
+        self.assertFalse(ledger.spend(self.user.pk, Decimal('5.00'))[0])
+        self.assertTrue(holds.release(hold))
+        self.assertFalse(holds.release(hold))
+        self.assertEqual(ledger.get_available(self.user.pk), Decimal('10.00'))
+
+    def test_capture_spends_part_and_returns_rest(self):
+        response = self.client.post('/api/credits/holds/', {'amount': '6.00'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['available_balance'], '4.00')
+        url = f"/api/credits/holds/{response.data['id']}/capture/"
+
+        self.assertEqual(self.client.post(url, {'amount': '7.00'}, format='json').status_code, 400)
+        response = self.client.post(url, {'amount': '2.50'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'captured')
+        self.assertEqual(self.client.post(url, {}, format='json').status_code, 409)
+
+        credit = UserCredit.objects.get(user=self.user)
+        self.assertEqual(
+            (credit.balance, credit.held_balance, credit.total_spent),
+            (Decimal('7.50'), Decimal('0.00'), Decimal('2.50'))
+        )
+        self.assertTrue(CreditTransaction.objects.filter(reference_id=f"hold:{response.data['id']}").exists())
+
+    def test_sweeper_expires_stale_holds(self):
+        stale = [holds.place(self.user.pk, Decimal('2.00')) for _ in range(3)]
+        fresh = holds.place(self.user.pk, Decimal('1.00'), ttl=3600)
+        CreditHold.objects.filter(pk__in=[hold.pk for hold in stale]).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(holds.expire(batch_size=2), 3)
+        self.assertEqual(ledger.get_available(self.user.pk), Decimal('9.00'))
+        self.assertFalse(holds.capture(stale[0]))
+        self.assertTrue(holds.capture(fresh))
+        self.assertEqual(CreditHold.objects.filter(status='expired').count(), 3)
+
+
+class ReconcileTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                username=f'reconcile{i}', email=f'reconcile{i}@example.com', password='testpass123'
+            )
+            for i in range(3)
+        ]
+        for user in self.users:
+            ledger.add(user.pk, Decimal('10.00'))
+            ledger.spend(user.pk, Decimal('4.00'))
+        ledger.set_shards(self.users[1].pk, 2)
+        ledger.add(self.users[1].pk, Decimal('5.00'))
+        holds.place(self.users[2].pk, Decimal('1.00'))
+        self.everyone = {'user_id__in': [user.pk for user in self.users]}
+
+    def test_consistent_ledger_has_no_drift(self):
+        self.assertEqual(reconcile.find_drift(self.everyone), [])
+
+    def test_drift_is_reported_and_repaired(self):
+        UserCredit.objects.filter(user=self.users[0]).update(balance=Decimal('50.00'))
+        UserCredit.objects.filter(user=self.users[2]).update(held_balance=Decimal('0.00'))
+        drift = reconcile.find_drift(self.everyone)
+        self.assertEqual(drift, [
+            (self.users[0].pk, {'balance': (Decimal('50.00'), Decimal('6.00'))}),
+            (self.users[2].pk, {'held_balance': (Decimal('0.00'), Decimal('1.00'))}),
+        ])
+
+        out = StringIO()
+        call_command('reconcile_credits', workers=1, dry_run=True, repair=True, stdout=out)
+        self.assertIn('2 drifted', out.getvalue())
+        self.assertEqual(len(reconcile.find_drift(self.everyone)), 2)
+
+        call_command('reconcile_credits', workers=1, repair=True, stdout=StringIO())
+        self.assertEqual(reconcile.find_drift(self.everyone), [])
+        self.assertEqual(ledger.get_available(self.users[2].pk), Decimal('5.00'))
+
+    def test_missing_account_is_recreated(self):
+        UserCredit.objects.filter(user=self.users[0]).delete()
+        self.assertEqual(reconcile.find_drift(self.everyone)[0][1]['balance'], (None, Decimal('6.00')))
+        reconcile.repair([self.users[0].pk])
+        self.assertEqual(ledger.get_balances(self.users[0].pk), (Decimal('6.00'), Decimal('10.00'), Decimal('4.00')))
@@ -9,6 +9,11 @@ urlpatterns = [
     path('packages/', views.CreditPackageListView.as_view(), name='package_list'),
     path('packages/<int:pk>/', views.CreditPackageDetailView.as_view(), name='package_detail'),
     path('add/', views.add_credits_view, name='add_credits'),
+    path('bulk-grant/', views.bulk_grant_view, name='bulk_grant'),
     path('spend/', views.spend_credits_view, name='spend_credits'),
+    path('holds/', views.place_hold_view, name='place_hold'),
+    path('holds/<int:pk>/capture/', views.capture_hold_view, name='capture_hold'),
+    path('holds/<int:pk>/release/', views.release_hold_view, name='release_hold'),
     path('stats/', views.credit_stats_view, name='credit_stats'),
+    path('stats/range/', views.credit_range_stats_view, name='credit_range_stats'),
 ]
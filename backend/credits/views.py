@@ -3,15 +3,30 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import UserCredit, CreditTransaction, CreditPackage
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from decimal import Decimal
+import logging
+import uuid
+from . import holds, idempotency, ledger, rollups
+from .models import UserCredit, CreditTransaction, CreditPackage, CreditHold
 from .serializers import (
     UserCreditSerializer, 
     CreditTransactionSerializer, 
     CreditPackageSerializer,
     AddCreditsSerializer,
-    SpendCreditsSerializer
+    SpendCreditsSerializer,
+    BulkGrantSerializer,
+    CreditHoldSerializer,
+    PlaceHoldSerializer,
+    CaptureHoldSerializer
 )
 from authentication.permissions import IsOwnerOrAdmin, CanManageUsers
+from core.throttling import throttle_scope
+
+logger = logging.getLogger(__name__)
 
 
 class UserCreditView(generics.RetrieveAPIView):
@@ -20,6 +35,8 @@ class UserCreditView(generics.RetrieveAPIView):
     
     def get_object(self):
         credit, created = UserCredit.objects.get_or_create(user=self.request.user)
+        if credit.shard_count:
+            credit.refresh_balances()
         return credit
 
 
@@ -27,7 +44,8 @@ class CreditTransactionListView(generics.ListAPIView):
     serializer_class = CreditTransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['transaction_type']
+    # Bounding created_at lets PostgreSQL skip ledger partitions outside the range
+    filterset_fields = {'transaction_type': ['exact'], 'created_at': ['gte', 'lt']}
     search_fields = ['description']
     ordering_fields = ['created_at', 'amount']
     ordering = ['-created_at']
@@ -68,21 +86,37 @@ def add_credits_view(request):
                 {"error": "user_id is required"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+        key = idempotency.get_key(request)
+        if key is not None and not idempotency.is_valid_key(key):
+            return Response(
+                {"error": "Invalid Idempotency-Key"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         try:
             from authentication.models import User
             user = User.objects.get(id=user_id)
-            credit, created = UserCredit.objects.get_or_create(user=user)
             
             amount = serializer.validated_data['amount']
             description = serializer.validated_data.get('description', 'Credits added by admin')
             
-            credit.add_credits(amount, description)
+            def perform(reference_id):
+                balances = ledger.add(user.pk, amount, description, reference_id=reference_id)
+                return status.HTTP_200_OK, {
+                    "message": f"Successfully added {amount} credits to {user.get_full_name()}",
+                    "new_balance": str(balances.balance)
+                }
             
-            return Response({
-                "message": f"Successfully added {amount} credits to {user.get_full_name()}",
-                "new_balance": str(credit.balance)
-            }, status=status.HTTP_200_OK)
+            def replay(original):
+                # The balance after the original add isn't stored; report the current one
+                return status.HTTP_200_OK, {
+                    "message": f"Successfully added {original.amount} credits to {user.get_full_name()}",
+                    "new_balance": str(ledger.get_balances(user.pk).balance)
+                }
+            
+            return _idempotent_response(
+                *idempotency.run(user.pk, 'add', key, amount, perform, replay)
+            )
             
         except User.DoesNotExist:
             return Response(
@@ -93,67 +127,205 @@ def add_credits_view(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated, CanManageUsers])
+def bulk_grant_view(request):
+    """Grant credits to a list of users or to everyone matching a filter (admin only)"""
+    serializer = BulkGrantSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    summary = ledger.bulk_add(
+        serializer.get_recipients(),
+        data['amount'],
+        description=data['description'],
+        reference_id=f'bulk-grant:{uuid.uuid4().hex}',
+    )
+    logger.info(f"User {request.user.id} granted {data['amount']} credits to {summary['granted']} users")
+    return Response(summary, status=status.HTTP_200_OK)
+
+
+@throttle_scope('credits_spend')
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def spend_credits_view(request):
-    """Spend credits from user's account"""
+    """
+    Spend credits from user's account.
+
+    With an Idempotency-Key header a retry replays the first successful
+    response; once that is no longer cached, ``new_balance`` in the replay
+    is the current balance. A failed spend is not remembered, so retrying
+    its key tries again.
+    """
     serializer = SpendCreditsSerializer(data=request.data)
     if serializer.is_valid():
-        credit, created = UserCredit.objects.get_or_create(user=request.user)
-        
+        key = idempotency.get_key(request)
+        if key is not None and not idempotency.is_valid_key(key):
+            return Response(
+                {"error": "Invalid Idempotency-Key"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         amount = serializer.validated_data['amount']
         description = serializer.validated_data.get('description', 'Credits spent')
         
-        if credit.spend_credits(amount, description):
-            return Response({
-                "message": f"Successfully spent {amount} credits",
-                "new_balance": str(credit.balance)
-            }, status=status.HTTP_200_OK)
-        else:
+        def perform(reference_id):
+            spent, balances = ledger.spend(request.user.pk, amount, description, reference_id=reference_id)
+            balance = balances.balance if balances else Decimal('0.00')
+            if spent:
+                return status.HTTP_200_OK, {
+                    "message": f"Successfully spent {amount} credits",
+                    "new_balance": str(balance)
+                }
+            return status.HTTP_400_BAD_REQUEST, {
+                "error": "Insufficient credits",
+                "current_balance": str(balance),
+                "requested_amount": str(amount)
+            }
+        
+        def replay(original):
+            # The balance after the original spend isn't stored; report the current one
+            return status.HTTP_200_OK, {
+                "message": f"Successfully spent {original.amount} credits",
+                "new_balance": str(ledger.get_balances(request.user.pk).balance)
+            }
+        
+        return _idempotent_response(
+            *idempotency.run(request.user.pk, 'spend', key, amount, perform, replay)
+        )
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def place_hold_view(request):
+    """Set credits aside for an operation that will capture or release them"""
+    serializer = PlaceHoldSerializer(data=request.data)
+    if serializer.is_valid():
+        amount = serializer.validated_data['amount']
+        hold = holds.place(
+            request.user.pk,
+            amount,
+            serializer.validated_data['description'],
+            ttl=serializer.validated_data.get('ttl_seconds'),
+        )
+        if hold is None:
             return Response({
                 "error": "Insufficient credits",
-                "current_balance": str(credit.balance),
+                "available_balance": str(ledger.get_available(request.user.pk)),
                 "requested_amount": str(amount)
             }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            **CreditHoldSerializer(hold).data,
+            "available_balance": str(ledger.get_available(request.user.pk)),
+        }, status=status.HTTP_201_CREATED)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _get_hold(request, pk):
+    if request.user.role == 'admin':
+        return get_object_or_404(CreditHold, pk=pk)
+    return get_object_or_404(CreditHold, pk=pk, user=request.user)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def capture_hold_view(request, pk):
+    """Spend all or part of a hold; the rest is released"""
+    hold = _get_hold(request, pk)
+    serializer = CaptureHoldSerializer(data=request.data)
+    if serializer.is_valid():
+        amount = serializer.validated_data.get('amount', hold.amount)
+        if amount > hold.amount:
+            return Response(
+                {"error": "Cannot capture more than the held amount"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not holds.capture(hold, amount, serializer.validated_data['description']):
+            return Response(
+                {"error": "Hold is no longer active"},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(CreditHoldSerializer(hold).data)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def release_hold_view(request, pk):
+    """Give a hold's credits back without spending them"""
+    hold = _get_hold(request, pk)
+    if not holds.release(hold):
+        return Response(
+            {"error": "Hold is no longer active"},
+            status=status.HTTP_409_CONFLICT
+        )
+    return Response(CreditHoldSerializer(hold).data)
+
+
+def _idempotent_response(status_code, data, replayed):
+    response = Response(data, status=status_code)
+    if replayed:
+        response['Idempotent-Replayed'] = 'true'
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def credit_stats_view(request):
     """Get credit statistics for dashboard"""
     credit, created = UserCredit.objects.get_or_create(user=request.user)
+    if credit.shard_count:
+        credit.refresh_balances()
     
     # Get recent transactions
     recent_transactions = CreditTransaction.objects.filter(
         user=request.user
     ).order_by('-created_at')[:10]
     
-    # Get monthly stats
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    now = timezone.now()
-    last_month = now - timedelta(days=30)
-    
-    monthly_earned = CreditTransaction.objects.filter(
-        user=request.user,
-        transaction_type='earned',
-        created_at__gte=last_month
-    ).aggregate(total=models.Sum('amount'))['total'] or 0
-    
-    monthly_spent = CreditTransaction.objects.filter(
-        user=request.user,
-        transaction_type='spent',
-        created_at__gte=last_month
-    ).aggregate(total=models.Sum('amount'))['total'] or 0
+    # Monthly stats: the last 30 days including today, from the daily rollups
+    today = timezone.localdate()
+    monthly = rollups.totals(request.user.pk, today - timedelta(days=29), today)
     
     return Response({
         'balance': str(credit.balance),
         'total_earned': str(credit.total_earned),
         'total_spent': str(credit.total_spent),
-        'monthly_earned': str(monthly_earned),
-        'monthly_spent': str(monthly_spent),
+        'monthly_earned': str(monthly.get('earned', {}).get('total', Decimal('0.00'))),
+        'monthly_spent': str(monthly.get('spent', {}).get('total', Decimal('0.00'))),
         'recent_transactions': CreditTransactionSerializer(recent_transactions, many=True).data
-    })
\ No newline at end of file
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def credit_range_stats_view(request):
+    """Per-type credit totals for ?start=YYYY-MM-DD&end=YYYY-MM-DD (inclusive)"""
+    try:
+        start = parse_date(request.query_params.get('start') or '')
+        end = parse_date(request.query_params.get('end') or '')
+    except ValueError:
+        # Well formed but not a real date, e.g. 2024-02-30
+        start = end = None
+    if not start or not end:
+        return Response(
+            {"error": "start and end dates (YYYY-MM-DD) are required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if start > end:
+        return Response(
+            {"error": "start must not be after end"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    stats = rollups.totals(request.user.pk, start, end)
+    return Response({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'totals': {
+            transaction_type: {'total': str(entry['total']), 'count': entry['count']}
+            for transaction_type, entry in stats.items()
+        },
+    })
@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db import transaction
 from django.db.models import Q
 from .models import Message, MessageThread, ThreadMessage, Notification
 from .serializers import (
@@ -16,6 +17,7 @@ from .serializers import (
     InboxSerializer
 )
 from authentication.permissions import IsOwnerOrAdmin
+from core.throttling import throttle_scope
 
 
 class MessageListView(generics.ListCreateAPIView):
@@ -137,6 +139,7 @@ class NotificationDetailView(generics.RetrieveUpdateAPIView):
         return super().retrieve(request, *args, **kwargs)
 
 
+@throttle_scope('inbox')
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def inbox_view(request):
@@ -167,13 +170,25 @@ def inbox_view(request):
 @permission_classes([permissions.IsAuthenticated])
 def mark_all_read_view(request):
     """Mark all messages and notifications as read"""
+    from core.models import DashboardCounters
+
     user = request.user
     
-    # Mark all messages as read
-    Message.objects.filter(recipient=user, is_read=False).update(is_read=True)
-    
-    # Mark all notifications as read
-    Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+    with transaction.atomic():
+        # Bulk updates skip the counter signals; holding the counters row
+        # keeps new messages from slipping in between the update and reset
+        counters = DashboardCounters.objects.select_for_update().filter(user=user).first()
+
+        # Mark all messages as read
+        Message.objects.filter(recipient=user, is_read=False).update(is_read=True)
+        
+        # Mark all notifications as read
+        Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+
+        if counters:
+            DashboardCounters.objects.filter(user=user).update(
+                messages_unread=0, notifications_unread=0
+            )
     
     return Response({"message": "All messages and notifications marked as read"})
 
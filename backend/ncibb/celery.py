@@ -0,0 +1,13 @@
+"""
+Celery application for NCIBB background tasks.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ncibb.settings')
+
+app = Celery('ncibb')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -55,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'authentication.middleware.LastActivityMiddleware',
 ]
 
 ROOT_URLCONF = 'ncibb.urls'
@@ -89,6 +90,23 @@ DATABASES = {
     }
 }
 
+# Authentication backends
+AUTHENTICATION_BACKENDS = [
+    'authentication.backends.PooledHashingModelBackend',
+]
+
+# Password hashing pool used by the login endpoints. MAX_WORKERS/MAX_QUEUE
+# bound each process; SHARED_LIMIT bounds all processes through the cache,
+# which needs a shared CACHE_BACKEND (e.g. Redis) to span gunicorn workers.
+LOGIN_HASHING = {
+    'MAX_WORKERS': 4,
+    'MAX_QUEUE': 16,
+    'TIMEOUT': 10,
+    'SHARED_LIMIT': 32,
+    'CACHE_ALIAS': 'default',
+    'SHARED_TTL': 60,
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -133,7 +151,7 @@ AUTH_USER_MODEL = 'authentication.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.backends.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -143,10 +161,114 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.RoleRateThrottle',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
 
+# API throttling (core.throttling.RoleRateThrottle)
+# Budgets per throttle scope and User.role; 'anon' covers unauthenticated
+# callers and None means unlimited. Views without a scope use 'default'.
+API_THROTTLING = {
+    'CACHE_ALIAS': 'default',
+    'RATES': {
+        'default': {
+            'admin': None,
+            'manager': '5000/hour',
+            'user': '2000/hour',
+            'guest': '500/hour',
+            'anon': '300/hour',
+        },
+        'login': {
+            'anon': '20/min',
+        },
+        'inbox': {
+            'admin': None,
+            'manager': '120/min',
+            'user': '60/min',
+            'guest': '20/min',
+        },
+        'credits_spend': {
+            'admin': '120/min',
+            'manager': '60/min',
+            'user': '30/min',
+            'guest': '5/min',
+        },
+    },
+}
+
+# Cache Configuration
+# 'default' is shared between processes (point it at Redis in production);
+# 'local' is always per-process and is handy for single-node and test runs.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'ncibb-default'),
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ncibb-local',
+    },
+}
+
+# Authenticated user cache (authentication.backends.CachedJWTAuthentication)
+USER_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+    'LOCAL_MAXSIZE': 2048,
+}
+
+# Write-behind User.last_activity (authentication.middleware.LastActivityMiddleware)
+# A user is recorded at most once per GRANULARITY seconds; a background
+# thread flushes buffered timestamps every FLUSH_INTERVAL seconds.
+LAST_ACTIVITY = {
+    'CACHE_ALIAS': 'default',
+    'GRANULARITY': 60,
+    'FLUSH_INTERVAL': 10,
+    'BATCH_SIZE': 500,
+}
+
+# Online presence (authentication.presence); TTL must exceed
+# LAST_ACTIVITY['GRANULARITY'], which paces request heartbeats.
+PRESENCE = {
+    'CACHE_ALIAS': 'default',
+    'TTL': 150,
+    'VISIBILITY_TIMEOUT': 3600,
+}
+
+# Field-level profile privacy (authentication.privacy); compiled
+# visibility masks are cached per user and refreshed on save
+PRIVACY_PROJECTION = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 3600,
+}
+
+# Rendered profile/me responses (authentication.profile_cache), keyed by
+# the updated_at of the rows they are built from
+PROFILE_RESPONSE_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 600,
+}
+
+# Replayed responses for Idempotency-Key credit requests (credits.idempotency);
+# after TIMEOUT a retry is still answered from the stored transaction
+CREDIT_IDEMPOTENCY = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 600,
+    'LOCAL_TIMEOUT': 60,
+    'LOCAL_MAXSIZE': 1024,
+}
+
+# Two-phase credit reservations (credits.holds); TTLs in seconds.
+# Run `expire_credit_holds --interval N` to sweep expired holds.
+CREDIT_HOLDS = {
+    'DEFAULT_TTL': 600,
+    'MAX_TTL': 3600,
+    'SWEEP_BATCH_SIZE': 500,
+}
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -174,6 +296,27 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Celery Configuration
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_TIMEZONE = TIME_ZONE
+
+# Profile image renditions (authentication.images)
+# DISPATCH is 'celery', 'thread' (in-process background thread) or 'inline'.
+# Celery dispatch falls back to a thread when the broker is unreachable.
+IMAGE_RENDITIONS = {
+    'DISPATCH': os.environ.get('IMAGE_RENDITIONS_DISPATCH', 'thread' if DEBUG else 'celery'),
+    'FORMATS': ['webp', 'jpeg'],
+    'QUALITY': 82,
+    'SIZES': {
+        'profile_picture': {'thumbnail': 64, 'small': 160, 'medium': 320, 'large': 640},
+        'cover_image': {'small': 640, 'medium': 1280, 'large': 1920},
+    },
+}
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # React dev server
@@ -6,6 +6,7 @@ from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
+from authentication.views.media_views import serve_rendition
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -15,6 +16,12 @@ urlpatterns = [
     path('api/projects/', include('projects.urls')),
     path('api/messaging/', include('messaging.urls')),
     path('api/core/', include('core.urls')),
+    # Content-hashed image renditions; ahead of the SPA and plain media routes
+    re_path(
+        r'^%srenditions/(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'),
+        serve_rendition,
+        name='serve_rendition'
+    ),
 ]
 
 # In production, serve the React SPA for any non-API route
@@ -0,0 +1,74 @@
+"""
+Denormalized task counters on ``Project``.
+
+``task_count``, ``completed_task_count`` and ``open_task_count`` move by
+F-expression deltas as ``ProjectTask`` rows are created, deleted or change
+status (see ``projects.signals``), so they stay correct under concurrent
+writers. Queryset ``update()``/``bulk_create()`` bypass the signals; run
+``repair_project_task_counters`` after those.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Project, ProjectTask
+
+STATUS_COUNTERS = {
+    'completed': 'completed_task_count',
+    'pending': 'open_task_count',
+    'in_progress': 'open_task_count',
+}
+COUNTER_FIELDS = Project.COUNTER_FIELDS
+
+
+def deltas(status, sign):
+    changes = {'task_count': sign}
+    if status in STATUS_COUNTERS:
+        changes[STATUS_COUNTERS[status]] = sign
+    return changes
+
+
+def adjust(project_id, changes):
+    """Apply ``{field: delta}`` to a project's counters in one UPDATE."""
+    changes = {field: delta for field, delta in changes.items() if delta}
+    if not changes or project_id is None:
+        return
+    Project.objects.filter(pk=project_id).update(
+        **{field: F(field) + delta for field, delta in changes.items()}
+    )
+
+
+def _count(**filters):
+    tasks = ProjectTask.objects.filter(project_id=OuterRef('pk'), **filters).values('project_id').annotate(
+        total=Count('*')
+    ).values('total')
+    return Coalesce(Subquery(tasks), 0)
+
+
+def expected_counters():
+    """Annotations with each project's counters as counted from its tasks."""
+    return {
+        'expected_task_count': _count(),
+        'expected_completed_task_count': _count(status='completed'),
+        'expected_open_task_count': _count(status__in=[
+            status for status, field in STATUS_COUNTERS.items() if field == 'open_task_count'
+        ]),
+    }
+
+
+def recount(project_ids):
+    """
+    Recount the given projects from their tasks with set-based queries.
+    Returns the ids whose counters were wrong.
+    """
+    drift = Q()
+    for field in COUNTER_FIELDS:
+        drift |= ~Q(**{field: F(f'expected_{field}')})
+    stale = list(
+        Project.objects.filter(pk__in=project_ids).annotate(**expected_counters()).filter(drift).values_list('pk', flat=True)
+    )
+    if stale:
+        expected = expected_counters()
+        Project.objects.filter(pk__in=stale).update(
+            **{field: expected[f'expected_{field}'] for field in COUNTER_FIELDS}
+        )
+    return stale
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.counters import recount
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Recount the task counters on projects from their tasks and fix any that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Projects per batch')
+        parser.add_argument('--project', type=int, action='append', dest='project_ids', help='Only this project id (repeatable)')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        started = time.monotonic()
+        last_pk = 0
+        checked = repaired = 0
+
+        projects = Project.objects.order_by('pk')
+        if options['project_ids']:
+            projects = projects.filter(pk__in=options['project_ids'])
+
+        while True:
+            # Keyset pagination over project ids
+            project_ids = list(projects.filter(pk__gt=last_pk).values_list('pk', flat=True)[:chunk_size])
+            if not project_ids:
+                break
+            last_pk = project_ids[-1]
+
+            with transaction.atomic():
+                stale = recount(project_ids)
+            checked += len(project_ids)
+            repaired += len(stale)
+            self.stdout.write(f'  checked {checked}, repaired {repaired} (last id {last_pk})')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired task counters on {repaired} of {checked} projects in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def backfill_project_memberships(apps, schema_editor):
+    """Create membership rows for existing owners and collaborators."""
+    Project = apps.get_model('projects', 'Project')
+    ProjectMembership = apps.get_model('projects', 'ProjectMembership')
+
+    ProjectMembership.objects.bulk_create(
+        (
+            ProjectMembership(project_id=project_id, user_id=owner_id, role='owner')
+            for project_id, owner_id in Project.objects.values_list('pk', 'owner_id').iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    # Owners listed as collaborators already have their row
+    ProjectMembership.objects.bulk_create(
+        (
+            ProjectMembership(project_id=project_id, user_id=user_id, role='collaborator')
+            for project_id, user_id in Project.collaborators.through.objects.values_list(
+                'project_id', 'user_id'
+            ).iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_projectmembership'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_project_memberships, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:35
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_task_counters(apps, schema_editor):
+    """Count existing tasks into the new columns, one UPDATE for all projects."""
+    Project = apps.get_model('projects', 'Project')
+    ProjectTask = apps.get_model('projects', 'ProjectTask')
+
+    def count(**filters):
+        tasks = ProjectTask.objects.filter(project_id=OuterRef('pk'), **filters).values('project_id').annotate(
+            total=Count('*')
+        ).values('total')
+        return Coalesce(Subquery(tasks), 0)
+
+    Project.objects.update(
+        task_count=count(),
+        completed_task_count=count(status='completed'),
+        open_task_count=count(status__in=['pending', 'in_progress']),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_backfill_project_memberships'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='completed_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='open_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_task_counters, migrations.RunPython.noop),
+    ]
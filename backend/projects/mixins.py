@@ -0,0 +1,61 @@
+from django.db.models import OuterRef, Subquery
+from rest_framework.exceptions import NotFound, PermissionDenied
+
+from .models import Project, ProjectMembership
+
+
+def get_project_access(request, project_id):
+    """
+    Resolve ``(project, role)`` for the caller in one query, memoized on the
+    request. ``role`` is the caller's membership role, or 'admin'.
+
+    Raises NotFound for a missing project and PermissionDenied when the
+    caller is neither a member nor an admin.
+    """
+    resolved = getattr(request, '_project_access', None)
+    if resolved is None:
+        resolved = request._project_access = {}
+    project_id = int(project_id)
+    if project_id not in resolved:
+        user = request.user
+        try:
+            project = Project.objects.annotate(
+                access_role=Subquery(
+                    ProjectMembership.objects.filter(
+                        project=OuterRef('pk'), user=user
+                    ).values('role')[:1]
+                )
+            ).get(pk=project_id)
+        except Project.DoesNotExist:
+            resolved[project_id] = None
+        else:
+            role = 'admin' if user.role == 'admin' else project.access_role
+            resolved[project_id] = (project, role)
+
+    access = resolved[project_id]
+    if access is None:
+        raise NotFound('Project not found')
+    if access[1] is None:
+        raise PermissionDenied('You do not have access to this project')
+    return access
+
+
+class ProjectAccessMixin:
+    """
+    For views nested under ``<project_id>/``: resolves the project and the
+    caller's access once per request, however many times it is asked for.
+    """
+    project_url_kwarg = 'project_id'
+
+    def get_project_access(self):
+        return get_project_access(self.request, self.kwargs[self.project_url_kwarg])
+
+    def get_project(self):
+        return self.get_project_access()[0]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Not resolved for schema generation and the like
+        if self.kwargs.get(self.project_url_kwarg) is not None:
+            context['project'] = self.get_project()
+        return context
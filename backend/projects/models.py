@@ -1,9 +1,42 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
+class ProjectQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Projects the user owns or collaborates on (all of them for admins).
+
+        A plain join on ProjectMembership, which holds at most one row per
+        (project, user), so no DISTINCT is needed.
+        """
+        if user.role == 'admin':
+            return self.all()
+        return self.filter(memberships__user=user)
+
+    def with_list_stats(self):
+        """
+        Owner joined in and ``collaborators_total`` annotated, so listing
+        costs one query per page. Task counts are columns of their own.
+        """
+        collaborators = Project.collaborators.through.objects.filter(
+            project_id=OuterRef('pk')
+        ).values('project_id').annotate(total=Count('*')).values('total')
+        return self.select_related('owner').annotate(
+            collaborators_total=Coalesce(Subquery(collaborators), 0),
+        )
+
+    def has_access(self, user, project_id):
+        """Whether the user may see the project: a single EXISTS."""
+        if user.role == 'admin':
+            return self.filter(pk=project_id).exists()
+        return ProjectMembership.objects.filter(project_id=project_id, user=user).exists()
+
+
 class Project(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
@@ -28,8 +61,16 @@ class Project(models.Model):
     start_date = models.DateTimeField()
     end_date = models.DateTimeField(null=True, blank=True)
     budget = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Maintained by projects.counters as tasks change; open is pending + in progress
+    task_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_task_count = models.PositiveIntegerField(default=0, editable=False)
+    open_task_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProjectQuerySet.as_manager()
+
+    COUNTER_FIELDS = ('task_count', 'completed_task_count', 'open_task_count')
     
     class Meta:
         db_table = 'projects'
@@ -40,6 +81,22 @@ class Project(models.Model):
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        # The task counters only move through projects.counters; saving an
+        # existing project must not write back the values it was loaded with
+        if not self._state.adding and not kwargs.get('force_insert'):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in deferred
+                ]
+            kwargs['update_fields'] = [
+                name for name in update_fields if name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     @property
     def is_overdue(self):
         if self.end_date and self.status == 'active':
@@ -49,13 +106,45 @@ class Project(models.Model):
     
     @property
     def progress_percentage(self):
-        if self.tasks.exists():
-            completed_tasks = self.tasks.filter(status='completed').count()
-            total_tasks = self.tasks.count()
-            return (completed_tasks / total_tasks) * 100
+        if self.task_count:
+            return (self.completed_task_count / self.task_count) * 100
         return 0
 
 
+class ProjectMembership(models.Model):
+    """
+    One row per user with access to a project, mirroring ``Project.owner``
+    and ``Project.collaborators`` (kept in sync by projects.signals).
+    The owner keeps the 'owner' role even if also listed as a collaborator.
+    """
+    ROLE_CHOICES = [
+        ('owner', 'Owner'),
+        ('collaborator', 'Collaborator'),
+    ]
+
+    # Single-column FK indexes would duplicate the composite ones below
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='memberships', db_index=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='project_memberships', db_index=False)
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'project_memberships'
+        verbose_name = 'Project Membership'
+        verbose_name_plural = 'Project Memberships'
+        constraints = [
+            # Also serves access checks on (project, user)
+            models.UniqueConstraint(fields=['project', 'user'], name='unique_project_membership'),
+        ]
+        indexes = [
+            # "Projects visible to user": scan by user, read project ids from the index
+            models.Index(fields=['user', 'project'], name='project_membership_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.role} of {self.project_id}"
+
+
 class ProjectTask(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -62,7 +62,7 @@ class ProjectSerializer(serializers.ModelSerializer):
 class ProjectListSerializer(serializers.ModelSerializer):
     owner_name = serializers.CharField(source='owner.get_full_name', read_only=True)
     collaborators_count = serializers.SerializerMethodField()
-    tasks_count = serializers.SerializerMethodField()
+    tasks_count = serializers.IntegerField(source='task_count', read_only=True)
     progress_percentage = serializers.ReadOnlyField()
     is_overdue = serializers.ReadOnlyField()
     
@@ -75,11 +75,11 @@ class ProjectListSerializer(serializers.ModelSerializer):
             'is_overdue', 'created_at', 'updated_at'
         )
     
+    # Read from the ProjectQuerySet.with_list_stats annotation when present
     def get_collaborators_count(self, obj):
+        if hasattr(obj, 'collaborators_total'):
+            return obj.collaborators_total
         return obj.collaborators.count()
-    
-    def get_tasks_count(self, obj):
-        return obj.tasks.count()
 
 
 class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,139 @@
+"""
+Keep ``ProjectMembership`` in sync with ``Project.owner`` and the
+``Project.collaborators`` M2M, from either side of the relation, and the
+project task counters in step with ``ProjectTask`` rows.
+"""
+from collections import Counter
+
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.signals import transition
+
+from . import counters
+from .models import Project, ProjectMembership, ProjectTask
+
+UNKNOWN = object()
+
+
+def _sync_owner(project, old_owner_id):
+    if old_owner_id is not None and old_owner_id != project.owner_id:
+        old = ProjectMembership.objects.filter(project=project, user_id=old_owner_id)
+        if project.collaborators.filter(pk=old_owner_id).exists():
+            old.update(role='collaborator')
+        else:
+            old.delete()
+    ProjectMembership.objects.update_or_create(
+        project=project, user_id=project.owner_id, defaults={'role': 'owner'}
+    )
+
+
+@receiver(post_init, sender=Project)
+def remember_owner(sender, instance, **kwargs):
+    # From __dict__ so a deferred owner is not loaded just for this
+    instance._membership_owner_id = instance.__dict__.get('owner_id')
+
+
+@receiver(post_save, sender=Project)
+def sync_owner_membership(sender, instance, created, **kwargs):
+    old_owner_id = None if created else instance._membership_owner_id
+    if created or old_owner_id != instance.owner_id:
+        _sync_owner(instance, old_owner_id)
+    instance._membership_owner_id = instance.owner_id
+
+
+@receiver(m2m_changed, sender=Project.collaborators.through)
+def sync_collaborator_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        field = 'user' if reverse else 'project'
+        ProjectMembership.objects.filter(**{field: instance}, role='collaborator').delete()
+        return
+
+    if reverse:
+        pairs = [(project_id, instance.pk) for project_id in pk_set]
+    else:
+        pairs = [(instance.pk, user_id) for user_id in pk_set]
+
+    if action == 'post_add':
+        # An owner already has a row, which keeps its 'owner' role
+        ProjectMembership.objects.bulk_create(
+            [
+                ProjectMembership(project_id=project_id, user_id=user_id, role='collaborator')
+                for project_id, user_id in pairs
+            ],
+            ignore_conflicts=True,
+        )
+    else:
+        # One side of every pair is the same id, so this matches exactly pk_set
+        ProjectMembership.objects.filter(
+            project_id__in={project_id for project_id, _ in pairs},
+            user_id__in={user_id for _, user_id in pairs},
+            role='collaborator',
+        ).delete()
+
+
+def _task_state(task):
+    # From __dict__ so deferred fields are not loaded just for bookkeeping
+    return (task.__dict__.get('project_id', UNKNOWN), task.__dict__.get('status', UNKNOWN))
+
+
+@receiver(post_init, sender=ProjectTask)
+def remember_task_state(sender, instance, **kwargs):
+    instance._counter_state = _task_state(instance)
+
+
+def _skips_counted_fields(update_fields):
+    return update_fields is not None and not set(update_fields) & {'project', 'project_id', 'status'}
+
+
+@receiver(pre_save, sender=ProjectTask)
+def move_task_state(sender, instance, update_fields=None, **kwargs):
+    # The snapshot may be stale: move the row conditionally and count the
+    # change from the values actually replaced (see core.signals)
+    old = instance._counter_state
+    new = (instance.project_id, instance.status)
+    instance._counter_moved_from = old
+    if instance._state.adding or old == new or UNKNOWN in old or _skips_counted_fields(update_fields):
+        return
+    instance._counter_moved_from = transition(ProjectTask, instance.pk, ('project_id', 'status'), old, new)
+
+
+@receiver(post_save, sender=ProjectTask)
+def count_saved_task(sender, instance, created, update_fields=None, **kwargs):
+    old = instance._counter_state
+    moved_from = instance._counter_moved_from
+    new = (instance.project_id, instance.status)
+    instance._counter_state = new
+    if created:
+        counters.adjust(instance.project_id, counters.deltas(instance.status, 1))
+        return
+    if old == new or _skips_counted_fields(update_fields):
+        return
+    if UNKNOWN in old or moved_from is None:
+        # Loaded with a deferred project or status, or the row could not be
+        # moved conditionally: count from scratch
+        counters.recount({instance.project_id} | ({old[0]} - {UNKNOWN}))
+        return
+
+    changes = {}
+    for (project_id, status), sign in ((moved_from, -1), (new, 1)):
+        changes.setdefault(project_id, Counter()).update(counters.deltas(status, sign))
+    for project_id, deltas in changes.items():
+        counters.adjust(project_id, deltas)
+
+
+@receiver(pre_delete, sender=ProjectTask)
+def resolve_deleted_task_state(sender, instance, **kwargs):
+    if UNKNOWN in instance._counter_state:
+        # Deferred fields can't be loaded once the row is gone
+        instance._counter_state = ProjectTask.objects.filter(pk=instance.pk).values_list(
+            'project_id', 'status'
+        ).first() or (None, None)
+
+
+@receiver(post_delete, sender=ProjectTask)
+def count_deleted_task(sender, instance, **kwargs):
+    project_id, status = instance._counter_state
+    counters.adjust(project_id, counters.deltas(status, -1))
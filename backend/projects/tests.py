@@ -1,3 +1,215 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Project, ProjectComment, ProjectMembership, ProjectTask
+
+User = get_user_model()
+
+
+class ProjectMembershipTests(TestCase):
+    def setUp(self):
+        self.owner, self.alice, self.bob = [
+            User.objects.create_user(
+                username=f'member{i}',
+                email=f'member{i}@example.com',
+                password='testpass123'
+            )
+            for i in range(3)
+        ]
+        self.project = Project.objects.create(
+            owner=self.owner, title='P', description='', start_date=timezone.now()
+        )
+
+    def memberships(self):
+        return dict(
+            ProjectMembership.objects.filter(project=self.project).values_list('user_id', 'role')
+        )
+
+    def test_membership_mirrors_owner_and_collaborators(self):
+        self.project.collaborators.add(self.alice, self.owner)
+        self.bob.collaborated_projects.add(self.project)
+        self.assertEqual(self.memberships(), {
+            self.owner.pk: 'owner', self.alice.pk: 'collaborator', self.bob.pk: 'collaborator',
+        })
+
+        self.project.collaborators.remove(self.alice)
+        self.project.owner = self.bob
+        self.project.save()
+        self.assertEqual(self.memberships(), {self.owner.pk: 'collaborator', self.bob.pk: 'owner'})
+
+        self.project.collaborators.clear()
+        self.assertEqual(self.memberships(), {self.bob.pk: 'owner'})
+
+    def test_visible_to_is_one_join_without_distinct(self):
+        self.project.collaborators.add(self.alice)
+        Project.objects.create(owner=self.bob, title='Q', description='', start_date=timezone.now())
+
+        queryset = Project.objects.visible_to(self.alice)
+        self.assertNotIn('DISTINCT', str(queryset.query))
+        self.assertEqual(list(queryset), [self.project])
+        self.assertEqual(Project.objects.visible_to(self.owner).count(), 1)
+
+    def test_has_access(self):
+        self.project.collaborators.add(self.alice)
+        with self.assertNumQueries(1):
+            self.assertTrue(Project.objects.has_access(self.alice, self.project.pk))
+        self.assertFalse(Project.objects.has_access(self.bob, self.project.pk))
+
+
+class ProjectListQueryTests(TestCase):
+    def setUp(self):
+        self.owner, self.alice, self.bob = [
+            User.objects.create_user(
+                username=f'lister{i}', email=f'lister{i}@example.com', password='testpass123'
+            )
+            for i in range(3)
+        ]
+        for i in range(5):
+            project = Project.objects.create(
+                owner=self.owner, title=f'P{i}', description='', start_date=timezone.now()
+            )
+            project.collaborators.add(self.alice, self.bob)
+            for status in ['completed'] * i + ['pending', 'in_progress']:
+                ProjectTask.objects.create(
+                    project=project, assigned_to=self.alice, title='T', status=status
+                )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.alice)
+
+    def test_list_page_is_count_plus_one_query(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        rows = {row['title']: row for row in response.data['results']}
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows['P3']['collaborators_count'], 2)
+        self.assertEqual(rows['P3']['tasks_count'], 5)
+        self.assertEqual(rows['P3']['progress_percentage'], 60.0)
+        self.assertEqual(rows['P0']['progress_percentage'], 0)
+        self.assertEqual(rows['P0']['owner_name'], self.owner.get_full_name())
+
+
+class ProjectTaskCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='counter', email='counter@example.com', password='testpass123'
+        )
+        self.project, self.other = [
+            Project.objects.create(owner=self.user, title=title, description='', start_date=timezone.now())
+            for title in ('P', 'Q')
+        ]
+
+    def counts(self, project):
+        project.refresh_from_db()
+        return project.task_count, project.completed_task_count, project.open_task_count
+
+    def add_task(self, status='pending', project=None):
+        return ProjectTask.objects.create(
+            project=project or self.project, assigned_to=self.user, title='T', status=status
+        )
+
+    def test_counters_follow_task_changes(self):
+        task = self.add_task()
+        self.add_task('completed')
+        self.add_task('cancelled')
+        self.assertEqual(self.counts(self.project), (3, 1, 1))
+
+        task.status = 'completed'
+        task.save()
+        self.assertEqual(self.counts(self.project), (3, 2, 0))
+        self.assertAlmostEqual(self.project.progress_percentage, 200 / 3)
+
+        task.project = self.other
+        task.save()
+        self.assertEqual(self.counts(self.project), (2, 1, 0))
+        self.assertEqual(self.counts(self.other), (1, 1, 0))
+
+        ProjectTask.objects.only('id').get(pk=task.pk).delete()
+        self.assertEqual(self.counts(self.other), (0, 0, 0))
+
+        deferred = ProjectTask.objects.defer('status').get(project=self.project, status='completed')
+        deferred.status = 'in_progress'
+        deferred.save()
+        self.assertEqual(self.counts(self.project), (2, 0, 1))
+
+    def test_concurrent_status_changes_count_once(self):
+        task = self.add_task()
+        # Two requests loaded the task before either saved
+        first, second = ProjectTask.objects.get(pk=task.pk), ProjectTask.objects.get(pk=task.pk)
+        first.status = 'completed'
+        first.save()
+        second.status = 'completed'
+        second.save()
+        self.assertEqual(self.counts(self.project), (1, 1, 0))
+
+        first, second = ProjectTask.objects.get(pk=task.pk), ProjectTask.objects.get(pk=task.pk)
+        first.status = 'in_progress'
+        first.save()
+        second.project = self.other
+        second.status = 'cancelled'
+        second.save()
+        self.assertEqual(self.counts(self.project), (0, 0, 0))
+        self.assertEqual(self.counts(self.other), (1, 0, 0))
+
+    def test_saving_stale_project_keeps_counters(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        self.add_task('completed')
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(self.counts(self.project), (1, 1, 0))
+        self.assertEqual(self.project.title, 'Renamed')
+
+        stale.save(update_fields=['title', 'task_count'])
+        self.assertEqual(self.counts(self.project), (1, 1, 0))
+
+    def test_repair_command_fixes_bypassed_updates(self):
+        self.add_task()
+        self.add_task()
+        ProjectTask.objects.filter(project=self.project).update(status='completed')
+        self.assertEqual(self.counts(self.project), (2, 0, 2))
+        out = StringIO()
+        call_command('repair_project_task_counters', stdout=out)
+        self.assertIn('Repaired task counters on 1 of 2 projects', out.getvalue())
+        self.assertEqual(self.counts(self.project), (2, 2, 0))
+
+
+class ProjectAccessMixinTests(TestCase):
+    def setUp(self):
+        self.owner, self.outsider = [
+            User.objects.create_user(
+                username=f'nested{i}',
+                email=f'nested{i}@example.com',
+                password='testpass123'
+            )
+            for i in range(2)
+        ]
+        self.project = Project.objects.create(
+            owner=self.owner, title='P', description='', start_date=timezone.now()
+        )
+        self.client = APIClient()
+
+    def test_post_resolves_project_once(self):
+        self.client.force_authenticate(user=self.owner)
+        # project + access role, then the insert
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                f'/api/projects/{self.project.pk}/comments/', {'content': 'Hello'}, format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ProjectComment.objects.get().project, self.project)
 
-# Create your tests here.
+    def test_missing_and_forbidden_projects(self):
+        self.client.force_authenticate(user=self.outsider)
+        response = self.client.get(f'/api/projects/{self.project.pk}/tasks/')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(f'/api/projects/{self.project.pk + 100}/tasks/')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(
+            f'/api/projects/{self.project.pk}/add-collaborator/', {'user_id': self.outsider.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
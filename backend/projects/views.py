@@ -1,9 +1,10 @@
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Q
+from .mixins import ProjectAccessMixin, get_project_access
 from .models import Project, ProjectTask, ProjectComment, ProjectFile
 from .serializers import (
     ProjectSerializer, 
@@ -28,12 +29,10 @@ class ProjectListView(generics.ListCreateAPIView):
     ordering = ['-created_at']
     
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return Project.objects.all()
-        return Project.objects.filter(
-            Q(owner=user) | Q(collaborators=user)
-        ).distinct()
+        projects = Project.objects.visible_to(self.request.user)
+        if self.request.method == 'GET':
+            projects = projects.with_list_stats()
+        return projects
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -54,15 +53,10 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
         return ProjectSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return Project.objects.all()
-        return Project.objects.filter(
-            Q(owner=user) | Q(collaborators=user)
-        ).distinct()
+        return Project.objects.visible_to(self.request.user)
 
 
-class ProjectTaskListView(generics.ListCreateAPIView):
+class ProjectTaskListView(ProjectAccessMixin, generics.ListCreateAPIView):
     serializer_class = ProjectTaskSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -72,78 +66,41 @@ class ProjectTaskListView(generics.ListCreateAPIView):
     ordering = ['-created_at']
     
     def get_queryset(self):
-        project_id = self.kwargs['project_id']
-        user = self.request.user
-        
-        # Check if user has access to the project
-        try:
-            project = Project.objects.get(id=project_id)
-            if user.role != 'admin' and project.owner != user and user not in project.collaborators.all():
-                return ProjectTask.objects.none()
-            return ProjectTask.objects.filter(project=project)
-        except Project.DoesNotExist:
-            return ProjectTask.objects.none()
+        # Raises 404/403 unless the caller can access the project
+        return ProjectTask.objects.filter(project=self.get_project())
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ProjectTaskCreateUpdateSerializer
         return ProjectTaskSerializer
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['project'] = Project.objects.get(id=self.kwargs['project_id'])
-        return context
 
 
-class ProjectTaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProjectTaskDetailView(ProjectAccessMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProjectTaskSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        project_id = self.kwargs['project_id']
-        user = self.request.user
-        
-        # Check if user has access to the project
-        try:
-            project = Project.objects.get(id=project_id)
-            if user.role != 'admin' and project.owner != user and user not in project.collaborators.all():
-                return ProjectTask.objects.none()
-            return ProjectTask.objects.filter(project=project)
-        except Project.DoesNotExist:
-            return ProjectTask.objects.none()
-
-
-class ProjectCommentListView(generics.ListCreateAPIView):
+        # Raises 404/403 unless the caller can access the project
+        return ProjectTask.objects.filter(project=self.get_project())
+
+
+class ProjectCommentListView(ProjectAccessMixin, generics.ListCreateAPIView):
     serializer_class = ProjectCommentSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [OrderingFilter]
     ordering = ['-created_at']
     
     def get_queryset(self):
-        project_id = self.kwargs['project_id']
-        user = self.request.user
-        
-        # Check if user has access to the project
-        try:
-            project = Project.objects.get(id=project_id)
-            if user.role != 'admin' and project.owner != user and user not in project.collaborators.all():
-                return ProjectComment.objects.none()
-            return ProjectComment.objects.filter(project=project)
-        except Project.DoesNotExist:
-            return ProjectComment.objects.none()
+        # Raises 404/403 unless the caller can access the project
+        return ProjectComment.objects.filter(project=self.get_project())
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ProjectCommentCreateUpdateSerializer
         return ProjectCommentSerializer
-    
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['project'] = Project.objects.get(id=self.kwargs['project_id'])
-        return context
 
 
-class ProjectFileListView(generics.ListCreateAPIView):
+class ProjectFileListView(ProjectAccessMixin, generics.ListCreateAPIView):
     serializer_class = ProjectFileSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [SearchFilter, OrderingFilter]
@@ -151,21 +108,11 @@ class ProjectFileListView(generics.ListCreateAPIView):
     ordering = ['-created_at']
     
     def get_queryset(self):
-        project_id = self.kwargs['project_id']
-        user = self.request.user
-        
-        # Check if user has access to the project
-        try:
-            project = Project.objects.get(id=project_id)
-            if user.role != 'admin' and project.owner != user and user not in project.collaborators.all():
-                return ProjectFile.objects.none()
-            return ProjectFile.objects.filter(project=project)
-        except Project.DoesNotExist:
-            return ProjectFile.objects.none()
+        # Raises 404/403 unless the caller can access the project
+        return ProjectFile.objects.filter(project=self.get_project())
     
     def perform_create(self, serializer):
-        project = Project.objects.get(id=self.kwargs['project_id'])
-        serializer.save(project=project, uploaded_by=self.request.user)
+        serializer.save(project=self.get_project(), uploaded_by=self.request.user)
 
 
 @api_view(['GET'])
@@ -174,12 +121,7 @@ def project_stats_view(request):
     """Get project statistics for dashboard"""
     user = request.user
     
-    if user.role == 'admin':
-        projects = Project.objects.all()
-    else:
-        projects = Project.objects.filter(
-            Q(owner=user) | Q(collaborators=user)
-        ).distinct()
+    projects = Project.objects.visible_to(user)
     
     stats = {
         'total_projects': projects.count(),
@@ -197,37 +139,38 @@ def project_stats_view(request):
 def add_collaborator_view(request, project_id):
     """Add collaborator to project"""
     try:
-        project = Project.objects.get(id=project_id)
-        
-        # Check if user is owner or admin
-        if project.owner != request.user and request.user.role != 'admin':
-            return Response(
-                {"error": "Only project owner or admin can add collaborators"}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        user_id = request.data.get('user_id')
-        if not user_id:
-            return Response(
-                {"error": "user_id is required"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        from authentication.models import User
-        try:
-            user = User.objects.get(id=user_id)
-            project.collaborators.add(user)
-            return Response({
-                "message": f"Successfully added {user.get_full_name()} as collaborator"
-            }, status=status.HTTP_200_OK)
-        except User.DoesNotExist:
-            return Response(
-                {"error": "User not found"}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-            
-    except Project.DoesNotExist:
+        project, role = get_project_access(request, project_id)
+    except NotFound:
         return Response(
             {"error": "Project not found"}, 
             status=status.HTTP_404_NOT_FOUND
-        )
\ No newline at end of file
+        )
+    except PermissionDenied:
+        role = None
+
+    # Check if user is owner or admin
+    if role not in ('owner', 'admin'):
+        return Response(
+            {"error": "Only project owner or admin can add collaborators"}, 
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    user_id = request.data.get('user_id')
+    if not user_id:
+        return Response(
+            {"error": "user_id is required"}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    from authentication.models import User
+    try:
+        user = User.objects.get(id=user_id)
+        project.collaborators.add(user)
+        return Response({
+            "message": f"Successfully added {user.get_full_name()} as collaborator"
+        }, status=status.HTTP_200_OK)
+    except User.DoesNotExist:
+        return Response(
+            {"error": "User not found"}, 
+            status=status.HTTP_404_NOT_FOUND
+        )